@@ -0,0 +1,65 @@
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Sequence
+
+from generic import Input, Matcher
+
+
+# Values validated by a worker at a time: enough to outweigh handing the
+# work to a thread, few enough to share it out evenly
+DEFAULT_CHUNK_SIZE = 256
+
+
+def default_workers() -> int:
+    return os.process_cpu_count() or 1
+
+
+def _validate_chunk(
+    matcher: type[Matcher[Any]], values: Sequence[Input]
+) -> list[bool]:
+    match_full = matcher.match_full
+    return [match_full(value) for value in values]
+
+
+def validate_batch(
+    matcher: type[Matcher[Any]],
+    values: Sequence[Input],
+    *,
+    executor: Executor | None = None,
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[bool]:
+    """
+    match_full for each of values, in order, shared out between threads in
+    chunks of chunk_size.
+
+    Matching keeps no shared mutable state, so on free-threaded builds of
+    CPython the chunks run in parallel. With the GIL they take turns, and
+    the batch takes about as long as validating it in one thread.
+
+    Pass an executor to reuse its threads across batches. Otherwise a
+    ThreadPoolExecutor with workers threads, the number of CPUs by default,
+    is made for the batch. Batches of a single chunk are validated in the
+    calling thread.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if len(values) <= chunk_size:
+        return _validate_chunk(matcher, values)
+
+    chunks = [
+        values[chunk_start:chunk_start + chunk_size]
+        for chunk_start in range(0, len(values), chunk_size)
+    ]
+    matchers = [matcher] * len(chunks)
+    own_executor = executor is None
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=workers or default_workers())
+    results: list[bool] = []
+    try:
+        for chunk_results in executor.map(_validate_chunk, matchers, chunks):
+            results.extend(chunk_results)
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return results
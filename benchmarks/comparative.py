@@ -0,0 +1,249 @@
+import argparse
+import base64
+import binascii
+import ipaddress
+import json
+import socket
+import sys
+from typing import Any, Callable, NamedTuple, Sequence
+from urllib.parse import urlsplit
+
+from benchmarks.corpora import CORPORA
+from benchmarks.suite import measure
+from registry import resolve_matcher
+
+
+# The stdlib functions take str, so decoding the received bytes is counted as
+# part of their cost. Each returns whether the stdlib accepts the input.
+
+def ipaddress_ipv4(val: bytes) -> bool:
+    try:
+        ipaddress.IPv4Address(val.decode("ascii"))
+    except ValueError:
+        return False
+    return True
+
+
+def ipaddress_ipv6(val: bytes) -> bool:
+    try:
+        ipaddress.IPv6Address(val.decode("ascii"))
+    except ValueError:
+        return False
+    return True
+
+
+def inet_pton_ipv4(val: bytes) -> bool:
+    try:
+        socket.inet_pton(socket.AF_INET, val.decode("ascii"))
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def inet_pton_ipv6(val: bytes) -> bool:
+    try:
+        socket.inet_pton(socket.AF_INET6, val.decode("ascii"))
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def binascii_base64(val: bytes) -> bool:
+    if not val:
+        # The grammar is base64-value-non-empty
+        return False
+    try:
+        binascii.a2b_base64(val, strict_mode=True)
+    except binascii.Error:
+        return False
+    return True
+
+
+def base64_b64decode(val: bytes) -> bool:
+    if not val:
+        return False
+    try:
+        base64.b64decode(val, validate=True)
+    except binascii.Error:
+        return False
+    return True
+
+
+def urllib_host(val: bytes) -> bool:
+    """
+    urlsplit accepts the value as the whole of the authority, and it has no
+    userinfo or port. urlsplit only validates bracketed IP literals, so it
+    accepts some hosts the grammar rejects.
+    """
+    try:
+        text = val.decode("ascii")
+        split = urlsplit("//" + text)
+        port = split.port
+    except ValueError:
+        return False
+    return split.netloc == text and "@" not in text and port is None
+
+
+def urllib_uri_reference(val: bytes) -> bool:
+    """
+    urlsplit splits the value without raising. It only rejects malformed
+    bracketed hosts and ports, so it accepts far more than the grammar.
+    """
+    try:
+        split = urlsplit(val.decode("ascii"))
+        split.port
+    except ValueError:
+        return False
+    return True
+
+
+class Comparison(NamedTuple):
+    matcher: str
+    stdlib_name: str
+    stdlib_function: Callable[[bytes], bool]
+
+
+COMPARISONS = (
+    Comparison("rfc3986.IPv4Address", "ipaddress.IPv4Address",
+               ipaddress_ipv4),
+    Comparison("rfc3986.IPv4Address", "socket.inet_pton(AF_INET)",
+               inet_pton_ipv4),
+    Comparison("rfc3986.IPv6Address", "ipaddress.IPv6Address",
+               ipaddress_ipv6),
+    Comparison("rfc3986.IPv6Address", "socket.inet_pton(AF_INET6)",
+               inet_pton_ipv6),
+    Comparison("rfc6455.Base64ValueNonEmpty", "binascii.a2b_base64",
+               binascii_base64),
+    Comparison("rfc6455.Base64ValueNonEmpty", "base64.b64decode",
+               base64_b64decode),
+    Comparison("rfc6455.SecWebSocketAccept", "binascii.a2b_base64",
+               binascii_base64),
+    Comparison("rfc3986.Host", "urllib.parse.urlsplit", urllib_host),
+    Comparison("rfc3986.URIReference", "urllib.parse.urlsplit",
+               urllib_uri_reference),
+)
+
+# Comparisons where the stdlib function is a lenient parser rather than a
+# validator, so it may accept inputs the grammar rejects
+LENIENT_COMPARISONS = frozenset({"rfc3986.Host", "rfc3986.URIReference"})
+
+
+def disagreements(
+    comparison: Comparison, samples: Sequence[bytes]
+) -> list[dict[str, Any]]:
+    """
+    The samples where the matcher and the stdlib function differ on whether
+    the input is acceptable.
+    """
+    matcher = resolve_matcher(comparison.matcher)
+    found = []
+    for sample in samples:
+        matcher_accepts = matcher.match_full(sample)
+        stdlib_accepts = comparison.stdlib_function(sample)
+        if matcher_accepts != stdlib_accepts:
+            found.append({
+                "sample": sample[:64].decode("latin-1"),
+                "length": len(sample),
+                "matcher_accepts": matcher_accepts,
+                "stdlib_accepts": stdlib_accepts,
+            })
+    return found
+
+
+def run_comparisons(
+    name_filter: str = "",
+    *,
+    min_time: float = 0.1,
+    repeat: int = 3,
+) -> list[dict[str, Any]]:
+    """
+    Time each matcher and its stdlib counterpart on every category of the
+    matcher's corpus. relative_speed above 1 means the matcher is faster.
+    """
+    results = []
+    for comparison in COMPARISONS:
+        if name_filter not in comparison.matcher:
+            continue
+        matcher = resolve_matcher(comparison.matcher)
+        corpus = CORPORA[comparison.matcher]
+        categories = {}
+        for category, samples in corpus.categories().items():
+            matcher_measurement = measure(
+                matcher.match_full, samples, min_time=min_time, repeat=repeat
+            )
+            stdlib_measurement = measure(
+                comparison.stdlib_function, samples,
+                min_time=min_time, repeat=repeat,
+            )
+            categories[category] = {
+                "matcher_ops_per_sec": matcher_measurement.ops_per_sec,
+                "stdlib_ops_per_sec": stdlib_measurement.ops_per_sec,
+                "relative_speed": (
+                    matcher_measurement.ops_per_sec
+                    / stdlib_measurement.ops_per_sec
+                ),
+                "disagreements": disagreements(comparison, samples),
+            }
+        results.append({
+            "matcher": comparison.matcher,
+            "stdlib": comparison.stdlib_name,
+            "categories": categories,
+        })
+    return results
+
+
+def format_comparisons(results: list[dict[str, Any]]) -> str:
+    lines = [
+        f"{'matcher':<28} {'stdlib':<28} {'category':<18} "
+        f"{'matcher/s':>12} {'stdlib/s':>12} {'speed':>7} {'disagree':>8}"
+    ]
+    for result in results:
+        for category, measurement in result["categories"].items():
+            lines.append(
+                f"{result['matcher']:<28} {result['stdlib']:<28} "
+                f"{category:<18} "
+                f"{measurement['matcher_ops_per_sec']:>12,.0f} "
+                f"{measurement['stdlib_ops_per_sec']:>12,.0f} "
+                f"{measurement['relative_speed']:>6.2f}x "
+                f"{len(measurement['disagreements']):>8}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.comparative",
+        description="Compare matchers with the equivalent stdlib parsers",
+    )
+    parser.add_argument(
+        "--filter", default="",
+        help="only compare matchers whose name contains this",
+    )
+    parser.add_argument(
+        "--output", "-o", help="write the JSON results to this file",
+    )
+    parser.add_argument("--min-time", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results = run_comparisons(
+        args.filter, min_time=args.min_time, repeat=args.repeat
+    )
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    print(format_comparisons(results))
+    for result in results:
+        for category, measurement in result["categories"].items():
+            for disagreement in measurement["disagreements"]:
+                print(
+                    f"DISAGREE {result['matcher']} vs {result['stdlib']}: "
+                    f"{disagreement['sample']!r} "
+                    f"matcher={disagreement['matcher_accepts']} "
+                    f"stdlib={disagreement['stdlib_accepts']}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,470 @@
+from typing import NamedTuple, Sequence
+
+from peg.generate import Generator
+from peg.grammars import grammar, rules
+from registry import public_matchers
+
+
+# Samples at least this long are reported in the "-long" categories.
+LONG_SAMPLE_LENGTH = 64
+
+
+class Corpus(NamedTuple):
+    """
+    Inputs for one matcher.
+
+    valid: every sample must pass match_full.
+    near_miss: every sample must fail match_full, typically by a single byte.
+    adversarial: long or pathological inputs, which may pass or fail, chosen
+    to exercise the worst case of the matcher.
+    """
+    valid: Sequence[bytes]
+    near_miss: Sequence[bytes]
+    adversarial: Sequence[bytes] = ()
+
+    def categories(self) -> dict[str, list[bytes]]:
+        """
+        Group the samples into "<kind>-<size>" categories such as
+        "valid-short" or "near-miss-long". Empty categories are left out.
+        """
+        categories: dict[str, list[bytes]] = {}
+        for kind, samples in (
+            ("valid", self.valid),
+            ("near-miss", self.near_miss),
+            ("adversarial", self.adversarial),
+        ):
+            for sample in samples:
+                if len(sample) >= LONG_SAMPLE_LENGTH:
+                    size = "long"
+                else:
+                    size = "short"
+                categories.setdefault(f"{kind}-{size}", []).append(sample)
+        return categories
+
+
+_ipv6_valid = [
+    b"::",
+    b"::1",
+    b"1080::8:800:200C:417A",
+    b"FF01::101",
+    b"fe80::1ff:fe23:4567:890a",
+    b"2001:db8:85a3:0:0:8a2e:370:7334",
+    b"2001:0db8:85a3:0000:0000:8a2e:0370:7334",
+    b"::FFFF:129.144.52.38",
+    b"0:0:0:0:0:FFFF:129.144.52.38",
+    b"1:2:3:4:5:6:7::",
+]
+
+_ipv6_near_miss = [
+    b":1",
+    b"1:2:3:4:5:6:7",
+    b"1:2:3:4:5:6:7:8:9",
+    b"1::2::3",
+    b"12345::1",
+    b"::FFFF:129.144.52.256",
+    b"2001:db8:85a3:0:0:8a2e:370:733g",
+]
+
+_domain_valid = [
+    b"a",
+    b"example",
+    b"www.example.com",
+    b"mail-01.eu-west-1.compute.internal",
+    b"a" * 63,
+    b".".join([b"a" * 63] * 3) + b"." + b"b" * 61,
+]
+
+_domain_near_miss = [
+    b"-example",
+    b"example-.com",
+    b"www..example.com",
+    b"1example.com",
+    b"a" * 64,
+    b"www.example.com.",
+    b"exa_mple.com",
+]
+
+_base64_valid = [
+    b"dGhlIHNhbXBsZSBub25jZQ==",
+    b"s3pPLMBiTxaQ9kYGzzhZRbK+xOo=",
+    b"QUJD",
+    b"QUI=",
+    b"QQ==",
+    b"QUJD" * 256,
+    b"QUJD" * 255 + b"QQ==",
+]
+
+_base64_near_miss = [
+    b"dGhlIHNhbXBsZSBub25jZQ=",
+    b"s3pPLMBiTxaQ9kYGzzhZRbK-xOo=",
+    b"QUJ",
+    b"Q===",
+    b"QU=D",
+    b"QUJD" * 256 + b"Q",
+    b"QUJD" * 255 + b"QQ=A",
+]
+
+
+CORPORA: dict[str, Corpus] = {
+    "rfc2234.Digit": Corpus(
+        valid=[b"0", b"5", b"9"],
+        near_miss=[b"a", b"/", b":", b"00", b""],
+    ),
+    "rfc2234.Alpha": Corpus(
+        valid=[b"a", b"z", b"A", b"Z"],
+        near_miss=[b"@", b"[", b"`", b"{", b"1", b"ab", b""],
+    ),
+    "rfc2234.HexDig": Corpus(
+        valid=[b"0", b"9", b"a", b"f", b"A", b"F"],
+        near_miss=[b"g", b"G", b"@", b"/", b"aa", b""],
+    ),
+    "rfc2616.Octet": Corpus(
+        valid=[b"\x00", b"a", b"\xff"],
+        near_miss=[b"", b"ab"],
+    ),
+    "rfc2616.UpAlpha": Corpus(
+        valid=[b"A", b"M", b"Z"],
+        near_miss=[b"a", b"@", b"[", b"AA", b""],
+    ),
+    "rfc2616.LoAlpha": Corpus(
+        valid=[b"a", b"m", b"z"],
+        near_miss=[b"A", b"`", b"{", b"aa", b""],
+    ),
+    "rfc2616.CRLF": Corpus(
+        valid=[b"\r\n"],
+        near_miss=[b"\n\r", b"\r", b"\n", b"\r\n\r\n", b""],
+    ),
+    "rfc2616.LWS": Corpus(
+        valid=[b" ", b"\t", b"\r\n ", b"\r\n\t  ", b" " * 128],
+        near_miss=[b"\r\n", b"\r\n a", b"\r\n\r\n ", b" " * 128 + b"\r\n"],
+        adversarial=[b" \t" * 8192, b"\r\n" + b" " * 16384 + b"x"],
+    ),
+    "rfc2616.Char": Corpus(
+        valid=[b"\x00", b"a", b"\x7f"],
+        near_miss=[b"\x80", b"\xff", b"aa", b""],
+    ),
+    "rfc2616.Ctl": Corpus(
+        valid=[b"\x00", b"\t", b"\x1f", b"\x7f"],
+        near_miss=[b" ", b"a", b"\x80", b"\t\t", b""],
+    ),
+    "rfc2616.Separators": Corpus(
+        valid=[b"(", b"@", b"\\", b'"', b"}", b" ", b"\t"],
+        near_miss=[b"a", b"-", b"!", b"((", b""],
+    ),
+    "rfc2616.TChar": Corpus(
+        valid=[b"a", b"Z", b"0", b"!", b"~", b"'"],
+        near_miss=[b"(", b" ", b"\x7f", b"\x80", b"aa", b""],
+    ),
+    "rfc2616.Token": Corpus(
+        valid=[b"GET", b"Content-Type", b"x-custom_header.1", b"a" * 128],
+        near_miss=[b"", b"Content Type", b"a:b", b"caf\xc3\xa9",
+                   b"a" * 128 + b"/"],
+        adversarial=[b"a" * 16384, b"a" * 16383 + b"("],
+    ),
+    "rfc2616.QuotedPair": Corpus(
+        valid=[b"\\\\", b'\\"', b"\\\x00", b"\\\x7f"],
+        near_miss=[b"\\", b"\\\x80", b"a\\", b""],
+    ),
+    "rfc2616.QuotedString": Corpus(
+        valid=[b'""', b'"text"', b'"a \\"quoted\\" word"',
+               b'"folded\r\n value"', b'"caf\xc3\xa9"',
+               b'"' + b"a" * 128 + b'"'],
+        near_miss=[b'"', b'"abc', b'"a"b', b'"\\"', b'"a\r\nb"',
+                   b'"' + b"a" * 128],
+        adversarial=[b'"' + b"\\a" * 8192 + b'"', b'"' + b"a" * 16384],
+    ),
+    "rfc2616.Comment": Corpus(
+        valid=[b"()", b"(Windows NT 10.0; Win64; x64)", b"(a (nested) b)",
+               b"(\\))", b"(" * 32 + b")" * 32],
+        near_miss=[b"(", b"(a", b"(a))", b"((a)", b"(a\x00)",
+                   b"(" * 32 + b")" * 31],
+        adversarial=[b"(" * 8192 + b")" * 8192, b"(" * 16384],
+    ),
+    "rfc2616.FieldName": Corpus(
+        valid=[b"Host", b"Content-Length", b"X-Forwarded-For"],
+        near_miss=[b"", b"Host:", b"Content Length", b"\xff"],
+    ),
+    "rfc2616.FieldContent": Corpus(
+        valid=[b"text/html; charset=utf-8", b'"quoted"', b"a\tb",
+               b"a" * 128],
+        near_miss=[b"", b"a\r\n b", b"a\x00", b"a\r"],
+        adversarial=[b"a" * 16384],
+    ),
+    "rfc2616.FieldValue": Corpus(
+        valid=[b"", b"text/html", b"first,\r\n second", b"a\r\n\t\r\n b",
+               b"x" * 128],
+        near_miss=[b"a\r\n", b"a\r\nb", b"a\nb", b"a\x7f"],
+        adversarial=[b"a\r\n " * 4096, b" " * 16384 + b"\r\n"],
+    ),
+    "rfc2616.HTTPVersion": Corpus(
+        valid=[b"HTTP/1.1", b"HTTP/1.0", b"http/2.0", b"HTTP/10.20"],
+        near_miss=[b"HTTP/1", b"HTTP/.1", b"HTTP/1.", b"HTTP 1.1",
+                   b"HTTPS/1.1", b""],
+    ),
+    "rfc2616.Method": Corpus(
+        valid=[b"GET", b"POST", b"OPTIONS", b"PURGE"],
+        near_miss=[b"", b"GET ", b"GE(T", b"G\xc3\xa9T"],
+    ),
+    "rfc2616.RequestURI": Corpus(
+        valid=[b"*", b"/", b"/index.html?q=1", b"http://example.com/",
+               b"example.com:443", b"/" + b"a" * 128],
+        near_miss=[b"", b"/a b", b"/\x7f", b"/caf\xc3\xa9"],
+    ),
+    "rfc2616.RequestLine": Corpus(
+        valid=[b"GET / HTTP/1.1\r\n",
+               b"OPTIONS * HTTP/1.1\r\n",
+               b"CONNECT example.com:443 HTTP/1.1\r\n",
+               b"GET /" + b"a" * 128 + b"?q=1 HTTP/1.0\r\n"],
+        near_miss=[b"GET / HTTP/1.1", b"GET / HTTP/1.1\n",
+                   b"GET  / HTTP/1.1\r\n", b"GET / HTTP/1.1 \r\n",
+                   b"GET /a b HTTP/1.1\r\n", b""],
+        adversarial=[b"G" * 16384, b"GET /" + b"a" * 16384],
+    ),
+    "rfc2616.StatusCode": Corpus(
+        valid=[b"200", b"404", b"999"],
+        near_miss=[b"20", b"2000", b"20a", b""],
+    ),
+    "rfc2616.ReasonPhrase": Corpus(
+        valid=[b"", b"OK", b"Not Found", b"Caf\xc3\xa9"],
+        near_miss=[b"OK\r\n", b"Not\nFound", b"\x00"],
+    ),
+    "rfc2616.StatusLine": Corpus(
+        valid=[b"HTTP/1.1 200 OK\r\n", b"HTTP/1.1 204 \r\n",
+               b"HTTP/1.0 404 Not Found\r\n"],
+        near_miss=[b"HTTP/1.1 200 OK", b"HTTP/1.1 200\r\n",
+                   b"HTTP/1.1 20 OK\r\n", b"HTTP/1.1 200 O\rK\r\n", b""],
+        adversarial=[b"HTTP/1.1 200 " + b"a" * 16384 + b"\r\n"],
+    ),
+    "rfc1034.LetDig": Corpus(
+        valid=[b"a", b"Z", b"0", b"9"],
+        near_miss=[b"-", b"_", b".", b"ab", b""],
+    ),
+    "rfc1034.LetDigHyp": Corpus(
+        valid=[b"a", b"Z", b"0", b"-"],
+        near_miss=[b"_", b".", b"--", b""],
+    ),
+    "rfc1034.LDHStr": Corpus(
+        valid=[b"a", b"abc---123", b"X-Y-Z", b"a-" * 64],
+        near_miss=[b"", b"_", b"abc_def", b"a-" * 64 + b"."],
+        adversarial=[b"a-" * 8192, b"-" * 16384 + b"_"],
+    ),
+    "rfc1034.Label": Corpus(
+        valid=[b"a", b"example", b"x-1", b"a" * 63],
+        near_miss=[b"", b"1abc", b"abc-", b"a" * 64, b"ab_c"],
+        adversarial=[b"a" * 16384, b"a" + b"-" * 16384],
+    ),
+    "rfc1034.SubDomain": Corpus(
+        valid=_domain_valid,
+        near_miss=_domain_near_miss,
+        adversarial=[b"a." * 8191 + b"a", b"a" * 16384, b"a-" * 8192],
+    ),
+    "rfc1034.Domain": Corpus(
+        valid=_domain_valid + [b""],
+        near_miss=_domain_near_miss + [b" ", b"a." * 128 + b"a"],
+        adversarial=[b"a." * 8191 + b"a", b"a" * 16384],
+    ),
+    "rfc3986.H16": Corpus(
+        valid=[b"0", b"fF", b"abc", b"1234"],
+        near_miss=[b"", b"12345", b"g", b"12:"],
+    ),
+    "rfc3986.DecOctet": Corpus(
+        valid=[b"0", b"9", b"10", b"99", b"100", b"199", b"249", b"255"],
+        near_miss=[b"", b"00", b"01", b"256", b"260", b"1000", b"-1"],
+    ),
+    "rfc3986.IPv4Address": Corpus(
+        valid=[b"0.0.0.0", b"127.0.0.1", b"192.168.100.200",
+               b"255.255.255.255"],
+        near_miss=[b"256.0.0.1", b"1.2.3", b"1.2.3.4.", b"01.2.3.4",
+                   b"1..2.3", b"1.2.3.4.5"],
+        adversarial=[b"1." * 8192, b"9" * 16384],
+    ),
+    "rfc3986.LS32": Corpus(
+        valid=[b"1:1", b"ffff:ffff", b"1.2.3.4", b"255.255.255.255"],
+        near_miss=[b"1:", b"12345:1", b"1.2.3.256", b"1:1:1"],
+    ),
+    "rfc3986.IPv6Address": Corpus(
+        valid=_ipv6_valid,
+        near_miss=_ipv6_near_miss,
+        adversarial=[b"1:" * 8192, b"f" * 16384, b":" * 16384,
+                     b"::" + b"1:" * 8192],
+    ),
+    "rfc3986.Unreserved": Corpus(
+        valid=[b"a", b"Z", b"0", b"-", b".", b"_", b"~"],
+        near_miss=[b"!", b":", b"%", b"ab", b""],
+    ),
+    "rfc3986.SubDelims": Corpus(
+        valid=[b"!", b"$", b"&", b"'", b"(", b")", b"*", b"+", b",", b";",
+               b"="],
+        near_miss=[b".", b":", b"a", b"==", b""],
+    ),
+    "rfc3986.IPvFuture": Corpus(
+        valid=[b"v1.a", b"vFF.::", b"v7.fe80:1:2:3", b"v1." + b"a" * 128],
+        near_miss=[b"v.1", b"v1.", b"vg.1", b"v1.a/", b"w1.a"],
+        adversarial=[b"v" + b"f" * 16384, b"v1." + b"a:" * 8192 + b"/"],
+    ),
+    "rfc3986.IPLiteral": Corpus(
+        valid=[b"[::]", b"[::1]", b"[2001:db8::7]", b"[v1.fe80::a+en1]",
+               b"[::FFFF:129.144.52.38]"],
+        near_miss=[b"[]", b"[::", b"::]", b"[127.0.0.1]", b"[::1]x"],
+        adversarial=[b"[" + b"1:" * 8192 + b"]", b"[" * 16384],
+    ),
+    "rfc3986.PctEncoded": Corpus(
+        valid=[b"%00", b"%ff", b"%A0", b"%7E"],
+        near_miss=[b"%", b"%0", b"%0g", b"%000", b"a00"],
+    ),
+    "rfc3986.RegName": Corpus(
+        valid=[b"", b"localhost", b"www.example.com", b"%E2%82%AC.example",
+               b"sub_domain!$&'()*+,;=", b"a" * 255],
+        near_miss=[b"exa mple", b"user@host", b"host:80", b"%zz",
+                   b"a" * 255 + b"/"],
+        adversarial=[b"%41" * 5461, b"a" * 16384, b"%4" * 8192],
+    ),
+    "rfc3986.Host": Corpus(
+        valid=[b"", b"example.com", b"127.0.0.1", b"[::1]",
+               b"[2001:db8::7]", b"[v1.x]", b"%E2%82%AC.example"],
+        near_miss=[b"[::1", b"exa mple.com", b"example.com:80", b"[]",
+                   b"host/path"],
+        adversarial=[b"[" + b"1:" * 8192 + b"]", b"%41" * 5461,
+                     b"1." * 8192],
+    ),
+    "rfc3986.Scheme": Corpus(
+        valid=[b"http", b"HTTPS", b"svn+ssh", b"a.b-c", b"z"],
+        near_miss=[b"", b"1http", b"+a", b"http:", b"ht_tp"],
+    ),
+    "rfc3986.UserInfo": Corpus(
+        valid=[b"", b"user", b"user:password", b"%41b!$&'()*+,;=:"],
+        near_miss=[b"user@", b"us er", b"%4", b"a/b"],
+        adversarial=[b"%41" * 5461, b"a:" * 8192 + b"@"],
+    ),
+    "rfc3986.Port": Corpus(
+        valid=[b"", b"80", b"8080", b"65536"],
+        near_miss=[b"80a", b":80", b"-1"],
+    ),
+    "rfc3986.Authority": Corpus(
+        valid=[b"", b"example.com", b"user@example.com:8080", b"[::1]:443",
+               b"1.2.3.4", b"1.2.3.4a", b"user:pw@[v1.x]:", b"a" * 128],
+        near_miss=[b"exa mple.com", b"example.com:80a", b"[::1", b"a@b@c",
+                   b"host/path"],
+        adversarial=[b"a@" * 8192, b"[" + b"1:" * 8192 + b"]:80",
+                     b"%41" * 5461 + b":"],
+    ),
+    "rfc3986.PathAbEmpty": Corpus(
+        valid=[b"", b"/", b"//", b"/a/b/c", b"/a:b@c/%20"],
+        near_miss=[b"a", b"/a b", b"/a?b", b"/%zz"],
+        adversarial=[b"/" * 16384, b"/a" * 8192 + b"#"],
+    ),
+    "rfc3986.PathAbsolute": Corpus(
+        valid=[b"/", b"/a", b"/a/b/", b"/a:b/c"],
+        near_miss=[b"", b"//", b"//a", b"a/b", b"/a b"],
+    ),
+    "rfc3986.PathNoScheme": Corpus(
+        valid=[b"a", b"a/b:c", b"./a:b", b"%41/", b"@a"],
+        near_miss=[b"", b"a:b", b"/a", b":a", b"a b"],
+    ),
+    "rfc3986.PathRootless": Corpus(
+        valid=[b"a", b"a:b", b"a/b/", b"%41:@"],
+        near_miss=[b"", b"/a", b"a b", b"a?"],
+    ),
+    "rfc3986.Query": Corpus(
+        valid=[b"", b"q=1&r=2", b"a/b?c", b"%20+"],
+        near_miss=[b"q=1#f", b"a b", b"%2", b"[]"],
+        adversarial=[b"a=%41&" * 2730, b"%2" * 8192],
+    ),
+    "rfc3986.Fragment": Corpus(
+        valid=[b"", b"section-1", b"a/b?c", b"%20"],
+        near_miss=[b"a#b", b"a b", b"%g0"],
+    ),
+    "rfc3986.URI": Corpus(
+        valid=[b"http://example.com", b"https://user@example.com:8443/a?q#f",
+               b"mailto:user@example.com", b"urn:isbn:0451450523",
+               b"file:///etc/hosts", b"ldap://[2001:db8::7]/c=GB?one",
+               b"http://example.com/" + b"a/" * 64],
+        near_miss=[b"", b"//example.com", b"/path", b"http://exa mple.com",
+                   b"1http://a", b"http://[::1/", b"http://a/#f#g"],
+        adversarial=[b"a:" + b"/a" * 8192, b"a:" + b"%41" * 5461,
+                     b"http://" + b"a" * 16384 + b" "],
+    ),
+    "rfc3986.AbsoluteURI": Corpus(
+        valid=[b"http://example.com", b"http://a/b?q", b"urn:x"],
+        near_miss=[b"http://a/b#f", b"/a", b""],
+    ),
+    "rfc3986.RelativeRef": Corpus(
+        valid=[b"", b"//example.com/a", b"/a/b?q#f", b"a/b:c", b"?q",
+               b"#f", b"../a"],
+        near_miss=[b"a:b", b"http://a", b"/a b", b"#a#b"],
+        adversarial=[b"../" * 5461, b"a" * 16384 + b":"],
+    ),
+    "rfc3986.URIReference": Corpus(
+        valid=[b"", b"http://example.com/a?b#c", b"//a", b"/a", b"a/b",
+               b"a:b", b"?q", b"#f", b"mailto:x@y"],
+        near_miss=[b"http://a b", b"a b", b"http://[::1", b"#a#b", b"%zz",
+                   b":a"],
+        adversarial=[b"a:" + b"/a" * 8192, b"//" + b"[" * 16384],
+    ),
+    "rfc6455.Base64Char": Corpus(
+        valid=[b"a", b"Z", b"0", b"+", b"/"],
+        near_miss=[b"=", b"-", b"_", b"aa", b""],
+    ),
+    "rfc6455.Base64Data": Corpus(
+        valid=[b"QUJD", b"ab+/", b"0000"],
+        near_miss=[b"QUJ", b"QU=D", b"QUJ-", b"QUJDQ", b""],
+    ),
+    "rfc6455.Base64Padding": Corpus(
+        valid=[b"QQ==", b"QUI="],
+        near_miss=[b"Q===", b"====", b"QUJD", b"QU=I", b""],
+    ),
+    "rfc6455.Base64ValueNonEmpty": Corpus(
+        valid=_base64_valid,
+        near_miss=_base64_near_miss + [b""],
+        adversarial=[b"A" * 16384, b"A" * 16383 + b"!", b"=" * 16384],
+    ),
+    "rfc6455.SecWebSocketAccept": Corpus(
+        valid=_base64_valid,
+        near_miss=_base64_near_miss + [b""],
+        adversarial=[b"A" * 16384, b"A" * 16383 + b"!"],
+    ),
+    "rfc6455.SecWebSocketKey": Corpus(
+        valid=[b"dGhlIHNhbXBsZSBub25jZQ==", b"x3JJHMbDL1EzLkh9GBhXDw==",
+               b"AQIDBAUGBwgJCgsMDQ4PEA=="],
+        near_miss=[b"dGhlIHNhbXBsZSBub25jZQ=", b"dGhlIHNhbXBsZSBub25jZQ===",
+                   b"dGhlIHNhbXBsZSBub25jZQ-=", b"QUJD" * 6,
+                   b"AQIDBAUGBwgJCgsMDQ4PEC==",
+                   b"s3pPLMBiTxaQ9kYGzzhZRbK+xOo=", b""],
+    ),
+    "rfc6455.SecWebSocketVersion": Corpus(
+        valid=[b"13", b"0", b"8", b"255"],
+        near_miss=[b"013", b"256", b"1000", b"", b"13 "],
+    ),
+}
+
+
+def generated_corpora(
+    count: int,
+    *,
+    seed: int = 0,
+    mean_repeats: float = 2.0,
+    max_repeats: int = 32,
+) -> dict[str, Corpus]:
+    """
+    Corpora of count valid and count near-miss samples for each public
+    matcher, generated from its rule of the PEG grammar. The same arguments
+    give the same corpora on any machine, so benchmark runs on them can be
+    compared. Raises ValueError if a public matcher has no rule, rather than
+    leave it out of the benchmarks.
+    """
+    missing = sorted(set(public_matchers()) - set(rules))
+    if missing:
+        raise ValueError(
+            f"No PEG rule to generate samples for: {', '.join(missing)}"
+        )
+    corpora = {}
+    for name, start in rules.items():
+        generator = Generator(
+            grammar, start,
+            seed=seed, mean_repeats=mean_repeats, max_repeats=max_repeats,
+        )
+        corpora[name] = Corpus(
+            valid=generator.samples(count),
+            near_miss=generator.near_misses(count),
+        )
+    return corpora
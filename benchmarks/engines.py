@@ -0,0 +1,89 @@
+import argparse
+import sys
+from typing import Any, Sequence
+
+from benchmarks.corpora import CORPORA
+from benchmarks.suite import measure
+from peg.grammars import peg_matchers
+from registry import public_matchers
+
+
+def run_engines(
+    name_filter: str = "",
+    *,
+    min_time: float = 0.1,
+    repeat: int = 3,
+) -> list[dict[str, Any]]:
+    """
+    Time match_full of each public matcher whose name contains
+    name_filter, against its PegMatchers from the grammar as
+    written and once optimized, over the valid and near-miss samples of its
+    corpus. speedup is how many times faster the optimized PegMatcher is
+    than the class.
+    """
+    matchers = public_matchers()
+    unoptimized = peg_matchers(optimized=False)
+    results = []
+    for name, peg in peg_matchers().items():
+        if name_filter not in name:
+            continue
+        corpus = CORPORA[name]
+        samples = [*corpus.valid, *corpus.near_miss]
+        classes = measure(
+            matchers[name].match_full, samples,
+            min_time=min_time, repeat=repeat,
+        )
+        vm = measure(
+            unoptimized[name].match_full, samples,
+            min_time=min_time, repeat=repeat,
+        )
+        optimized = measure(
+            peg.match_full, samples, min_time=min_time, repeat=repeat
+        )
+        results.append({
+            "matcher": name,
+            "classes_ops_per_sec": classes.ops_per_sec,
+            "peg_ops_per_sec": vm.ops_per_sec,
+            "optimized_ops_per_sec": optimized.ops_per_sec,
+            "speedup": optimized.ops_per_sec / classes.ops_per_sec,
+        })
+    return results
+
+
+def format_engines(results: list[dict[str, Any]]) -> str:
+    lines = [
+        f"{'matcher':<32} {'classes':>12} {'peg':>12} {'optimized':>12} "
+        f"{'speedup':>8}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result['matcher']:<32} "
+            f"{result['classes_ops_per_sec']:>12,.0f} "
+            f"{result['peg_ops_per_sec']:>12,.0f} "
+            f"{result['optimized_ops_per_sec']:>12,.0f} "
+            f"{result['speedup']:>7.2f}x"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.engines",
+        description="Compare the matcher classes with the PEG engine",
+    )
+    parser.add_argument(
+        "--filter", default="",
+        help="only run matchers whose name contains this, e.g. rfc3986",
+    )
+    parser.add_argument("--min-time", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(format_engines(
+        run_engines(args.filter, min_time=args.min_time, repeat=args.repeat)
+    ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
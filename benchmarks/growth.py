@@ -0,0 +1,312 @@
+import argparse
+import math
+import sys
+import time
+from typing import Any, Callable, Sequence
+
+from generic import _step_budget
+from registry import public_matchers
+
+
+# Input sizes in bytes, each ten times the last
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+# The largest growth exponent, between any two sizes in a row, that counts
+# as linear. Linear work measures close to 1, quadratic close to 2.
+MAX_EXPONENT = 1.3
+
+
+def _repeated(
+    unit: bytes, prefix: bytes = b"", suffix: bytes = b""
+) -> Callable[[int], bytes]:
+    # Makes inputs of prefix, as many units as fit in the size, and suffix
+    def make(size: int) -> bytes:
+        count = max(1, (size - len(prefix) - len(suffix)) // len(unit))
+        return prefix + unit * count + suffix
+    return make
+
+
+# For each public matcher which can match input of any length, a way to
+# make an input of a given size which makes the matcher do as much work as a
+# long input can: long runs of what it repeats, or of what it gives up on
+# late.
+GROWING_INPUTS: dict[str, Callable[[int], bytes]] = {
+    "rfc2616.LWS": _repeated(b" \t", prefix=b"\r\n"),
+    "rfc2616.Token": _repeated(b"a", suffix=b"("),
+    "rfc2616.QuotedString": _repeated(b"\\a \r\n ", prefix=b'"'),
+    # Nested deeper and deeper, and never closed
+    "rfc2616.Comment": _repeated(b"("),
+    "rfc2616.FieldName": _repeated(b"a", suffix=b":"),
+    "rfc2616.FieldContent": _repeated(b"a "),
+    "rfc2616.FieldValue": _repeated(b"a\r\n ", suffix=b"\r\n"),
+    "rfc2616.HTTPVersion": _repeated(b"1", prefix=b"HTTP/"),
+    "rfc2616.Method": _repeated(b"G"),
+    "rfc2616.RequestURI": _repeated(b"/a"),
+    "rfc2616.RequestLine": _repeated(
+        b"/a", prefix=b"GET ", suffix=b" HTTP/1.1\r\n"
+    ),
+    "rfc2616.ReasonPhrase": _repeated(b"a "),
+    "rfc2616.StatusLine": _repeated(
+        b"a ", prefix=b"HTTP/1.1 200 ", suffix=b"\r\n"
+    ),
+    # Ending in "-", which ldh-str can't end with
+    "rfc1034.LDHStr": _repeated(b"a-"),
+    "rfc1034.SubDomain": _repeated(b"a-b."),
+    "rfc3986.IPvFuture": _repeated(b"a:", prefix=b"v1."),
+    "rfc3986.IPLiteral": _repeated(b"a:", prefix=b"[v1.", suffix=b"]"),
+    "rfc3986.RegName": _repeated(b"%41"),
+    # An IP-literal which is never closed, before falling back to reg-name
+    "rfc3986.Host": _repeated(b"a:", prefix=b"[v1."),
+    "rfc3986.Scheme": _repeated(b"a+"),
+    "rfc3986.UserInfo": _repeated(b"a:%41"),
+    "rfc3986.Port": _repeated(b"8"),
+    "rfc3986.Authority": _repeated(b"a%41", suffix=b"@host:80"),
+    # Paths are scanned a segment at a time, so each scan must stop at the
+    # end of its segment, even with no pct-encoded after it
+    "rfc3986.PathAbEmpty": _repeated(b"/a"),
+    "rfc3986.PathAbsolute": _repeated(b"/a"),
+    "rfc3986.PathNoScheme": _repeated(b"a/"),
+    "rfc3986.PathRootless": _repeated(b"a:/"),
+    "rfc3986.Query": _repeated(b"a=%41&"),
+    "rfc3986.Fragment": _repeated(b"/?%41"),
+    "rfc3986.URI": _repeated(b"/a", prefix=b"http://host", suffix=b"?q#f"),
+    "rfc3986.AbsoluteURI": _repeated(b"/a", prefix=b"http://host"),
+    "rfc3986.RelativeRef": _repeated(b"/a", prefix=b"//host"),
+    "rfc3986.URIReference": _repeated(b"/a", prefix=b"http://h"),
+    "rfc6455.Base64ValueNonEmpty": _repeated(b"QUJD", suffix=b"Rw=="),
+    "rfc6455.SecWebSocketAccept": _repeated(b"QUJD", suffix=b"Rw=="),
+}
+
+# For each public matcher which only matches input up to a fixed length, a
+# long input it must give up on, or stop matching, within that length. Their
+# work can't grow with the input, so rather than timed, their steps are
+# checked to stay the same at every size.
+BOUNDED_INPUTS: dict[str, Callable[[int], bytes]] = {
+    "rfc2234.Digit": _repeated(b"1"),
+    "rfc2234.Alpha": _repeated(b"a"),
+    "rfc2234.HexDig": _repeated(b"f"),
+    "rfc2616.Octet": _repeated(b"a"),
+    "rfc2616.UpAlpha": _repeated(b"A"),
+    "rfc2616.LoAlpha": _repeated(b"a"),
+    "rfc2616.CRLF": _repeated(b"\r\n"),
+    "rfc2616.Char": _repeated(b"a"),
+    "rfc2616.Ctl": _repeated(b"\x00"),
+    "rfc2616.Separators": _repeated(b"("),
+    "rfc2616.TChar": _repeated(b"a"),
+    "rfc2616.QuotedPair": _repeated(b"\\a"),
+    "rfc2616.StatusCode": _repeated(b"2"),
+    "rfc1034.LetDig": _repeated(b"a"),
+    "rfc1034.LetDigHyp": _repeated(b"-"),
+    "rfc1034.Label": _repeated(b"-", prefix=b"a"),
+    "rfc1034.Domain": _repeated(b"a-b."),
+    "rfc3986.H16": _repeated(b"f"),
+    "rfc3986.DecOctet": _repeated(b"1"),
+    "rfc3986.IPv4Address": _repeated(b"1."),
+    "rfc3986.LS32": _repeated(b"f:"),
+    # A "::" in every group, which only the first may have
+    "rfc3986.IPv6Address": _repeated(b"1::"),
+    "rfc3986.Unreserved": _repeated(b"a"),
+    "rfc3986.SubDelims": _repeated(b"!"),
+    "rfc3986.PctEncoded": _repeated(b"%41"),
+    "rfc6455.Base64Char": _repeated(b"Q"),
+    "rfc6455.Base64Data": _repeated(b"QUJD"),
+    "rfc6455.Base64Padding": _repeated(b"QQ=="),
+    "rfc6455.SecWebSocketKey": _repeated(b"QUJD"),
+    "rfc6455.SecWebSocketVersion": _repeated(b"1"),
+}
+
+
+def time_match(
+    function: Callable[[bytes], object],
+    val: bytes,
+    *,
+    min_time: float = 0.01,
+    repeat: int = 3,
+) -> float:
+    """
+    Seconds per call of function on val, the fastest of repeat runs of
+    enough calls to take min_time
+    """
+    def run(calls: int) -> int:
+        begin = time.perf_counter_ns()
+        for __ in range(calls):
+            function(val)
+        return time.perf_counter_ns() - begin
+
+    calls = 1
+    while 1:
+        elapsed_ns = run(calls)
+        if elapsed_ns >= min_time * 1e9:
+            break
+        calls *= 2
+    best_ns = min([elapsed_ns] + [run(calls) for __ in range(repeat - 1)])
+    return max(best_ns, 1) / calls / 1e9
+
+
+def count_steps(function: Callable[[bytes], object], val: bytes) -> int:
+    """
+    The steps, as counted by budget.Budget, function takes on val. Runs
+    matched at C level count the bytes they cover, but other work done
+    there, such as slicing, only shows in time.
+    """
+    with _step_budget(sys.maxsize) as counter:
+        function(val)
+    return sys.maxsize - counter.remaining
+
+
+def growth_exponent(timings: Sequence[tuple[int, float]]) -> float:
+    """
+    k where time, or steps, grow as size ** k, the most between any two
+    timings in a row. Work which only turns quadratic past some size would
+    average out from the first timing to the last.
+    """
+    return max(
+        math.log(max(time, 1e-9) / max(previous_time, 1e-9))
+        / math.log(size / previous_size)
+        for (previous_size, previous_time), (size, time) in zip(
+            timings, timings[1:]
+        )
+    )
+
+
+def measure_growth(
+    name: str,
+    sizes: Sequence[int] = SIZES,
+    *,
+    min_time: float = 0.01,
+    repeat: int = 3,
+) -> dict[str, Any]:
+    """
+    Time match_start of the matcher called name on its growing input, at
+    each size. match_start does the work of match_full without stopping
+    early on input of the wrong length.
+    """
+    matcher = public_matchers()[name]
+    make_input = GROWING_INPUTS[name]
+    timings = []
+    for size in sizes:
+        val = make_input(size)
+        timings.append((
+            len(val),
+            time_match(
+                matcher.match_start, val, min_time=min_time, repeat=repeat
+            ),
+        ))
+    return {
+        "matcher": name,
+        "timings": timings,
+        "exponent": growth_exponent(timings),
+    }
+
+
+def measure_step_growth(
+    name: str, sizes: Sequence[int] = SIZES
+) -> dict[str, Any]:
+    """
+    Count the steps match_start of the matcher called name takes on its
+    growing or bounded input, at each size. Unlike time, steps are the same
+    from run to run.
+    """
+    matcher = public_matchers()[name]
+    make_input = GROWING_INPUTS.get(name) or BOUNDED_INPUTS[name]
+    steps = []
+    for size in sizes:
+        val = make_input(size)
+        steps.append((len(val), count_steps(matcher.match_start, val)))
+    return {
+        "matcher": name,
+        "steps": steps,
+        "exponent": growth_exponent(steps),
+    }
+
+
+def format_growth(results: list[dict[str, Any]]) -> str:
+    """
+    A table of results from measure_growth, or from measure_step_growth
+    """
+    key = "steps" if results and "steps" in results[0] else "timings"
+    sizes = [size for size, __ in results[0][key]] if results else []
+    lines = [
+        f"{'matcher':<32} "
+        + " ".join(f"{f'{size:,} B':>12}" for size in sizes)
+        + f" {'exponent':>9}"
+    ]
+    for result in results:
+        if key == "steps":
+            values = [f"{steps:>12,}" for __, steps in result["steps"]]
+        else:
+            values = [
+                f"{seconds * 1e3:>9.3f} ms"
+                for __, seconds in result["timings"]
+            ]
+        lines.append(
+            f"{result['matcher']:<32} "
+            + " ".join(values)
+            + f" {result['exponent']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.growth",
+        description=(
+            "Time each matcher on inputs of growing size, and check the "
+            "steps of those which only match up to a fixed length stay the "
+            "same"
+        ),
+    )
+    parser.add_argument(
+        "--filter", default="",
+        help="only run matchers whose name contains this, e.g. rfc3986",
+    )
+    parser.add_argument(
+        "--size", type=int, action="append",
+        help="input size in bytes, may be repeated",
+    )
+    parser.add_argument(
+        "--steps", action="store_true",
+        help="count steps rather than time, which is repeatable but misses "
+        "work done at C level",
+    )
+    args = parser.parse_args(argv)
+    sizes = args.size or SIZES
+
+    results = []
+    for name in GROWING_INPUTS:
+        if args.filter in name:
+            if args.steps:
+                results.append(measure_step_growth(name, sizes))
+            else:
+                results.append(measure_growth(name, sizes))
+    bounded_results = [
+        measure_step_growth(name, sizes)
+        for name in BOUNDED_INPUTS if args.filter in name
+    ]
+    print(format_growth(results))
+    print()
+    print(format_growth(bounded_results))
+
+    failed = False
+    exceeded = [
+        result["matcher"] for result in results
+        if result["exponent"] > MAX_EXPONENT
+    ]
+    if exceeded:
+        print(f"Worse than linear: {', '.join(exceeded)}", file=sys.stderr)
+        failed = True
+    unbounded = [
+        result["matcher"] for result in bounded_results
+        if len({steps for __, steps in result["steps"]}) > 1
+    ]
+    if unbounded:
+        print(
+            f"Steps grow with the input: {', '.join(unbounded)}",
+            file=sys.stderr,
+        )
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
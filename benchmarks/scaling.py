@@ -0,0 +1,139 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Sequence
+
+from batch import DEFAULT_CHUNK_SIZE, default_workers, validate_batch
+from benchmarks.corpora import CORPORA
+from registry import resolve_matcher
+
+
+DEFAULT_MATCHER = "rfc3986.URIReference"
+BATCH_SIZE = 16384
+
+
+def gil_enabled() -> bool:
+    # Only free-threaded builds can run without the GIL
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else bool(is_gil_enabled())
+
+
+def thread_counts(max_threads: int) -> list[int]:
+    # Powers of two up to max_threads, and max_threads itself
+    counts = []
+    threads = 1
+    while threads < max_threads:
+        counts.append(threads)
+        threads *= 2
+    counts.append(max_threads)
+    return counts
+
+
+def run_scaling(
+    matcher_name: str = DEFAULT_MATCHER,
+    threads: Sequence[int] | None = None,
+    *,
+    batch_size: int = BATCH_SIZE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    min_time: float = 0.1,
+    repeat: int = 3,
+) -> list[dict[str, Any]]:
+    """
+    Time validate_batch over a batch made from the matcher's corpus with
+    each number of threads. speedup is relative to the first thread count,
+    one thread by default.
+
+    Each executor is made before it is timed, so only the matching is
+    measured.
+    """
+    matcher = resolve_matcher(matcher_name)
+    corpus = CORPORA[matcher_name]
+    samples = [*corpus.valid, *corpus.near_miss]
+    batch = (samples * (batch_size // len(samples) + 1))[:batch_size]
+
+    results: list[dict[str, Any]] = []
+    for thread_count in threads or thread_counts(default_workers()):
+        with ThreadPoolExecutor(max_workers=thread_count) as executor:
+            def run() -> int:
+                begin = time.perf_counter_ns()
+                validate_batch(
+                    matcher, batch, executor=executor, chunk_size=chunk_size
+                )
+                return time.perf_counter_ns() - begin
+
+            # Start the threads, then find how many batches fill min_time
+            elapsed_ns = run()
+            batches = max(1, int(min_time * 1e9 / max(elapsed_ns, 1)))
+            best_ns = min(
+                sum(run() for __ in range(batches)) for __ in range(repeat)
+            )
+
+        values_per_sec = batches * len(batch) * 1e9 / max(best_ns, 1)
+        results.append({
+            "threads": thread_count,
+            "values_per_sec": values_per_sec,
+            "speedup": values_per_sec / (
+                results[0]["values_per_sec"] if results else values_per_sec
+            ),
+        })
+    return results
+
+
+def format_scaling(results: list[dict[str, Any]]) -> str:
+    lines = [f"{'threads':>7} {'values/s':>12} {'speedup':>8}"]
+    for result in results:
+        lines.append(
+            f"{result['threads']:>7} {result['values_per_sec']:>12,.0f} "
+            f"{result['speedup']:>7.2f}x"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.scaling",
+        description="Measure how batch validation scales with threads",
+    )
+    parser.add_argument(
+        "--matcher", default=DEFAULT_MATCHER,
+        help=f"matcher to validate with (default {DEFAULT_MATCHER})",
+    )
+    parser.add_argument(
+        "--threads", type=int, action="append",
+        help="number of threads, may be repeated",
+    )
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+    )
+    parser.add_argument(
+        "--output", "-o", help="write the JSON results to this file",
+    )
+    parser.add_argument("--min-time", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results = run_scaling(
+        args.matcher,
+        args.threads,
+        batch_size=args.batch_size,
+        chunk_size=args.chunk_size,
+        min_time=args.min_time,
+        repeat=args.repeat,
+    )
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(
+                {"gil_enabled": gil_enabled(), "results": results},
+                output_file,
+                indent=2,
+            )
+    print(f"{args.matcher}, GIL {'enabled' if gil_enabled() else 'disabled'}")
+    print(format_scaling(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
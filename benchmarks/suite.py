@@ -0,0 +1,245 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Any, Callable, NamedTuple, Sequence, TypeVar
+
+from benchmarks.corpora import CORPORA, Corpus, generated_corpora
+from registry import public_matchers
+
+
+RESULTS_FORMAT_VERSION = 1
+
+Sample = TypeVar("Sample", bytes, bytearray)
+
+
+class Measurement(NamedTuple):
+    ops_per_sec: float
+    ns_per_byte: float | None
+    samples: int
+    total_bytes: int
+
+    def as_json(self) -> dict[str, Any]:
+        return self._asdict()
+
+
+class Regression(NamedTuple):
+    matcher: str
+    category: str
+    base_ops_per_sec: float
+    new_ops_per_sec: float
+
+    @property
+    def ratio(self) -> float:
+        return self.new_ops_per_sec / self.base_ops_per_sec
+
+
+def measure(
+    function: Callable[[Sample], object],
+    samples: Sequence[Sample],
+    *,
+    min_time: float = 0.1,
+    repeat: int = 3,
+) -> Measurement:
+    """
+    Time calling function on every sample.
+
+    The number of passes over the samples is doubled until a single timing
+    run takes at least min_time seconds, then the fastest of 'repeat' runs is
+    reported, as timeit does.
+    """
+    def run(passes: int) -> int:
+        begin = time.perf_counter_ns()
+        for __ in range(passes):
+            for sample in samples:
+                function(sample)
+        return time.perf_counter_ns() - begin
+
+    min_time_ns = min_time * 1e9
+    passes = 1
+    while 1:
+        elapsed_ns = run(passes)
+        if elapsed_ns >= min_time_ns:
+            break
+        passes *= 2
+
+    best_ns = min([elapsed_ns] + [run(passes) for __ in range(repeat - 1)])
+    best_ns = max(best_ns, 1)
+
+    calls = passes * len(samples)
+    total_bytes = sum(len(sample) for sample in samples)
+    if total_bytes:
+        ns_per_byte: float | None = best_ns / (passes * total_bytes)
+    else:
+        ns_per_byte = None
+    return Measurement(
+        ops_per_sec=calls * 1e9 / best_ns,
+        ns_per_byte=ns_per_byte,
+        samples=len(samples),
+        total_bytes=total_bytes,
+    )
+
+
+def run_suite(
+    name_filter: str = "",
+    *,
+    min_time: float = 0.1,
+    repeat: int = 3,
+    progress: Callable[[str], object] | None = None,
+    corpora: dict[str, Corpus] | None = None,
+    corpora_name: str = "built-in",
+) -> dict[str, Any]:
+    """
+    Benchmark match_full of every public matcher whose name contains
+    name_filter, against each category of its corpus: from corpora, or
+    CORPORA by default. Matchers without a corpus are skipped.
+    corpora_name is recorded in the results.
+    """
+    if corpora is None:
+        corpora = CORPORA
+    results: dict[str, dict[str, Any]] = {}
+    for name, matcher in public_matchers().items():
+        if name_filter not in name or name not in corpora:
+            continue
+        results[name] = {}
+        for category, samples in corpora[name].categories().items():
+            if progress is not None:
+                progress(f"{name} {category}")
+            measurement = measure(
+                matcher.match_full, samples, min_time=min_time, repeat=repeat
+            )
+            results[name][category] = measurement.as_json()
+
+    return {
+        "version": RESULTS_FORMAT_VERSION,
+        "python": platform.python_implementation()
+        + " " + platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "corpora": corpora_name,
+        "results": results,
+    }
+
+
+def compare_results(
+    base: dict[str, Any],
+    new: dict[str, Any],
+    threshold: float = 0.1,
+) -> list[Regression]:
+    """
+    Find every matcher/category present in both result sets whose ops/sec in
+    'new' fell by more than 'threshold' (a fraction) relative to 'base'.
+    """
+    regressions = []
+    for name, base_categories in base["results"].items():
+        new_categories = new["results"].get(name, {})
+        for category, base_measurement in base_categories.items():
+            new_measurement = new_categories.get(category)
+            if new_measurement is None:
+                continue
+            regression = Regression(
+                matcher=name,
+                category=category,
+                base_ops_per_sec=base_measurement["ops_per_sec"],
+                new_ops_per_sec=new_measurement["ops_per_sec"],
+            )
+            if regression.ratio < 1 - threshold:
+                regressions.append(regression)
+    return regressions
+
+
+def format_results(results: dict[str, Any]) -> str:
+    lines = [f"{'matcher':<32} {'category':<20} {'ops/sec':>14} "
+             f"{'ns/byte':>10}"]
+    for name, categories in results["results"].items():
+        for category, measurement in categories.items():
+            ns_per_byte = measurement["ns_per_byte"]
+            ns_per_byte_text = (
+                "-" if ns_per_byte is None else f"{ns_per_byte:.1f}"
+            )
+            lines.append(
+                f"{name:<32} {category:<20} "
+                f"{measurement['ops_per_sec']:>14,.0f} {ns_per_byte_text:>10}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.suite",
+        description="Throughput benchmarks for the pattern matchers",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument(
+        "--filter", default="",
+        help="only run matchers whose name contains this, e.g. rfc3986",
+    )
+    run_parser.add_argument(
+        "--output", "-o", help="write the JSON results to this file",
+    )
+    run_parser.add_argument("--min-time", type=float, default=0.1)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument(
+        "--generated", type=int, metavar="COUNT",
+        help="instead of the built-in corpora, generate COUNT valid and "
+        "COUNT near-miss samples for each matcher from the PEG grammar",
+    )
+    run_parser.add_argument(
+        "--seed", type=int, default=0,
+        help="seed for --generated, default 0",
+    )
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="flag regressions between two result files",
+    )
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="fractional slowdown to report, default 0.1 (10%%)",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        corpora = None
+        corpora_name = "built-in"
+        if args.generated is not None:
+            corpora = generated_corpora(args.generated, seed=args.seed)
+            corpora_name = f"generated count={args.generated} seed={args.seed}"
+        results = run_suite(
+            args.filter,
+            min_time=args.min_time,
+            repeat=args.repeat,
+            progress=lambda text: print(text, file=sys.stderr),
+            corpora=corpora,
+            corpora_name=corpora_name,
+        )
+        if args.output:
+            with open(args.output, "w") as output_file:
+                json.dump(results, output_file, indent=2)
+        print(format_results(results))
+        return 0
+
+    with open(args.base) as base_file:
+        base = json.load(base_file)
+    with open(args.new) as new_file:
+        new = json.load(new_file)
+    regressions = compare_results(base, new, args.threshold)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression.matcher} {regression.category}: "
+            f"{regression.base_ops_per_sec:,.0f} -> "
+            f"{regression.new_ops_per_sec:,.0f} ops/sec "
+            f"({regression.ratio:.2f}x)"
+        )
+    if not regressions:
+        print("No regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from benchmarks.comparative import (
+    COMPARISONS,
+    LENIENT_COMPARISONS,
+    disagreements,
+    run_comparisons,
+)
+from benchmarks.corpora import CORPORA
+
+
+class TestComparative(TestCase):
+    def test_agreement(self) -> None:
+        for comparison in COMPARISONS:
+            corpus = CORPORA[comparison.matcher]
+            samples = [
+                *corpus.valid, *corpus.near_miss, *corpus.adversarial
+            ]
+            found = disagreements(comparison, samples)
+            with self.subTest(stdlib=comparison.stdlib_name):
+                if comparison.matcher in LENIENT_COMPARISONS:
+                    # urlsplit doesn't validate most components, so it may
+                    # only accept more than the grammar.
+                    for disagreement in found:
+                        self.assertTrue(disagreement["stdlib_accepts"])
+                else:
+                    self.assertEqual(found, [])
+
+    def test_run_comparisons(self) -> None:
+        results = run_comparisons("IPv4", min_time=0.001, repeat=1)
+        self.assertEqual(
+            [result["stdlib"] for result in results],
+            ["ipaddress.IPv4Address", "socket.inet_pton(AF_INET)"],
+        )
+        measurement = results[0]["categories"]["valid-short"]
+        self.assertGreater(measurement["relative_speed"], 0)
+        self.assertEqual(measurement["disagreements"], [])
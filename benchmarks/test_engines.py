@@ -0,0 +1,13 @@
+from unittest import TestCase
+
+from benchmarks.engines import format_engines, run_engines
+
+
+class TestEngines(TestCase):
+    def test_run_engines(self) -> None:
+        results = run_engines("rfc3986.IPv4", min_time=0.001, repeat=1)
+        self.assertEqual(
+            [result["matcher"] for result in results], ["rfc3986.IPv4Address"]
+        )
+        self.assertGreater(results[0]["speedup"], 0)
+        self.assertIn("rfc3986.IPv4Address", format_engines(results))
@@ -0,0 +1,157 @@
+import os
+from typing import Any
+from unittest import TestCase, skipUnless
+
+from benchmarks.growth import (
+    BOUNDED_INPUTS,
+    GROWING_INPUTS,
+    MAX_EXPONENT,
+    SIZES,
+    count_steps,
+    format_growth,
+    growth_exponent,
+    measure_growth,
+    measure_step_growth,
+    time_match,
+)
+from generic import DefaultMatchAll, Input, Matcher, MatchResult
+from registry import public_matchers
+from rfc2234.patterns import Digit
+
+
+# Timings are too noisy for a loaded machine, and the full sizes take
+# minutes, so tests which time matching closely are only run when asked for
+SLOW_TESTS = os.environ.get("ABNF_PATTERNS_SLOW_TESTS", "") not in ("", "0")
+
+# Sizes small enough to time every matcher in a few seconds
+QUICK_SIZES = (10_000, 100_000)
+
+# How much slower a step may be at the larger of QUICK_SIZES. Work growing
+# faster than the steps would be about ten times slower.
+MAX_STEP_TIME_GROWTH = 3
+
+
+class _Chunk(Matcher):
+    # 1024 "a"s, matched from the start only, so match_from slices the input
+    length = 1024
+
+    @classmethod
+    def match_start(cls, val: Input) -> MatchResult | None:
+        if val[:cls.length] == b"a" * cls.length:
+            return MatchResult(start=0, length=cls.length)
+        return None
+
+
+class _Chunks(DefaultMatchAll):
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        offset = start
+        while 1:
+            chunk_match = _Chunk.match_from(val, offset)
+            if chunk_match is None:
+                return MatchResult(start=start, length=offset - start)
+            offset = chunk_match.end
+
+
+class _Rescans(DefaultMatchAll):
+    # Digits, matched again from each position to the end
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        for first in range(start, len(val)):
+            for offset in range(first, len(val)):
+                if Digit.match_from(val, offset) is None:
+                    return None
+        return MatchResult(start=start, length=len(val) - start)
+
+
+class TestGrowth(TestCase):
+    def test_every_matcher_has_an_input(self) -> None:
+        self.assertEqual(
+            set(GROWING_INPUTS) | set(BOUNDED_INPUTS), set(public_matchers())
+        )
+        self.assertFalse(set(GROWING_INPUTS) & set(BOUNDED_INPUTS))
+        for name, make_input in [
+            *GROWING_INPUTS.items(), *BOUNDED_INPUTS.items()
+        ]:
+            with self.subTest(matcher=name):
+                self.assertLessEqual(abs(len(make_input(1000)) - 1000), 16)
+
+    def test_bounded(self) -> None:
+        for name in BOUNDED_INPUTS:
+            result = measure_step_growth(name)
+            with self.subTest(matcher=name, steps=result["steps"]):
+                self.assertEqual(
+                    len({steps for __, steps in result["steps"]}), 1
+                )
+
+    def test_linear_steps(self) -> None:
+        for name in GROWING_INPUTS:
+            result = measure_step_growth(name, SIZES[:2])
+            with self.subTest(matcher=name, steps=result["steps"]):
+                self.assertLessEqual(result["exponent"], MAX_EXPONENT)
+        self.assertIn(
+            "rfc2616.Comment",
+            format_growth([measure_step_growth("rfc2616.Comment", [10, 100])]),
+        )
+
+    def test_growth_exponent(self) -> None:
+        # Linear, then quadratic: the worst pair counts
+        timings = [(10, 1.0), (100, 10.0), (1000, 1000.0)]
+        self.assertAlmostEqual(growth_exponent(timings), 2)
+        self.assertAlmostEqual(growth_exponent(timings[:2]), 1)
+
+    def test_linear_quick(self) -> None:
+        # Steps don't count all work done at C level, such as slicing, so
+        # time that too, if only at small sizes. The time a step takes should
+        # stay about the same as the input grows, so that a budget's steps
+        # bound the time a match takes: work the steps miss makes each step
+        # slower.
+        def measure(name: str) -> tuple[dict[str, Any], float]:
+            result = measure_growth(
+                name, QUICK_SIZES, min_time=0.001, repeat=2
+            )
+            steps = measure_step_growth(name, QUICK_SIZES)["steps"]
+            (__, first_time), (__, last_time) = result["timings"]
+            (__, first_steps), (__, last_steps) = steps
+            step_time_growth: float = (
+                (last_time / last_steps) / (first_time / first_steps)
+            )
+            return result, step_time_growth
+
+        for name in GROWING_INPUTS:
+            result, step_time_growth = measure(name)
+            if (
+                result["exponent"] > MAX_EXPONENT
+            ) or (
+                step_time_growth > MAX_STEP_TIME_GROWTH
+            ):
+                # Once more, in case the machine was busy
+                result, step_time_growth = measure(name)
+            with self.subTest(matcher=name, timings=result["timings"]):
+                self.assertLessEqual(result["exponent"], MAX_EXPONENT)
+                self.assertLessEqual(step_time_growth, MAX_STEP_TIME_GROWTH)
+
+    def test_catches_rescanning(self) -> None:
+        steps = [
+            (size, count_steps(_Rescans.match_start, b"1" * size))
+            for size in [100, 1000]
+        ]
+        self.assertGreater(growth_exponent(steps), MAX_EXPONENT)
+
+    @skipUnless(SLOW_TESTS, "times matching")
+    def test_linear(self) -> None:
+        for name in GROWING_INPUTS:
+            result = measure_growth(name, SIZES, min_time=0.001, repeat=3)
+            with self.subTest(matcher=name, timings=result["timings"]):
+                self.assertLessEqual(result["exponent"], MAX_EXPONENT)
+
+    @skipUnless(SLOW_TESTS, "times matching")
+    def test_catches_slicing(self) -> None:
+        # Each chunk copies the rest of the input, which is quadratic, and
+        # outweighs the work of matching once the input is long enough.
+        # Slices are copied at C level, so only time shows them.
+        timings = [
+            (size, time_match(_Chunks.match_start, b"a" * size))
+            for size in SIZES[2:]
+        ]
+        self.assertGreater(growth_exponent(timings), MAX_EXPONENT)
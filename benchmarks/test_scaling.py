@@ -0,0 +1,20 @@
+from unittest import TestCase
+
+from benchmarks.scaling import run_scaling, thread_counts
+
+
+class TestScaling(TestCase):
+    def test_thread_counts(self) -> None:
+        self.assertEqual(thread_counts(1), [1])
+        self.assertEqual(thread_counts(4), [1, 2, 4])
+        self.assertEqual(thread_counts(6), [1, 2, 4, 6])
+
+    def test_run_scaling(self) -> None:
+        results = run_scaling(
+            "rfc3986.Host", [1, 2], batch_size=64, chunk_size=16,
+            min_time=0.001, repeat=1,
+        )
+        self.assertEqual([result["threads"] for result in results], [1, 2])
+        self.assertEqual(results[0]["speedup"], 1)
+        for result in results:
+            self.assertGreater(result["values_per_sec"], 0)
@@ -0,0 +1,125 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from benchmarks.corpora import CORPORA, Corpus, generated_corpora
+from benchmarks.suite import compare_results, measure, run_suite
+from peg.grammars import rules
+from registry import public_matchers
+
+
+class TestCorpora(TestCase):
+    def test_every_matcher_has_a_corpus(self) -> None:
+        self.assertEqual(set(CORPORA), set(public_matchers()))
+
+    def test_corpora_are_labelled_correctly(self) -> None:
+        for name, matcher in public_matchers().items():
+            corpus = CORPORA[name]
+            for sample in corpus.valid:
+                with self.subTest(matcher=name, sample=sample[:32]):
+                    self.assertTrue(matcher.match_full(sample))
+            for sample in corpus.near_miss:
+                with self.subTest(matcher=name, sample=sample[:32]):
+                    self.assertFalse(matcher.match_full(sample))
+
+    def test_text_input(self) -> None:
+        # str input matches as its octets do, whether it is converted or
+        # matched on its characters
+        for name, matcher in public_matchers().items():
+            corpus = CORPORA[name]
+            for sample in [
+                *corpus.valid, *corpus.near_miss, *corpus.adversarial
+            ]:
+                text = sample.decode("latin-1")
+                with self.subTest(matcher=name, sample=sample[:32]):
+                    self.assertEqual(
+                        matcher.match_full(text), matcher.match_full(sample)
+                    )
+                    match_result = matcher.match_start(sample)
+                    text_match_result = matcher.match_start(text)
+                    self.assertEqual(
+                        text_match_result and text_match_result.end,
+                        match_result and match_result.end,
+                    )
+                    self.assertEqual(
+                        repr(matcher.match_failure(text)),
+                        repr(matcher.match_failure(sample)),
+                    )
+
+    def test_generated_corpora(self) -> None:
+        corpora = generated_corpora(5, seed=2)
+        matchers = public_matchers()
+        self.assertEqual(set(corpora), set(matchers))
+        for name, corpus in corpora.items():
+            for sample in corpus.valid:
+                with self.subTest(matcher=name, sample=sample[:32]):
+                    self.assertTrue(matchers[name].match_full(sample))
+            for sample in corpus.near_miss:
+                with self.subTest(matcher=name, sample=sample[:32]):
+                    self.assertFalse(matchers[name].match_full(sample))
+        self.assertEqual(corpora, generated_corpora(5, seed=2))
+        self.assertNotEqual(corpora, generated_corpora(5, seed=3))
+
+    def test_generated_corpora_cover_every_matcher(self) -> None:
+        with patch.dict(rules):
+            del rules["rfc2616.Comment"]
+            with self.assertRaisesRegex(ValueError, "rfc2616.Comment"):
+                generated_corpora(1)
+
+    def test_categories(self) -> None:
+        corpus = Corpus(valid=[b"a", b"a" * 100], near_miss=[b"b"])
+        self.assertEqual(
+            corpus.categories(),
+            {
+                "valid-short": [b"a"],
+                "valid-long": [b"a" * 100],
+                "near-miss-short": [b"b"],
+            },
+        )
+
+
+class TestSuite(TestCase):
+    def test_measure(self) -> None:
+        measurement = measure(len, [b"abc", b"de"], min_time=0.001)
+        self.assertEqual(measurement.samples, 2)
+        self.assertEqual(measurement.total_bytes, 5)
+        self.assertGreater(measurement.ops_per_sec, 0)
+
+        measurement = measure(len, [b""], min_time=0.001)
+        self.assertIsNone(measurement.ns_per_byte)
+
+    def test_run_suite(self) -> None:
+        results = run_suite("rfc2234.Digit", min_time=0.001, repeat=1)
+        self.assertEqual(list(results["results"]), ["rfc2234.Digit"])
+        self.assertEqual(
+            set(results["results"]["rfc2234.Digit"]),
+            {"valid-short", "near-miss-short"},
+        )
+        self.assertEqual(results["corpora"], "built-in")
+
+        generated = run_suite(
+            "rfc3986.IPv4", min_time=0.001, repeat=1,
+            corpora=generated_corpora(3), corpora_name="generated",
+        )
+        self.assertEqual(
+            list(generated["results"]), ["rfc3986.IPv4Address"]
+        )
+        self.assertEqual(generated["corpora"], "generated")
+
+    def test_compare_results(self) -> None:
+        def results(ops: float) -> dict[str, object]:
+            return {
+                "results": {
+                    "rfc3986.Host": {
+                        "valid-short": {"ops_per_sec": ops},
+                    },
+                },
+            }
+
+        self.assertEqual(compare_results(results(100), results(95)), [])
+        regressions = compare_results(results(100), results(50))
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0].matcher, "rfc3986.Host")
+        self.assertAlmostEqual(regressions[0].ratio, 0.5)
+        self.assertEqual(
+            compare_results(results(100), results(50), threshold=0.6), []
+        )
@@ -0,0 +1,11 @@
+from unittest import TestCase
+
+from benchmarks.unmasking import run_unmasking
+
+
+class TestUnmasking(TestCase):
+    def test_run_unmasking(self) -> None:
+        results = run_unmasking([4, 1000], min_time=0.001, repeat=1)
+        self.assertEqual([result["size"] for result in results], [4, 1000])
+        for result in results:
+            self.assertGreater(result["speedup"], 0)
@@ -0,0 +1,105 @@
+import argparse
+import json
+import sys
+from typing import Any, Sequence
+
+from benchmarks.suite import measure
+from rfc6455.frames import unmask
+
+
+PAYLOAD_SIZES = (16, 125, 1024, 64 * 1024, 1024 * 1024)
+
+# The masking key from the examples in section 5.7
+MASKING_KEY = 0x37FA213D
+
+
+def unmask_per_byte(
+    buffer: bytearray, masking_key: int, phase: int = 0
+) -> int:
+    """
+    The straightforward loop from section 5.3, as a baseline
+    """
+    key = masking_key.to_bytes(4)
+    for index in range(len(buffer)):
+        buffer[index] ^= key[(index + phase) % 4]
+    return (phase + len(buffer)) % 4
+
+
+def run_unmasking(
+    sizes: Sequence[int] = PAYLOAD_SIZES,
+    *,
+    min_time: float = 0.1,
+    repeat: int = 3,
+) -> list[dict[str, Any]]:
+    """
+    Time unmask and the per-byte loop on payloads of each size, unmasking
+    the same buffer repeatedly. speedup above 1 means unmask is faster.
+    """
+    results = []
+    for size in sizes:
+        payload = [bytearray(range(256)) * (size // 256)
+                   + bytearray(size % 256)]
+        unmask_measurement = measure(
+            lambda buffer: unmask(buffer, MASKING_KEY, 1),
+            payload, min_time=min_time, repeat=repeat,
+        )
+        per_byte_measurement = measure(
+            lambda buffer: unmask_per_byte(buffer, MASKING_KEY, 1),
+            payload, min_time=min_time, repeat=repeat,
+        )
+        results.append({
+            "size": size,
+            "unmask_ns_per_byte": unmask_measurement.ns_per_byte,
+            "per_byte_ns_per_byte": per_byte_measurement.ns_per_byte,
+            "speedup": (
+                unmask_measurement.ops_per_sec
+                / per_byte_measurement.ops_per_sec
+            ),
+        })
+    return results
+
+
+def format_unmasking(results: list[dict[str, Any]]) -> str:
+    lines = [
+        f"{'size':>9} {'unmask ns/B':>12} {'per-byte ns/B':>14} "
+        f"{'speedup':>9}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result['size']:>9} {result['unmask_ns_per_byte']:>12.3f} "
+            f"{result['per_byte_ns_per_byte']:>14.3f} "
+            f"{result['speedup']:>8.1f}x"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.unmasking",
+        description="Compare unmask with a per-byte unmasking loop",
+    )
+    parser.add_argument(
+        "--size", type=int, action="append",
+        help="payload size in bytes, may be repeated",
+    )
+    parser.add_argument(
+        "--output", "-o", help="write the JSON results to this file",
+    )
+    parser.add_argument("--min-time", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results = run_unmasking(
+        args.size or PAYLOAD_SIZES,
+        min_time=args.min_time,
+        repeat=args.repeat,
+    )
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    print(format_unmasking(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import sys
+import threading
+from enum import Enum
+from typing import Any, NamedTuple
+
+from generic import Input, Matcher, _step_budget, _StepBudgetExhausted
+
+
+class MatchOutcome(Enum):
+    MATCH = "match"
+    NO_MATCH = "no match"
+    BUDGET_EXCEEDED = "budget exceeded"
+
+
+class Budget(NamedTuple):
+    """
+    The most work one match may do: max_steps steps, and input of at most
+    max_bytes bytes. None is no limit.
+
+    A step is a call of a leaf matcher (a ConstantLength, a run of a
+    CharClass or a KeywordSet), a pct-encoded escape in a scanned run, or a
+    CHOICE of a PegMatcher's program. Runs and spans matched at C level also
+    take a step for each byte they cover, so steps grow with the work done
+    however it is done.
+    """
+    max_steps: int | None = None
+    max_bytes: int | None = None
+
+
+class BudgetedMatch(NamedTuple):
+    outcome: MatchOutcome
+    # The steps taken, at most the budget's max_steps
+    steps: int
+
+
+class BudgetStats:
+    __slots__ = (
+        "matches", "no_matches", "exceeded", "total_steps", "most_steps",
+    )
+
+    def __init__(self) -> None:
+        self.matches = 0
+        self.no_matches = 0
+        self.exceeded = 0
+        self.total_steps = 0
+        self.most_steps = 0
+
+    @property
+    def calls(self) -> int:
+        return self.matches + self.no_matches + self.exceeded
+
+
+class BudgetMetrics:
+    """
+    The outcomes and steps of budgeted matches, per matcher. Can be shared
+    by matches on any number of threads.
+    """
+    def __init__(self) -> None:
+        self.stats: dict[str, BudgetStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, budgeted_match: BudgetedMatch) -> None:
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = BudgetStats()
+            outcome = budgeted_match.outcome
+            if outcome is MatchOutcome.MATCH:
+                stats.matches += 1
+            elif outcome is MatchOutcome.NO_MATCH:
+                stats.no_matches += 1
+            else:
+                stats.exceeded += 1
+            stats.total_steps += budgeted_match.steps
+            stats.most_steps = max(stats.most_steps, budgeted_match.steps)
+
+    def as_json(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {
+                    field: getattr(stats, field)
+                    for field in BudgetStats.__slots__
+                }
+                for name, stats in self.stats.items()
+            }
+
+    def format_report(self) -> str:
+        lines = [
+            f"{'matcher':<32} {'calls':>9} {'exceeded':>9} "
+            f"{'mean steps':>11} {'most steps':>11}"
+        ]
+        with self._lock:
+            for name, stats in sorted(self.stats.items()):
+                lines.append(
+                    f"{name:<32} {stats.calls:>9} {stats.exceeded:>9} "
+                    f"{stats.total_steps / stats.calls:>11.1f} "
+                    f"{stats.most_steps:>11}"
+                )
+        return "\n".join(lines)
+
+
+def match_within(
+    matcher: type[Matcher[Any]],
+    val: Input,
+    budget: Budget,
+    *,
+    metrics: BudgetMetrics | None = None,
+) -> BudgetedMatch:
+    """
+    match_full, giving up with MatchOutcome.BUDGET_EXCEEDED as soon as the
+    match would do more work than budget allows. Input longer than
+    max_bytes is turned away before matching starts.
+
+    Budgeted and unbudgeted matches can run at the same time on different
+    threads. While any budgeted match is running, each step of every match
+    costs a little more, to find whether it is budgeted.
+    """
+    if budget.max_bytes is not None and len(val) > budget.max_bytes:
+        budgeted_match = BudgetedMatch(MatchOutcome.BUDGET_EXCEEDED, 0)
+    else:
+        max_steps = (
+            sys.maxsize if budget.max_steps is None else budget.max_steps
+        )
+        with _step_budget(max_steps) as counter:
+            try:
+                if matcher.match_full(val):
+                    outcome = MatchOutcome.MATCH
+                else:
+                    outcome = MatchOutcome.NO_MATCH
+            except _StepBudgetExhausted:
+                outcome = MatchOutcome.BUDGET_EXCEEDED
+        budgeted_match = BudgetedMatch(
+            outcome, min(max_steps - counter.remaining, max_steps)
+        )
+
+    if metrics is not None:
+        metrics.record(matcher.__qualname__, budgeted_match)
+    return budgeted_match
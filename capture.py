@@ -0,0 +1,303 @@
+import threading
+from array import array
+from typing import Any, Callable, Iterator, Sequence
+
+from generic import Matcher, MatchResult, _patch_method, _unpatch_method
+
+
+# Entries per node in CaptureArena.nodes: rule id, start, end, the index of
+# the parent node (-1 for the root) and the index just past the node's
+# descendants, which follow it.
+_NODE_SIZE = 5
+_RULE, _START, _END, _PARENT, _SUBTREE_END = range(_NODE_SIZE)
+_ITEM_SIZE = array("l").itemsize
+
+
+class CaptureArena:
+    """
+    The nodes captured by a match, in preorder, held in a preallocated
+    array('l') rather than as objects. Only the first count nodes are in
+    use. An arena can be passed to capture again, to reuse its space.
+    """
+    __slots__ = ("nodes", "count")
+
+    def __init__(self, capacity: int = 64):
+        self.nodes = array("l", bytes(capacity * _NODE_SIZE * _ITEM_SIZE))
+        self.count = 0
+
+    def reset(self) -> None:
+        self.count = 0
+
+    def open_node(self, rule_id: int, start: int, parent: int) -> int:
+        index = self.count
+        position = index * _NODE_SIZE
+        nodes = self.nodes
+        if position + _NODE_SIZE > len(nodes):
+            # Double the space
+            nodes.frombytes(bytes(len(nodes) * _ITEM_SIZE))
+        nodes[position] = rule_id
+        nodes[position + _START] = start
+        nodes[position + _END] = -1
+        nodes[position + _PARENT] = parent
+        self.count = index + 1
+        return index
+
+    def close_node(self, index: int, end: int) -> None:
+        nodes = self.nodes
+        # Drop descendants a lookahead matched past the end of the node
+        count = self.count
+        while (
+            count > index + 1
+        ) and (
+            nodes[(count - 1) * _NODE_SIZE + _END] > end
+        ):
+            count -= 1
+        self.count = count
+        position = index * _NODE_SIZE
+        nodes[position + _END] = end
+        nodes[position + _SUBTREE_END] = count
+
+
+class CaptureNode:
+    """
+    A view of one node of a CaptureTree, created when it is asked for
+    """
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree: "CaptureTree", index: int):
+        self.tree = tree
+        self.index = index
+
+    def _field(self, field: int) -> int:
+        return self.tree.arena.nodes[self.index * _NODE_SIZE + field]
+
+    @property
+    def rule(self) -> type[Matcher[Any]]:
+        return self.tree.rules[self._field(_RULE)]
+
+    @property
+    def start(self) -> int:
+        return self._field(_START)
+
+    @property
+    def end(self) -> int:
+        return self._field(_END)
+
+    @property
+    def text(self) -> bytes:
+        return self.tree.val[self.start:self.end]
+
+    @property
+    def parent(self) -> "CaptureNode | None":
+        parent = self._field(_PARENT)
+        return None if parent < 0 else CaptureNode(self.tree, parent)
+
+    @property
+    def children(self) -> list["CaptureNode"]:
+        nodes = self.tree.arena.nodes
+        children = []
+        child = self.index + 1
+        subtree_end = self._field(_SUBTREE_END)
+        while child < subtree_end:
+            children.append(CaptureNode(self.tree, child))
+            child = nodes[child * _NODE_SIZE + _SUBTREE_END]
+        return children
+
+    def __repr__(self) -> str:
+        return (
+            f"CaptureNode({self.rule.__qualname__}, {self.start}, {self.end})"
+        )
+
+
+class CaptureTree:
+    """
+    The sub-matches of the captured rules found by a successful match.
+
+    Every successful match of a captured rule made while matching a parent
+    is kept, when it lies within the parent. Rules which look ahead can
+    match the same text more than once (IPv6address tries an ls32 where it
+    has just matched an h16), so find_all leaves out repeated spans.
+
+    The tree reads from its arena, so is only valid until the arena is
+    reused.
+    """
+    __slots__ = ("val", "rules", "arena")
+
+    def __init__(
+        self,
+        val: bytes,
+        rules: tuple[type[Matcher[Any]], ...],
+        arena: CaptureArena,
+    ):
+        self.val = val
+        self.rules = rules
+        self.arena = arena
+
+    def __len__(self) -> int:
+        return self.arena.count
+
+    @property
+    def root(self) -> CaptureNode:
+        return CaptureNode(self, 0)
+
+    def find_all(self, rule: type[Matcher[Any]]) -> list[CaptureNode]:
+        """
+        The nodes of rule, in order, one per span
+        """
+        rule_id = self.rules.index(rule)
+        nodes = self.arena.nodes
+        found = []
+        spans = set()
+        for index in range(self.arena.count):
+            position = index * _NODE_SIZE
+            if nodes[position] != rule_id:
+                continue
+            span = (nodes[position + _START], nodes[position + _END])
+            if span not in spans:
+                spans.add(span)
+                found.append(CaptureNode(self, index))
+        found.sort(key=lambda node: node.start)
+        return found
+
+
+class _ThreadState(threading.local):
+    # Only set while capture is running on this thread
+    arena: CaptureArena | None = None
+    rule_ids: dict[type[Matcher[Any]], int] = {}
+    # Indexes of the nodes being matched, innermost last
+    stack: list[int] = []
+
+
+_thread_state = _ThreadState()
+
+# How many running captures need each class's match_from patched
+_patched: dict[type[Matcher[Any]], int] = {}
+_patched_lock = threading.Lock()
+
+
+def _capturing(
+    function: Callable[..., MatchResult | None]
+) -> Callable[..., MatchResult | None]:
+    def wrapper(
+        cls: type[Matcher[Any]], val: bytes, start: int
+    ) -> MatchResult | None:
+        arena = _thread_state.arena
+        if arena is None:
+            return function(cls, val, start)
+        rule_id = _thread_state.rule_ids.get(cls)
+        if rule_id is None:
+            return function(cls, val, start)
+
+        stack = _thread_state.stack
+        parent = -1
+        if stack:
+            parent = stack[-1]
+            position = parent * _NODE_SIZE
+            nodes = arena.nodes
+            if (
+                nodes[position] == rule_id
+            ) and (
+                nodes[position + _START] == start
+            ):
+                # A subclass calling its base class's match_from
+                return function(cls, val, start)
+
+        index = arena.open_node(rule_id, start, parent)
+        stack.append(index)
+        try:
+            result = function(cls, val, start)
+        except BaseException:
+            arena.count = index
+            raise
+        finally:
+            stack.pop()
+
+        if result is None:
+            # Drop the node and everything under it
+            arena.count = index
+        else:
+            arena.close_node(index, result.end)
+        return result
+
+    wrapper.__wrapped__ = function  # type: ignore[attr-defined]
+    return wrapper
+
+
+def _patch(rules: Sequence[type[Matcher[Any]]]) -> None:
+    with _patched_lock:
+        for rule in rules:
+            users = _patched.get(rule, 0)
+            if not users:
+                # Classes inheriting match_from get their own wrapper
+                _patch_method(rule, "match_from", _patched, _capturing)
+            _patched[rule] = users + 1
+
+
+def _unpatch(rules: Sequence[type[Matcher[Any]]]) -> None:
+    with _patched_lock:
+        for rule in rules:
+            users = _patched[rule]
+            if users > 1:
+                _patched[rule] = users - 1
+                continue
+            del _patched[rule]
+            _unpatch_method(rule, "match_from", _patched)
+
+
+def capture(
+    matcher: type[Matcher[Any]],
+    val: bytes,
+    rules: Sequence[type[Matcher[Any]]],
+    *,
+    start: int = 0,
+    full: bool = True,
+    arena: CaptureArena | None = None,
+) -> CaptureTree | None:
+    """
+    Match val from start with matcher, recording where each of rules
+    matched within it:
+
+        tree = capture(IPv4Address, b"192.0.2.1", [DecOctet])
+        [node.text for node in tree.find_all(DecOctet)]
+
+    Returns None if matcher doesn't match, or with full, doesn't match the
+    rest of val. The root of the tree is the match of matcher itself.
+
+    The rules are only wrapped for the duration of the call, so matching
+    outside capture runs at its usual speed. Rules matched in bulk by their
+    parents, such as the chars of a run, aren't seen.
+    """
+    all_rules = (matcher, *(rule for rule in rules if rule is not matcher))
+    if arena is None:
+        arena = CaptureArena()
+    arena.reset()
+
+    previous = (
+        _thread_state.arena, _thread_state.rule_ids, _thread_state.stack
+    )
+    _patch(all_rules)
+    _thread_state.arena = arena
+    _thread_state.rule_ids = {rule: i for i, rule in enumerate(all_rules)}
+    _thread_state.stack = []
+    try:
+        match_result = matcher.match_from(val, start)
+    finally:
+        (
+            _thread_state.arena, _thread_state.rule_ids, _thread_state.stack
+        ) = previous
+        _unpatch(all_rules)
+
+    if match_result is None or (full and match_result.end != len(val)):
+        return None
+    return CaptureTree(val, all_rules, arena)
+
+
+def walk(
+    node: CaptureNode, depth: int = 0
+) -> Iterator[tuple[int, CaptureNode]]:
+    """
+    Depth first, parents before their children
+    """
+    yield depth, node
+    for child in node.children:
+        yield from walk(child, depth + 1)
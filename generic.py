@@ -1,4 +1,28 @@
-from typing import Any, Generic, TypeVar
+import copy
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    Sequence,
+    TypeVar,
+    cast,
+)
+
+
+END_OF_INPUT = "<end of input>"
+# Expected in place of the first character of str input past U+00FF
+LATIN_1_TEXT = "<latin-1 text>"
+
+# What the entry points, match_full, match_start and match_failure, take. The
+# patterns are defined on octets: each character of str input is the octet
+# of its code point, as in latin-1, so characters past U+00FF never match.
+Input = bytes | str
 
 
 class MatchResult:
@@ -11,6 +35,202 @@ class MatchResult:
         return self.start + self.length
 
 
+class MatchFailure:
+    """
+    Why a full match failed: the furthest position in the input that any
+    part of the pattern reached, and the rules (or END_OF_INPUT) that were
+    expected there.
+    """
+    def __init__(self, *, position: int, expected: frozenset[str]):
+        self.position = position
+        self.expected = expected
+
+    def __repr__(self) -> str:
+        expected = ", ".join(sorted(self.expected))
+        return (
+            f"MatchFailure(position={self.position}, expected={{{expected}}})"
+        )
+
+
+class _FailureTracker:
+    __slots__ = ("position", "expected")
+
+    def __init__(self) -> None:
+        self.position = -1
+        self.expected: set[str] = set()
+
+    def record(self, position: int, expected: str) -> None:
+        if position > self.position:
+            self.position = position
+            self.expected = {expected}
+        elif position == self.position:
+            self.expected.add(expected)
+
+
+class _StepCounter:
+    __slots__ = ("remaining",)
+
+    def __init__(self, remaining: int):
+        self.remaining = remaining
+
+
+class _StepBudgetExhausted(Exception):
+    # Unwinds a budgeted match from wherever its steps ran out
+    pass
+
+
+class _ThreadState(threading.local):
+    # Only set while Matcher.match_failure is running on this thread
+    failure_tracker: _FailureTracker | None = None
+    # Only set while a budgeted match is running on this thread
+    step_counter: _StepCounter | None = None
+
+
+_thread_state = _ThreadState()
+
+
+class _Gate:
+    """
+    How many matches needing a thread-local are running, on any thread.
+    Matching only looks for its thread's state while there are some, so
+    other matches pay for reading active rather than a thread-local.
+    """
+    __slots__ = ("active", "lock")
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.lock = threading.Lock()
+
+
+# Budgeted matches, which have a step counter
+_budget_gate = _Gate()
+# Calls of match_failure, which have a failure tracker
+_failure_gate = _Gate()
+
+
+def _record_failure(position: int, expected: str) -> None:
+    """
+    Note that expected was wanted at position, while match_failure is
+    running on this thread. Matching which runs often checks
+    _failure_gate.active itself first, to save the call.
+    """
+    if _failure_gate.active:
+        tracker = _thread_state.failure_tracker
+        if tracker is not None:
+            tracker.record(position, expected)
+
+
+def _charge_step(steps: int = 1) -> None:
+    # Take steps from the thread's budget, if its match has one
+    counter = _thread_state.step_counter
+    if counter is not None:
+        counter.remaining -= steps
+        if counter.remaining < 0:
+            raise _StepBudgetExhausted
+
+
+@contextmanager
+def _step_budget(max_steps: int) -> Iterator[_StepCounter]:
+    """
+    Count the steps taken by matching on this thread within the with block,
+    raising _StepBudgetExhausted from the step which would take more than
+    max_steps. A nested budget replaces the outer one while it is active.
+    """
+    counter = _StepCounter(max_steps)
+    previous_counter = _thread_state.step_counter
+    with _budget_gate.lock:
+        _budget_gate.active += 1
+    _thread_state.step_counter = counter
+    try:
+        yield counter
+    finally:
+        _thread_state.step_counter = previous_counter
+        with _budget_gate.lock:
+            _budget_gate.active -= 1
+
+
+# Wrappers installed on the methods of classes, by instrumentation and
+# capture, as (owner, wrap) layers applied innermost first. Each method is
+# rebuilt from the original whenever a layer is added or removed, so tools
+# may stop in any order without undoing one another.
+_method_patches: dict[
+    tuple[type, str], tuple[Any, list[tuple[object, Callable[..., Any]]]]
+] = {}
+_method_patches_lock = threading.Lock()
+
+
+def _own_method(cls: type, name: str) -> Any:
+    """
+    The method cls defines itself, without any patches, or None
+    """
+    patches = _method_patches.get((cls, name))
+    if patches is not None:
+        return patches[0]
+    return cls.__dict__.get(name)
+
+
+def _unpatched_method(cls: type, name: str) -> Any:
+    # The classmethod cls has, defined or inherited, without any patches
+    for klass in cls.__mro__:
+        method = _own_method(klass, name)
+        if method is not None:
+            return method
+    raise AttributeError(name)
+
+
+def _rebuild_method(cls: type, name: str) -> None:
+    original, layers = _method_patches[(cls, name)]
+    if not layers:
+        del _method_patches[(cls, name)]
+        if original is None:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, original)
+        return
+    function = _unpatched_method(cls, name).__func__
+    for __, wrap in layers:
+        function = wrap(function)
+    setattr(cls, name, classmethod(function))
+
+
+def _patch_method(
+    cls: type, name: str, owner: object, wrap: Callable[..., Any]
+) -> None:
+    """
+    Wrap classmethod name of cls, defined or inherited, in wrap(function),
+    until _unpatch_method is called with the same owner
+    """
+    with _method_patches_lock:
+        if (cls, name) not in _method_patches:
+            _method_patches[(cls, name)] = (cls.__dict__.get(name), [])
+        _method_patches[(cls, name)][1].append((owner, wrap))
+        _rebuild_method(cls, name)
+
+
+def _unpatch_method(cls: type, name: str, owner: object) -> None:
+    with _method_patches_lock:
+        layers = _method_patches[(cls, name)][1]
+        layers[:] = [layer for layer in layers if layer[0] is not owner]
+        _rebuild_method(cls, name)
+
+
+def text_octets(val: str) -> bytes | None:
+    """
+    The octets of str input, or None if it has a character past U+00FF and
+    so can't match.
+
+    CPython keeps a flag for ASCII strings, so ASCII text is known without a
+    scan. Other text is encoded as latin-1, which stops at the first
+    character that can't be.
+    """
+    if val.isascii():
+        return val.encode("ascii")
+    try:
+        return val.encode("latin-1")
+    except UnicodeEncodeError:
+        return None
+
+
 MatchResultTypeVar = TypeVar(
     "MatchResultTypeVar",
     bound=MatchResult,
@@ -20,14 +240,14 @@ MatchResultTypeVar = TypeVar(
 
 class Matcher(Generic[MatchResultTypeVar]):
     @classmethod
-    def match_full(cls, val: bytes) -> bool:
+    def match_full(cls, val: Input) -> bool:
         """
         Check the full byte string matches this pattern with no remaining bytes
         """
         raise NotImplementedError
 
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResultTypeVar | None:
+    def match_start(cls, val: Input) -> MatchResultTypeVar | None:
         raise NotImplementedError
 
     @classmethod
@@ -37,11 +257,59 @@ class Matcher(Generic[MatchResultTypeVar]):
         """
         match_result = cls.match_start(val[start:])
         if match_result is not None:
-            match_result.start = start
-            return match_result
+            # Move a copy, rather than changing a result match_start may
+            # share with other callers
+            moved = copy.copy(match_result)
+            moved.start = start
+            return moved
         else:
             return None
 
+    @classmethod
+    def match_failure(cls, val: Input) -> MatchFailure | None:
+        """
+        Match the full byte string, as match_full does, returning None if it
+        matches. Otherwise describe the furthest position the match reached
+        and what was expected there, collected while matching rather than by
+        matching again.
+        """
+        if isinstance(val, str):
+            octets = text_octets(val)
+            if octets is None:
+                position = next(
+                    index for index, char in enumerate(val) if char > "\xff"
+                )
+                return MatchFailure(
+                    position=position, expected=frozenset({LATIN_1_TEXT})
+                )
+            val = octets
+
+        tracker = _FailureTracker()
+        previous_tracker = _thread_state.failure_tracker
+        with _failure_gate.lock:
+            _failure_gate.active += 1
+        _thread_state.failure_tracker = tracker
+        try:
+            match_result = cls.match_start(val)
+        finally:
+            _thread_state.failure_tracker = previous_tracker
+            with _failure_gate.lock:
+                _failure_gate.active -= 1
+
+        if match_result is not None:
+            if match_result.length == len(val):
+                return None
+            tracker.record(match_result.end, END_OF_INPUT)
+
+        if tracker.position < 0:
+            # Nothing below recorded a failure, so blame the pattern itself
+            tracker.record(0, cls.__qualname__)
+
+        return MatchFailure(
+            position=tracker.position,
+            expected=frozenset(tracker.expected),
+        )
+
 
 class ConstantLength(Matcher):
     length: int
@@ -52,21 +320,56 @@ class ConstantLength(Matcher):
         raise NotImplementedError
 
     @classmethod
-    def match_full(cls, val: bytes) -> bool:
+    def match_text_length_correct(cls, val: str) -> bool:
+        """
+        match_length_correct for str input, on its octets unless a subclass
+        compares the characters directly
+        """
+        octets = text_octets(val)
+        return octets is not None and cls.match_length_correct(octets)
+
+    @classmethod
+    def match_full(cls, val: Input) -> bool:
         if len(val) != cls.length:
             return False
-        else:
-            return cls.match_length_correct(val)
+        if isinstance(val, str):
+            return cls.match_text_length_correct(val)
+        return cls.match_length_correct(val)
 
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
+    def match_start(cls, val: Input) -> MatchResult | None:
+        if isinstance(val, str):
+            # Only the characters matched are looked at, rather than
+            # converting the whole input
+            if _budget_gate.active:
+                _charge_step()
+            if (
+                len(val) >= cls.length
+            ) and (
+                cls.match_text_length_correct(val[:cls.length])
+            ):
+                return MatchResult(start=0, length=cls.length)
+            return None
+        return cls.match_from(val, 0)
+
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        if _budget_gate.active:
+            # Every pattern comes down to its leaves, so a step is a leaf
+            _charge_step()
+        end = start + cls.length
         if (
-            len(val) >= cls.length
+            len(val) >= end
         ) and (
-            cls.match_length_correct(val[:cls.length])
+            cls.match_length_correct(val[start:end])
         ):
-            return MatchResult(start=0, length=cls.length)
+            return MatchResult(start=start, length=cls.length)
         else:
+            # Constant length matchers are the leaves of every pattern, so
+            # this is where a failing match gets furthest. Patterns may look
+            # ahead past the end of the input, which is reported as the end.
+            if _failure_gate.active:
+                _record_failure(min(start, len(val)), cls.__qualname__)
             return None
 
 
@@ -81,17 +384,24 @@ class LiteralMetaClass(type):
         str_to_match: bytes | None = dct.get("str_to_match")
         if str_to_match is not None:
             dct["length"] = len(str_to_match)
+            dct["text_to_match"] = str_to_match.decode("latin-1")
         return type.__new__(cls, name, bases, dct)
 
 
 class LiteralCompare(ConstantLength, metaclass=LiteralMetaClass):
     str_to_match: bytes
+    # str_to_match as the characters of its octets, for str input
+    text_to_match: str
 
     @classmethod
     def match_length_correct(cls, val: bytes) -> bool:
         """Check val is the same as the (sub)class's string"""
         return val == cls.str_to_match
 
+    @classmethod
+    def match_text_length_correct(cls, val: str) -> bool:
+        return val == cls.text_to_match
+
 
 class CaseInsensitiveCompare(LiteralCompare):
     a_upper = b"A"[0]
@@ -100,6 +410,15 @@ class CaseInsensitiveCompare(LiteralCompare):
 
     @classmethod
     def match_length_correct(cls, val: bytes) -> bool:
+        return cls._match_codes(val)
+
+    @classmethod
+    def match_text_length_correct(cls, val: str) -> bool:
+        return cls._match_codes(map(ord, val))
+
+    @classmethod
+    def _match_codes(cls, val: Iterable[int]) -> bool:
+        # The octets, or code points, of val against str_to_match
         for x, y in zip(cls.str_to_match, val):
             if x == y:
                 continue
@@ -121,23 +440,127 @@ class CaseInsensitiveCompare(LiteralCompare):
         return True
 
 
+LiteralTypeVar = TypeVar("LiteralTypeVar", bound=LiteralCompare)
+
+# The classes made by literal_compare and case_insensitive_compare, so each
+# literal has one class however often it is asked for. Lookups don't lock;
+# the lock only makes sure two threads asking at once get the same class.
+_literal_classes: dict[bytes, type[LiteralCompare]] = {}
+_case_insensitive_classes: dict[bytes, type[CaseInsensitiveCompare]] = {}
+_literal_classes_lock = threading.Lock()
+
+
+def _literal_class(
+    classes: dict[bytes, type[LiteralTypeVar]],
+    base: type[LiteralTypeVar],
+    name: str,
+    str_to_match: bytes,
+) -> type[LiteralTypeVar]:
+    literal_class = classes.get(str_to_match)
+    if literal_class is None:
+        with _literal_classes_lock:
+            literal_class = classes.get(str_to_match)
+            if literal_class is None:
+                attrs = {
+                    "str_to_match": str_to_match,
+                }
+                literal_class = classes[str_to_match] = type(
+                    name, (base,), attrs
+                )
+    return literal_class
+
+
 def literal_compare(str_to_match: bytes) -> type[LiteralCompare]:
     # Takes a string such as '+' and creates a Matcher class for it
-    name = f"LiteralCompare<{str_to_match.decode()}>"
-    attrs = {
-        "str_to_match": str_to_match,
-    }
-    return type(name, (LiteralCompare,), attrs)
+    name = f"LiteralCompare<{str_to_match.decode('latin-1')}>"
+    return _literal_class(
+        _literal_classes, LiteralCompare, name, str_to_match
+    )
 
 
 def case_insensitive_compare(
     str_to_match: bytes
 ) -> type[CaseInsensitiveCompare]:
-    name = f"CaseInsensitiveCompare<{str_to_match.decode()}>"
-    attrs = {
-        "str_to_match": str_to_match,
-    }
-    return type(name, (CaseInsensitiveCompare,), attrs)
+    name = f"CaseInsensitiveCompare<{str_to_match.decode('latin-1')}>"
+    return _literal_class(
+        _case_insensitive_classes, CaseInsensitiveCompare, name, str_to_match
+    )
+
+
+class CharClassMetaClass(type):
+    def __new__(
+        cls,
+        name: str,
+        bases: tuple[type, ...],
+        dct: dict[str, Any],
+    ) -> Any:
+        # Build the lookup table and run pattern from the class's chars
+        chars: bytes | None = dct.get("chars")
+        if chars is not None:
+            members = set(chars)
+            dct["table"] = bytes(int(i in members) for i in range(256))
+            dct["items"] = frozenset(members) | frozenset(map(chr, members))
+            dct["run_pattern"] = re.compile(
+                b"[" + b"".join(re.escape(bytes([i])) for i in sorted(members))
+                + b"]*"
+            )
+            dct["run_text_pattern"] = re.compile(
+                "[" + "".join(re.escape(chr(i)) for i in sorted(members))
+                + "]*"
+            )
+        return type.__new__(cls, name, bases, dct)
+
+
+class CharClass(ConstantLength, metaclass=CharClassMetaClass):
+    """
+    A single byte from a set, 'chars', looked up in a 256 entry table, by
+    code point for str input.
+
+    run_end finds the end of a run of them without a Python level loop, for
+    rules such as 1*tchar.
+    """
+    length = 1
+    chars: bytes
+    table: bytes
+    run_pattern: re.Pattern[bytes]
+    # The same run, of the characters of chars, for str input
+    run_text_pattern: re.Pattern[str]
+    # The octets of chars and their characters, so val[i] in items tests a
+    # byte of bytes input or a character of str input alike
+    items: frozenset[int | str]
+
+    @classmethod
+    def match_length_correct(cls, val: bytes) -> bool:
+        return bool(cls.table[val[0]])
+
+    @classmethod
+    def match_text_length_correct(cls, val: str) -> bool:
+        code = ord(val)
+        return code < 256 and bool(cls.table[code])
+
+    @classmethod
+    def run_end(
+        cls, val: bytes | bytearray | str, start: int, limit: int | None = None
+    ) -> int:
+        """
+        The offset of the first byte, or character, from start which isn't
+        in the class, or the end of val, or limit if the run gets that far
+        """
+        if limit is None:
+            limit = len(val)
+        run: re.Match[str] | re.Match[bytes] | None
+        if isinstance(val, str):
+            run = cls.run_text_pattern.match(val, start, limit)
+        else:
+            run = cls.run_pattern.match(val, start, limit)
+        end = start if run is None else run.end()
+        if _budget_gate.active:
+            # A step for the call, and one for each byte of the run, so
+            # scanning costs what it covers
+            _charge_step(1 + end - start)
+        if _failure_gate.active:
+            _record_failure(end, cls.__qualname__)
+        return end
 
 
 class DefaultMatchAll(Matcher[MatchResultTypeVar]):
@@ -145,9 +568,193 @@ class DefaultMatchAll(Matcher[MatchResultTypeVar]):
     Implement a match_from, and defines the match_full from that.
 
     If the 'match_start' then matches the whole string, the match_full passes
+
+    Subclasses work with offsets into the original byte string, so matching
+    part way through never copies the remainder of the input.
+
+    Subclasses whose match_from also takes str, matching its characters
+    through the text patterns of their runs, set text_input, so match_start
+    passes str input on rather than converting it. A character past U+00FF
+    is in no run, so matching stops there.
     """
+    text_input: bool = False
 
     @classmethod
-    def match_full(cls, val: bytes) -> bool:
+    def match_full(cls, val: Input) -> bool:
         match_result = cls.match_start(val)
         return (match_result is not None and match_result.length == len(val))
+
+    @classmethod
+    def match_start(cls, val: Input) -> MatchResultTypeVar | None:
+        if isinstance(val, str) and not cls.text_input:
+            # Most composite patterns match octets, so str input is
+            # converted once here, rather than each operation taking both
+            octets = text_octets(val)
+            if octets is None:
+                return None
+            val = octets
+        # Still str only if match_from takes it
+        return cls.match_from(cast(bytes, val), 0)
+
+
+class AlternationMatchResult(MatchResult):
+    branch: int
+
+    def __init__(self, *, start: int, length: int, branch: int):
+        self.branch = branch
+        super().__init__(start=start, length=length)
+
+
+class Alternation(DefaultMatchAll[AlternationMatchResult]):
+    """
+    The first of 'alternatives' which matches, as an ordered alternation
+    such as A / B / C.
+
+    The result's branch is the index of the alternative which matched, so
+    callers can tell which it was without matching again.
+    """
+    alternatives: tuple[type[Matcher[Any]], ...]
+
+    @classmethod
+    def match_from(
+        cls, val: bytes, start: int
+    ) -> AlternationMatchResult | None:
+        for branch, alternative in enumerate(cls.alternatives):
+            match_result = alternative.match_from(val, start)
+            if match_result is not None:
+                return AlternationMatchResult(
+                    start=start, length=match_result.length, branch=branch
+                )
+        return None
+
+    @classmethod
+    def alternative(
+        cls, match_result: AlternationMatchResult
+    ) -> type[Matcher[Any]]:
+        """
+        The alternative which gave match_result
+        """
+        return cls.alternatives[match_result.branch]
+
+
+def alternation(
+    alternatives: Sequence[type[Matcher[Any]]]
+) -> type[Alternation]:
+    # Creates a Matcher class for the first of the alternatives to match
+    names = "|".join(alternative.__qualname__ for alternative in alternatives)
+    name = f"Alternation<{names}>"
+    attrs = {
+        "alternatives": tuple(alternatives),
+    }
+    return type(name, (Alternation,), attrs)
+
+
+# Key of a trie node holding the index of the keyword ending there. Byte
+# keys are 0-255, so this can't clash.
+_KEYWORD_END = -1
+
+_TrieNode = dict[int, Any]
+
+
+class KeywordMatchResult(MatchResult):
+    keyword_index: int
+    keyword: bytes
+
+    def __init__(
+        self, *, start: int, length: int, keyword_index: int, keyword: bytes
+    ):
+        self.keyword_index = keyword_index
+        self.keyword = keyword
+        super().__init__(start=start, length=length)
+
+
+class KeywordSetMetaClass(type):
+    def __new__(
+        cls,
+        name: str,
+        bases: tuple[type, ...],
+        dct: dict[str, Any],
+    ) -> Any:
+        # Build the case folding trie from the class's keywords. Both cases
+        # of a letter lead to the same node, so matching needs no folding.
+        keywords: tuple[bytes, ...] | None = dct.get("keywords")
+        if keywords is not None:
+            trie: _TrieNode = {}
+            for keyword_index, keyword in enumerate(keywords):
+                node = trie
+                for char in keyword.lower():
+                    child = node.get(char)
+                    if child is None:
+                        child = node[char] = {}
+                        upper = bytes([char]).upper()[0]
+                        if upper != char:
+                            node[upper] = child
+                    node = child
+                # The first of any keywords equal ignoring case is reported
+                node.setdefault(_KEYWORD_END, keyword_index)
+            dct["trie"] = trie
+        return type.__new__(cls, name, bases, dct)
+
+
+class KeywordSet(
+    DefaultMatchAll[KeywordMatchResult], metaclass=KeywordSetMetaClass
+):
+    """
+    Any one of 'keywords', compared case-insensitively, as an alternation of
+    case_insensitive_compare literals would, but the longest matching
+    keyword is taken rather than the first.
+
+    The keywords are held in a trie, so matching takes time proportional to
+    the length of the match, however many keywords there are. The result
+    says which keyword matched.
+    """
+    keywords: tuple[bytes, ...]
+    trie: _TrieNode
+
+    @classmethod
+    def match_from(
+        cls, val: bytes, start: int
+    ) -> KeywordMatchResult | None:
+        node = cls.trie
+        keyword_index = -1
+        end = offset = start
+        length = len(val)
+        while offset < length:
+            child = node.get(val[offset])
+            if child is None:
+                break
+            node = child
+            offset += 1
+            if _KEYWORD_END in node:
+                keyword_index = node[_KEYWORD_END]
+                end = offset
+        if _budget_gate.active:
+            _charge_step(1 + offset - start)
+
+        if keyword_index < 0:
+            if _failure_gate.active:
+                _record_failure(offset, cls.__qualname__)
+            return None
+        return KeywordMatchResult(
+            start=start,
+            length=end - start,
+            keyword_index=keyword_index,
+            keyword=cls.keywords[keyword_index],
+        )
+
+
+def keyword_set(keywords: Sequence[bytes]) -> type[KeywordSet]:
+    # Creates a Matcher class for any one of the keywords
+    names = "|".join(keyword.decode("latin-1") for keyword in keywords)
+    name = f"KeywordSet<{names}>"
+    attrs = {
+        "keywords": tuple(keywords),
+    }
+    return type(name, (KeywordSet,), attrs)
+
+
+if os.environ.get("ABNF_PATTERNS_INSTRUMENT", "") not in ("", "0"):
+    # Imported here as instrumentation needs the classes above. Matchers
+    # defined after this point are instrumented as they are created.
+    import instrumentation
+    instrumentation.instrument_from_environment()
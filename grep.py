@@ -0,0 +1,366 @@
+import argparse
+import os
+import sys
+import time
+from enum import Enum
+from typing import Any, BinaryIO, Iterator, NamedTuple, Sequence, cast
+
+from generic import Matcher, MatchResult, _step_budget, _StepBudgetExhausted
+from registry import resolve_matcher
+
+
+# Bytes read at a time. Only one block, and the line it ends part way
+# through, is held in memory.
+BLOCK_SIZE = 1 << 20
+
+# The most steps, as counted by budget.Budget, extracting from one line may
+# take. Finding every match tries the matcher from each byte a match doesn't
+# cover, and some matchers, such as rfc2616.Comment on a run of "(", read
+# to the end of the line each time, which is quadratic in its length.
+DEFAULT_MAX_STEPS = 1_000_000
+
+
+class Mode(Enum):
+    VALID = "valid"
+    INVALID = "invalid"
+    EXTRACT = "extract"
+
+
+class ScanStats:
+    """
+    The work of a scan. Latencies are of matching one line, in a histogram
+    of power of two buckets of nanoseconds, so multi-GB scans don't keep a
+    latency per line.
+    """
+    __slots__ = (
+        "lines", "bytes", "selected", "unfinished", "elapsed_ns", "match_ns",
+        "slowest_ns", "latency_histogram",
+    )
+
+    def __init__(self) -> None:
+        self.lines = 0
+        self.bytes = 0
+        # Lines output, or occurrences when extracting
+        self.selected = 0
+        # Lines extraction gave up on part way, out of steps
+        self.unfinished = 0
+        self.elapsed_ns = 0
+        self.match_ns = 0
+        self.slowest_ns = 0
+        # Lines whose match took less than 2 ** i ns, but at least half that
+        self.latency_histogram = [0] * 64
+
+    def record_latency(self, latency_ns: int) -> None:
+        self.match_ns += latency_ns
+        if latency_ns > self.slowest_ns:
+            self.slowest_ns = latency_ns
+        self.latency_histogram[latency_ns.bit_length()] += 1
+
+    def latency_percentile(self, percent: float) -> int:
+        """
+        A bound, in ns, that the match of at least percent of lines took no
+        longer than
+        """
+        wanted = self.lines * percent / 100
+        seen = 0
+        for bucket, count in enumerate(self.latency_histogram):
+            seen += count
+            if count and seen >= wanted:
+                return min(1 << bucket, self.slowest_ns)
+        return 0
+
+    def as_json(self) -> dict[str, Any]:
+        return {
+            "lines": self.lines,
+            "bytes": self.bytes,
+            "selected": self.selected,
+            "unfinished": self.unfinished,
+            "elapsed_ns": self.elapsed_ns,
+            "match_ns": self.match_ns,
+            "slowest_ns": self.slowest_ns,
+            "p50_ns": self.latency_percentile(50),
+            "p99_ns": self.latency_percentile(99),
+        }
+
+    def format_summary(self) -> str:
+        elapsed = max(self.elapsed_ns, 1) / 1e9
+        mean_ns = self.match_ns / self.lines if self.lines else 0
+        return "\n".join([
+            f"{self.lines:,} lines, {self.bytes:,} bytes, "
+            f"{self.selected:,} selected, {self.unfinished:,} unfinished in "
+            f"{elapsed:.3f} s",
+            f"throughput: {self.bytes / elapsed / 1e6:,.1f} MB/s, "
+            f"{self.lines / elapsed:,.0f} lines/s",
+            f"latency per line: mean {mean_ns / 1e3:,.2f} us, "
+            f"p50 <= {self.latency_percentile(50) / 1e3:,.2f} us, "
+            f"p99 <= {self.latency_percentile(99) / 1e3:,.2f} us, "
+            f"max {self.slowest_ns / 1e3:,.2f} us",
+        ])
+
+
+def read_lines(
+    stream: BinaryIO, block_size: int = BLOCK_SIZE
+) -> Iterator[list[bytes]]:
+    """
+    The lines of stream, a block's worth at a time, without their line
+    endings: "\\n", or "\\r\\n"
+    """
+    # The pieces of a line not yet ended, joined once it is, so a line many
+    # blocks long isn't copied for every block
+    pieces: list[bytes] = []
+    while 1:
+        block = stream.read(block_size)
+        if not block:
+            break
+        last_newline = block.rfind(b"\n")
+        if last_newline == -1:
+            pieces.append(block)
+            continue
+        pieces.append(block[:last_newline])
+        lines = b"".join(pieces).split(b"\n")
+        pieces = [block[last_newline + 1:]]
+        yield [line[:-1] if line[-1:] == b"\r" else line for line in lines]
+    partial = b"".join(pieces)
+    if partial:
+        yield [partial[:-1] if partial[-1:] == b"\r" else partial]
+
+
+class Extraction(NamedTuple):
+    matches: list[MatchResult]
+    # False if the steps ran out before the end of the line
+    complete: bool
+
+
+def _find_all(
+    matcher: type[Matcher[Any]], line: bytes, matches: list[MatchResult]
+) -> None:
+    match_from = matcher.match_from
+    position = 0
+    end = len(line)
+    while position < end:
+        match_result = match_from(line, position)
+        if match_result is not None and match_result.length:
+            matches.append(match_result)
+            position = match_result.end
+        else:
+            position += 1
+
+
+def find_all(
+    matcher: type[Matcher[Any]],
+    line: bytes,
+    *,
+    max_steps: int | None = DEFAULT_MAX_STEPS,
+) -> Extraction:
+    """
+    The non-empty matches of matcher in line, scanning from the start, each
+    from the end of the last. Once max_steps steps are taken, the matches
+    found so far. None is no limit.
+    """
+    matches: list[MatchResult] = []
+    if max_steps is None:
+        _find_all(matcher, line, matches)
+        return Extraction(matches, True)
+    with _step_budget(max_steps):
+        try:
+            _find_all(matcher, line, matches)
+        except _StepBudgetExhausted:
+            return Extraction(matches, False)
+    return Extraction(matches, True)
+
+
+def scan(
+    matcher: type[Matcher[Any]],
+    stream: BinaryIO,
+    output: BinaryIO,
+    mode: Mode = Mode.VALID,
+    *,
+    stats: ScanStats | None = None,
+    block_size: int = BLOCK_SIZE,
+    max_steps: int | None = DEFAULT_MAX_STEPS,
+) -> int:
+    """
+    Write the lines of stream which match matcher in full (Mode.VALID), or
+    don't (Mode.INVALID), or each match in the lines (Mode.EXTRACT), to
+    output, one per line. Returns the number written.
+
+    Extracting from a line stops after max_steps steps, with a warning on
+    stderr, keeping the matches found before then.
+
+    With stats, the time each line takes to match is measured too, which
+    costs a little.
+    """
+    match_full = matcher.match_full
+    selected = 0
+    line_number = 0
+    begin = time.perf_counter_ns()
+    for lines in read_lines(stream, block_size):
+        out_lines: list[bytes] = []
+        if stats is None and mode is Mode.VALID:
+            out_lines = [line for line in lines if match_full(line)]
+        elif stats is None and mode is Mode.INVALID:
+            out_lines = [line for line in lines if not match_full(line)]
+        else:
+            for number, line in enumerate(lines, line_number + 1):
+                line_begin = time.perf_counter_ns()
+                if mode is Mode.EXTRACT:
+                    extraction = find_all(matcher, line, max_steps=max_steps)
+                    out_lines.extend(
+                        line[match_result.start:match_result.end]
+                        for match_result in extraction.matches
+                    )
+                    if not extraction.complete:
+                        print(
+                            f"line {number}: stopped extracting after "
+                            f"{max_steps:,} steps",
+                            file=sys.stderr,
+                        )
+                        if stats is not None:
+                            stats.unfinished += 1
+                elif bool(match_full(line)) is (mode is Mode.VALID):
+                    out_lines.append(line)
+                if stats is not None:
+                    stats.record_latency(time.perf_counter_ns() - line_begin)
+
+        if out_lines:
+            output.write(b"\n".join(out_lines) + b"\n")
+        selected += len(out_lines)
+        line_number += len(lines)
+        if stats is not None:
+            stats.lines += len(lines)
+            # The bytes of the lines, and a line ending for each
+            stats.bytes += sum(map(len, lines)) + len(lines)
+
+    if stats is not None:
+        stats.selected += selected
+        stats.elapsed_ns += time.perf_counter_ns() - begin
+    return selected
+
+
+# As grep killed by SIGPIPE, or interrupted, reports to the shell
+EXIT_BROKEN_PIPE = 141
+EXIT_INTERRUPTED = 130
+
+
+class _ReadError(Exception):
+    # An error reading an input, told apart from one writing the output
+    def __init__(self, error: OSError):
+        super().__init__(error)
+        self.error = error
+
+
+class _Input:
+    """
+    A stream whose read errors are raised as _ReadError
+    """
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        try:
+            return self.stream.read(size)
+        except OSError as exc:
+            raise _ReadError(exc) from exc
+
+
+def _silence_stdout() -> None:
+    # Python flushes stdout again on exit, which would fail again once the
+    # reader has gone, so point it at devnull
+    try:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    except (OSError, ValueError):
+        pass
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m grep",
+        description=(
+            "Print the lines of files, or stdin, which are valid for a "
+            "matcher, or the matches in them"
+        ),
+    )
+    parser.add_argument("matcher", help="e.g. rfc3986.Host")
+    parser.add_argument(
+        "files", nargs="*", default=["-"],
+        help="files to read, - for stdin, which is the default",
+    )
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument(
+        "-v", "--invalid", dest="mode", action="store_const",
+        const=Mode.INVALID, default=Mode.VALID,
+        help="print the lines which aren't valid instead",
+    )
+    modes.add_argument(
+        "-o", "--extract", dest="mode", action="store_const",
+        const=Mode.EXTRACT,
+        help="print every match in each line, one per line",
+    )
+    parser.add_argument(
+        "--max-steps", type=int, default=DEFAULT_MAX_STEPS,
+        help="the most steps extracting from one line may take, 0 for no "
+        f"limit, default {DEFAULT_MAX_STEPS:,}",
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="print throughput and latency to stderr when done",
+    )
+    # Options may come after the files, as with grep
+    args = parser.parse_intermixed_args(argv)
+    try:
+        matcher = resolve_matcher(args.matcher)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    stats = ScanStats() if args.stats else None
+    max_steps = args.max_steps or None
+    output = sys.stdout.buffer
+    selected = 0
+    failed = False
+    try:
+        for path in args.files:
+            # Only errors reading the inputs are reported, and the other
+            # files still scanned, as grep does. Errors writing the output
+            # stop the scan.
+            error: OSError | None = None
+            if path == "-":
+                stream = sys.stdin.buffer
+            else:
+                try:
+                    stream = open(path, "rb")
+                except OSError as exc:
+                    error = exc
+            if error is None:
+                try:
+                    selected += scan(
+                        matcher, cast(BinaryIO, _Input(stream)), output,
+                        args.mode, stats=stats, max_steps=max_steps,
+                    )
+                except _ReadError as exc:
+                    error = exc.error
+                finally:
+                    if path != "-":
+                        stream.close()
+            if error is not None:
+                output.flush()
+                print(f"{path}: {error.strerror}", file=sys.stderr)
+                failed = True
+        output.flush()
+    except BrokenPipeError:
+        # The reader has gone, as with "| head": stop quietly, as grep does
+        _silence_stdout()
+        return EXIT_BROKEN_PIPE
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    if stats is not None:
+        print(stats.format_summary(), file=sys.stderr)
+    # As grep: 2 if a file couldn't be read, else 0 if anything was printed,
+    # 1 if not
+    if failed:
+        return 2
+    return 0 if selected else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+import atexit
+import functools
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from generic import Matcher, _own_method, _patch_method, _unpatch_method
+
+
+# The classmethods which are timed. Matchers call one another through these.
+INSTRUMENTED_METHODS = ("match_full", "match_start", "match_from")
+
+
+class MatcherStats:
+    __slots__ = (
+        "calls", "successes", "failures", "bytes_consumed", "total_ns",
+    )
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.bytes_consumed = 0
+        self.total_ns = 0
+
+    def add(self, other: "MatcherStats") -> None:
+        self.calls += other.calls
+        self.successes += other.successes
+        self.failures += other.failures
+        self.bytes_consumed += other.bytes_consumed
+        self.total_ns += other.total_ns
+
+
+class CallTreeNode:
+    """
+    The calls made to one matcher from one particular chain of callers.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.stats = MatcherStats()
+        self.children: dict[str, CallTreeNode] = {}
+
+    def child(self, name: str) -> "CallTreeNode":
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = CallTreeNode(name)
+        return node
+
+    def walk(self, depth: int = 0) -> Iterator[tuple[int, "CallTreeNode"]]:
+        """
+        Depth first, with the most expensive children first
+        """
+        for child in sorted(
+            self.children.values(),
+            key=lambda node: node.stats.total_ns,
+            reverse=True,
+        ):
+            yield depth, child
+            yield from child.walk(depth + 1)
+
+
+class Recorder:
+    """
+    Collects the calls made while instrumentation is active.
+
+    Time is cumulative: a matcher's time includes the time of the matchers it
+    called.
+    """
+    def __init__(self) -> None:
+        self.root = CallTreeNode("<root>")
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        path: tuple[str, ...],
+        matched: bool,
+        length: int,
+        elapsed_ns: int,
+    ) -> None:
+        with self._lock:
+            node = self.root
+            for name in path:
+                node = node.child(name)
+            stats = node.stats
+            stats.calls += 1
+            if matched:
+                stats.successes += 1
+                stats.bytes_consumed += length
+            else:
+                stats.failures += 1
+            stats.total_ns += elapsed_ns
+
+    def totals(self) -> dict[str, MatcherStats]:
+        """
+        Stats per matcher, summed over every place it was called from
+        """
+        totals: dict[str, MatcherStats] = {}
+        for __, node in self.root.walk():
+            totals.setdefault(node.name, MatcherStats()).add(node.stats)
+        return totals
+
+    def format_report(self) -> str:
+        lines = [
+            f"{'matcher':<48} {'calls':>9} {'ok':>9} {'failed':>9} "
+            f"{'bytes':>10} {'time (us)':>12}"
+        ]
+        for depth, node in self.root.walk():
+            stats = node.stats
+            lines.append(
+                f"{'  ' * depth + node.name:<48} {stats.calls:>9} "
+                f"{stats.successes:>9} {stats.failures:>9} "
+                f"{stats.bytes_consumed:>10} {stats.total_ns / 1000:>12.1f}"
+            )
+        return "\n".join(lines)
+
+
+_recorders: list[Recorder] = []
+_recorders_lock = threading.Lock()
+# The methods wrapped, as (class, method name)
+_instrumented_methods: set[tuple[type[Matcher], str]] = set()
+_thread_state = threading.local()
+
+
+def _call_stack() -> tuple[list[str], list[set[str]]]:
+    """
+    The matchers being called on this thread, outermost first, and for each
+    the entry points it is within
+    """
+    try:
+        return _thread_state.stack, _thread_state.entered
+    except AttributeError:
+        _thread_state.stack = []
+        _thread_state.entered = []
+        return _thread_state.stack, _thread_state.entered
+
+
+def _instrumented(
+    function: Callable[..., Any], method_name: str
+) -> Callable[..., Any]:
+    def wrapper(cls: type[Matcher], val: bytes, *args: Any) -> Any:
+        stack, entered = _call_stack()
+        name = cls.__qualname__
+        if stack and stack[-1] == name and method_name not in entered[-1]:
+            # A matcher's entry points call one another (match_full calls
+            # match_start, for example): count these as a single call. An
+            # entry point it is already within is a recursive call, as
+            # Comment makes for a nested comment, and is counted apart.
+            entered[-1].add(method_name)
+            try:
+                return function(cls, val, *args)
+            finally:
+                entered[-1].discard(method_name)
+
+        stack.append(name)
+        entered.append({method_name})
+        path = tuple(stack)
+        begin = time.perf_counter_ns()
+        try:
+            result = function(cls, val, *args)
+        finally:
+            elapsed_ns = time.perf_counter_ns() - begin
+            stack.pop()
+            entered.pop()
+
+        if result is None or result is False:
+            matched, length = False, 0
+        elif result is True:
+            matched, length = True, len(val)
+        else:
+            matched, length = True, result.length
+
+        for recorder in _recorders:
+            recorder.record(path, matched, length, elapsed_ns)
+        return result
+
+    wrapper.__wrapped__ = function  # type: ignore[attr-defined]
+    return wrapper
+
+
+def _instrument_class(cls: type[Matcher]) -> None:
+    for method_name in INSTRUMENTED_METHODS:
+        # Only the methods cls defines, not wrappers capture has added
+        method = _own_method(cls, method_name)
+        if not isinstance(method, classmethod):
+            continue
+        if (cls, method_name) in _instrumented_methods:
+            continue
+        _instrumented_methods.add((cls, method_name))
+        _patch_method(
+            cls, method_name, _recorders,
+            functools.partial(_instrumented, method_name=method_name),
+        )
+
+
+def _all_matcher_classes() -> Iterator[type[Matcher]]:
+    pending: list[type[Matcher]] = [Matcher]
+    seen = set()
+    while pending:
+        cls = pending.pop()
+        if cls in seen:
+            continue
+        seen.add(cls)
+        yield cls
+        pending.extend(cls.__subclasses__())
+
+
+def _instrument_new_subclass(cls: type[Matcher], /, **kwargs: Any) -> None:
+    super(Matcher, cls).__init_subclass__(**kwargs)
+    # Subclasses may be defined on any thread, while start or stop runs
+    with _recorders_lock:
+        if _recorders:
+            _instrument_class(cls)
+
+
+def _install() -> None:
+    for cls in _all_matcher_classes():
+        _instrument_class(cls)
+    # Also cover matchers defined while instrumentation is active.
+    setattr(
+        Matcher, "__init_subclass__", classmethod(_instrument_new_subclass)
+    )
+
+
+def _uninstall() -> None:
+    delattr(Matcher, "__init_subclass__")
+    for cls, method_name in _instrumented_methods:
+        _unpatch_method(cls, method_name, _recorders)
+    _instrumented_methods.clear()
+
+
+def start() -> Recorder:
+    """
+    Start recording calls into a new Recorder, until stop is called with it.
+
+    The matchers are only wrapped while at least one recorder is active, so
+    there is no cost to matching when instrumentation is not in use.
+    """
+    recorder = Recorder()
+    with _recorders_lock:
+        if not _recorders:
+            _install()
+        _recorders.append(recorder)
+    return recorder
+
+
+def stop(recorder: Recorder) -> None:
+    with _recorders_lock:
+        _recorders.remove(recorder)
+        if not _recorders:
+            _uninstall()
+
+
+@contextmanager
+def instrument() -> Iterator[Recorder]:
+    """
+    Record the matcher calls made within the with block:
+
+        with instrument() as recorder:
+            Host.match_full(b"[::1]")
+        print(recorder.format_report())
+    """
+    recorder = start()
+    try:
+        yield recorder
+    finally:
+        stop(recorder)
+
+
+def instrument_from_environment() -> None:
+    """
+    Record every matcher call made by the process, printing the report to
+    stderr on exit. Used when ABNF_PATTERNS_INSTRUMENT is set.
+    """
+    recorder = start()
+
+    def report() -> None:
+        stop(recorder)
+        print(recorder.format_report(), file=sys.stderr)
+
+    atexit.register(report)
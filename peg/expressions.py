@@ -0,0 +1,260 @@
+from typing import NamedTuple, Union
+
+
+class GrammarError(ValueError):
+    pass
+
+
+class CharSet(NamedTuple):
+    """
+    One byte from chars
+    """
+    chars: bytes
+
+
+class Literal(NamedTuple):
+    """
+    The bytes of text, or with case_insensitive, text with the case of its
+    ASCII letters ignored
+    """
+    text: bytes
+    case_insensitive: bool = False
+
+
+class Concat(NamedTuple):
+    """
+    Each of items in turn
+    """
+    items: tuple["Expression", ...]
+
+
+class Choice(NamedTuple):
+    """
+    The first of alternatives which matches. Once one has matched, the
+    others aren't tried, even if what follows the choice then fails.
+    """
+    alternatives: tuple["Expression", ...]
+
+
+class Repeat(NamedTuple):
+    """
+    item at least minimum times, as many times as it matches up to maximum
+    (or without limit if maximum is None). Repetition never gives back what
+    it has matched.
+    """
+    item: "Expression"
+    minimum: int = 0
+    maximum: int | None = None
+
+
+class Not(NamedTuple):
+    """
+    Matches, consuming nothing, where item doesn't match
+    """
+    item: "Expression"
+
+
+class And(NamedTuple):
+    """
+    Matches, consuming nothing, where item matches
+    """
+    item: "Expression"
+
+
+class Limit(NamedTuple):
+    """
+    item matched as if the input ended length bytes after where it starts,
+    for rules with a length limit, such as rfc1034's labels
+    """
+    item: "Expression"
+    length: int
+
+
+class RuleRef(NamedTuple):
+    """
+    The rule called name in the same grammar
+    """
+    name: str
+
+
+Expression = Union[
+    CharSet, Literal, Concat, Choice, Repeat, Not, And, Limit, RuleRef
+]
+
+# Rule names to their expressions
+Grammar = dict[str, Expression]
+
+
+def chars(chars: bytes | str) -> CharSet:
+    if isinstance(chars, str):
+        chars = chars.encode("ascii")
+    return CharSet(chars)
+
+
+def char_range(first: str, last: str) -> CharSet:
+    return CharSet(bytes(range(ord(first), ord(last) + 1)))
+
+
+def literal(text: bytes | str, case_insensitive: bool = False) -> Literal:
+    if isinstance(text, str):
+        text = text.encode("ascii")
+    return Literal(text, case_insensitive)
+
+
+def concat(*items: Expression) -> Concat:
+    return Concat(items)
+
+
+def choice(*alternatives: Expression) -> Choice:
+    return Choice(alternatives)
+
+
+def optional(item: Expression) -> Repeat:
+    return Repeat(item, 0, 1)
+
+
+def zero_or_more(item: Expression) -> Repeat:
+    return Repeat(item, 0, None)
+
+
+def one_or_more(item: Expression) -> Repeat:
+    return Repeat(item, 1, None)
+
+
+def repeat(
+    item: Expression, minimum: int, maximum: int | None = None
+) -> Repeat:
+    # A fixed count with one argument, n( item ) in ABNF
+    return Repeat(item, minimum, minimum if maximum is None else maximum)
+
+
+def limit(item: Expression, length: int) -> Limit:
+    return Limit(item, length)
+
+
+def rule(name: str) -> RuleRef:
+    return RuleRef(name)
+
+
+def check_grammar(grammar: Grammar, start: str) -> None:
+    """
+    Raise GrammarError for rules which are referred to but not defined,
+    repetitions which could repeat forever by matching nothing, and left
+    recursion, which PEG can't match.
+    """
+    if start not in grammar:
+        raise GrammarError(f"Undefined start rule {start!r}")
+    for name, expression in grammar.items():
+        _check(grammar, expression, name)
+    for name in grammar:
+        _check_left_recursion(grammar, name)
+
+
+def nullable(grammar: Grammar, expression: Expression) -> bool:
+    """
+    Whether expression can succeed without consuming anything
+    """
+    return _nullable(grammar, expression, frozenset())
+
+
+def _nullable(
+    grammar: Grammar, expression: Expression, visiting: frozenset[str]
+) -> bool:
+    if isinstance(expression, CharSet):
+        return False
+    if isinstance(expression, Literal):
+        return not expression.text
+    if isinstance(expression, Concat):
+        return all(
+            _nullable(grammar, item, visiting) for item in expression.items
+        )
+    if isinstance(expression, Choice):
+        return any(
+            _nullable(grammar, alternative, visiting)
+            for alternative in expression.alternatives
+        )
+    if isinstance(expression, Repeat):
+        return (
+            expression.minimum == 0
+            or _nullable(grammar, expression.item, visiting)
+        )
+    if isinstance(expression, (Not, And)):
+        return True
+    if isinstance(expression, Limit):
+        return _nullable(grammar, expression.item, visiting)
+    if expression.name in visiting:
+        # Left recursion, reported by check_grammar
+        return False
+    return _nullable(
+        grammar, grammar[expression.name], visiting | {expression.name}
+    )
+
+
+def _check(grammar: Grammar, expression: Expression, name: str) -> None:
+    if isinstance(expression, (CharSet, Literal)):
+        return
+    if isinstance(expression, Concat):
+        for item in expression.items:
+            _check(grammar, item, name)
+    elif isinstance(expression, Choice):
+        if not expression.alternatives:
+            raise GrammarError(f"Empty choice in rule {name!r}")
+        for alternative in expression.alternatives:
+            _check(grammar, alternative, name)
+    elif isinstance(expression, Repeat):
+        if (
+            expression.minimum < 0
+        ) or (
+            expression.maximum is not None
+            and expression.maximum < expression.minimum
+        ):
+            raise GrammarError(f"Invalid repetition count in rule {name!r}")
+        if expression.maximum is None and nullable(grammar, expression.item):
+            raise GrammarError(
+                f"Unbounded repetition of a nullable item in rule {name!r}"
+            )
+        _check(grammar, expression.item, name)
+    elif isinstance(expression, Limit):
+        if expression.length < 0:
+            raise GrammarError(f"Negative length limit in rule {name!r}")
+        _check(grammar, expression.item, name)
+    elif isinstance(expression, (Not, And)):
+        _check(grammar, expression.item, name)
+    elif expression.name not in grammar:
+        raise GrammarError(
+            f"Undefined rule {expression.name!r} in rule {name!r}"
+        )
+
+
+def _first_rules(grammar: Grammar, expression: Expression) -> set[str]:
+    # The rules expression can call before consuming anything
+    if isinstance(expression, (CharSet, Literal)):
+        return set()
+    if isinstance(expression, Concat):
+        rules: set[str] = set()
+        for item in expression.items:
+            rules |= _first_rules(grammar, item)
+            if not nullable(grammar, item):
+                break
+        return rules
+    if isinstance(expression, Choice):
+        rules = set()
+        for alternative in expression.alternatives:
+            rules |= _first_rules(grammar, alternative)
+        return rules
+    if isinstance(expression, (Repeat, Not, And, Limit)):
+        return _first_rules(grammar, expression.item)
+    return {expression.name}
+
+
+def _check_left_recursion(grammar: Grammar, name: str) -> None:
+    pending = list(_first_rules(grammar, grammar[name]))
+    seen = set()
+    while pending:
+        called = pending.pop()
+        if called == name:
+            raise GrammarError(f"Left recursion in rule {name!r}")
+        if called in seen:
+            continue
+        seen.add(called)
+        pending.extend(_first_rules(grammar, grammar[called]))
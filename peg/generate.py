@@ -0,0 +1,240 @@
+import random
+
+from peg.expressions import (
+    And,
+    CharSet,
+    Choice,
+    Concat,
+    Expression,
+    Grammar,
+    GrammarError,
+    Limit,
+    Literal,
+    Not,
+    Repeat,
+    RuleRef,
+    check_grammar,
+)
+from peg.vm import compile_grammar, run
+
+
+# Candidates tried for each sample before giving up
+MAX_ATTEMPTS = 200
+
+# Rule calls deeper than this, in recursive grammars, abandon the candidate
+MAX_DEPTH = 100
+
+
+class _TooDeep(Exception):
+    pass
+
+
+class Generator:
+    """
+    Random samples of what rule start of grammar matches in full, and near
+    misses which it doesn't. The same grammar, start and seed give the same
+    samples, on any machine.
+
+    Each alternative of a choice is equally likely, so every form of a rule
+    turns up. Repetitions without an upper bound repeat mean_repeats more
+    times than their minimum on average, and at most max_repeats more.
+    With probability boundary, a decision is made at its limit instead: the
+    first or last byte of a set, the fewest or most repetitions, or as much
+    as fits in a length limit, such as a 63 byte label.
+
+    Samples are generated from the grammar without regard to the order of
+    its choices, then checked against the rule, so each is valid.
+    """
+    def __init__(
+        self,
+        grammar: Grammar,
+        start: str,
+        *,
+        seed: int = 0,
+        mean_repeats: float = 2.0,
+        max_repeats: int = 32,
+        boundary: float = 0.2,
+    ):
+        check_grammar(grammar, start)
+        self.grammar = grammar
+        self.start = start
+        self.mean_repeats = mean_repeats
+        self.max_repeats = max_repeats
+        self.boundary = boundary
+        self.random = random.Random(seed)
+        self.program = compile_grammar(grammar, start)
+        self.mutation_bytes = self._mutation_bytes()
+
+    def _mutation_bytes(self) -> bytes:
+        # The bytes the grammar uses, and some it doesn't
+        used = set(b" \x00\x7f\xff")
+        for expression in self.grammar.values():
+            pending = [expression]
+            while pending:
+                expression = pending.pop()
+                if isinstance(expression, CharSet):
+                    used.update(expression.chars)
+                elif isinstance(expression, Literal):
+                    used.update(expression.text)
+                elif isinstance(expression, Concat):
+                    pending.extend(expression.items)
+                elif isinstance(expression, Choice):
+                    pending.extend(expression.alternatives)
+                elif isinstance(expression, (Repeat, Not, And, Limit)):
+                    pending.append(expression.item)
+        return bytes(sorted(used))
+
+    def matches(self, val: bytes) -> bool:
+        return run(self.program, val).end == len(val)
+
+    def valid(self) -> bytes:
+        for __ in range(MAX_ATTEMPTS):
+            try:
+                candidate = self._generate(
+                    RuleRef(self.start), None, False, 0
+                )
+            except _TooDeep:
+                continue
+            if self.matches(candidate):
+                return candidate
+        raise GrammarError(
+            f"No sample of rule {self.start!r} found in {MAX_ATTEMPTS} tries"
+        )
+
+    def near_miss(self) -> bytes:
+        """
+        A valid sample with one byte deleted, inserted or replaced, a piece
+        of it repeated, or its end cut off, which no longer matches
+        """
+        for __ in range(MAX_ATTEMPTS):
+            candidate = self._mutate(self.valid())
+            if not self.matches(candidate):
+                return candidate
+        raise GrammarError(
+            f"No near miss of rule {self.start!r} found in {MAX_ATTEMPTS} "
+            f"tries"
+        )
+
+    def samples(self, count: int) -> list[bytes]:
+        return [self.valid() for __ in range(count)]
+
+    def near_misses(self, count: int) -> list[bytes]:
+        return [self.near_miss() for __ in range(count)]
+
+    def _at_boundary(self) -> bool:
+        return self.random.random() < self.boundary
+
+    def _extra_repeats(self) -> int:
+        # Geometrically distributed, with mean self.mean_repeats
+        keep_going = self.mean_repeats / (self.mean_repeats + 1)
+        extra = 0
+        while extra < self.max_repeats and self.random.random() < keep_going:
+            extra += 1
+        return extra
+
+    def _mutate(self, val: bytes) -> bytes:
+        generator = self.random
+        position = generator.randint(0, len(val))
+        new_byte = bytes([generator.choice(self.mutation_bytes)])
+        mutation = generator.randrange(5) if val else 1
+        if mutation == 0:
+            position = min(position, len(val) - 1)
+            return val[:position] + val[position + 1:]
+        if mutation == 1:
+            return val[:position] + new_byte + val[position:]
+        if mutation == 2:
+            position = min(position, len(val) - 1)
+            return val[:position] + new_byte + val[position + 1:]
+        if mutation == 3:
+            piece_start = generator.randint(0, position)
+            return val[:position] + val[piece_start:position] + val[position:]
+        return val[:position]
+
+    def _generate(
+        self, expression: Expression, room: int | None, fill: bool, depth: int
+    ) -> bytes:
+        """
+        A string expression may match, of no more than room bytes if it can
+        help it. With fill, repetitions go on until the room is used up.
+        """
+        generator = self.random
+        if isinstance(expression, CharSet):
+            members = sorted(set(expression.chars))
+            if self._at_boundary():
+                return bytes([generator.choice((members[0], members[-1]))])
+            return bytes([generator.choice(members)])
+        if isinstance(expression, Literal):
+            if not expression.case_insensitive:
+                return expression.text
+            return bytes(
+                generator.choice((char, *bytes([char]).swapcase()))
+                for char in expression.text
+            )
+        if isinstance(expression, Concat):
+            pieces = []
+            used = 0
+            for item in expression.items:
+                piece = self._generate(
+                    item, None if room is None else room - used, fill, depth
+                )
+                pieces.append(piece)
+                used += len(piece)
+            return b"".join(pieces)
+        if isinstance(expression, Choice):
+            return self._generate(
+                generator.choice(expression.alternatives), room, fill, depth
+            )
+        if isinstance(expression, Repeat):
+            return self._generate_repeat(expression, room, fill, depth)
+        if isinstance(expression, (Not, And)):
+            # Lookaheads match nothing: the check of the whole sample
+            # throws out those that fail
+            return b""
+        if isinstance(expression, Limit):
+            if room is None or expression.length < room:
+                room = expression.length
+            return self._generate(
+                expression.item, room, fill or self._at_boundary(), depth
+            )
+        if depth >= MAX_DEPTH:
+            raise _TooDeep
+        return self._generate(
+            self.grammar[expression.name], room, fill, depth + 1
+        )
+
+    def _generate_repeat(
+        self, expression: Repeat, room: int | None, fill: bool, depth: int
+    ) -> bytes:
+        minimum, maximum = expression.minimum, expression.maximum
+        if maximum is None:
+            maximum = minimum + self.max_repeats
+            if fill and room is not None:
+                count = maximum
+            elif self._at_boundary():
+                count = self.random.choice((minimum, maximum))
+            else:
+                count = minimum + self._extra_repeats()
+        elif self._at_boundary():
+            count = self.random.choice((minimum, maximum))
+        else:
+            count = self.random.randint(minimum, maximum)
+
+        pieces = []
+        used = 0
+        for __ in range(count):
+            # Items which don't fit are tried again a few times, for one
+            # which does
+            for __ in range(4):
+                piece = self._generate(
+                    expression.item,
+                    None if room is None else room - used,
+                    fill,
+                    depth,
+                )
+                if room is None or used + len(piece) <= room:
+                    break
+            else:
+                break
+            pieces.append(piece)
+            used += len(piece)
+        return b"".join(pieces)
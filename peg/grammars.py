@@ -0,0 +1,361 @@
+from peg.expressions import (
+    Expression,
+    Grammar,
+    Not,
+    char_range,
+    chars,
+    choice,
+    concat,
+    limit,
+    literal,
+    one_or_more,
+    optional,
+    repeat,
+    rule,
+    zero_or_more,
+)
+from peg.optimize import optimize
+from peg.vm import PegMatcher, peg_matcher
+from rfc2616.patterns import Ctl, Separators, TChar
+from rfc6455.patterns import SecWebSocketKey
+
+
+# TEXT other than the CR LF of LWS: any OCTET except CTLs, and HT
+_text_chars = bytes(i for i in range(256) if not Ctl.table[i]) + b"\t"
+
+
+def _h16_colons(count: int) -> tuple[Expression, ...]:
+    # count( h16 ":" ), for IPv6address
+    return (rule("h16"), literal(":")) * count
+
+
+def _h16_prefix(most: int) -> Expression:
+    # [ *most( h16 ":" ) h16 ] "::", written as h16 *most( ":" h16 ) since
+    # repetition never gives back the h16 the last ":" belongs to
+    return concat(
+        optional(concat(
+            rule("h16"), repeat(concat(literal(":"), rule("h16")), 0, most)
+        )),
+        literal("::"),
+    )
+
+
+grammar: Grammar = {
+    # rfc2234
+    "ALPHA": choice(char_range("A", "Z"), char_range("a", "z")),
+    "DIGIT": char_range("0", "9"),
+    "HEXDIG": choice(
+        rule("DIGIT"), chars("ABCDEF"), chars("abcdef")
+    ),
+
+    # rfc2616
+    "OCTET": chars(bytes(range(256))),
+    "UPALPHA": char_range("A", "Z"),
+    "LOALPHA": char_range("a", "z"),
+    "CRLF": literal("\r\n"),
+    "CHAR": chars(bytes(range(128))),
+    "CTL": chars(Ctl.chars),
+    "separators": chars(Separators.chars),
+    "tchar": chars(TChar.chars),
+    "LWS": concat(optional(rule("CRLF")), one_or_more(chars(" \t"))),
+    "token": one_or_more(rule("tchar")),
+    "quoted-pair": concat(literal("\\"), rule("CHAR")),
+    # A quoted-pair is always taken for a backslash, so qdtext and ctext
+    # leave it out, and CR LF is only allowed in LWS
+    "quoted-string": concat(
+        literal('"'),
+        zero_or_more(choice(
+            chars(_text_chars.translate(None, b'"\\')),
+            rule("quoted-pair"),
+            rule("LWS"),
+        )),
+        literal('"'),
+    ),
+    "comment": concat(
+        literal("("),
+        zero_or_more(choice(
+            chars(_text_chars.translate(None, b"()\\")),
+            rule("quoted-pair"),
+            rule("LWS"),
+            rule("comment"),
+        )),
+        literal(")"),
+    ),
+    "field-name": rule("token"),
+    "field-content": one_or_more(chars(_text_chars)),
+    "field-value": zero_or_more(
+        choice(rule("field-content"), rule("LWS"))
+    ),
+    "HTTP-Version": concat(
+        literal("HTTP/", case_insensitive=True),
+        one_or_more(rule("DIGIT")),
+        literal("."),
+        one_or_more(rule("DIGIT")),
+    ),
+    "Method": rule("token"),
+    # Any CHAR except CTLs and SP, leaving the URI to rfc3986
+    "Request-URI": one_or_more(chars(bytes(range(0x21, 0x7f)))),
+    "Request-Line": concat(
+        rule("Method"), literal(" "), rule("Request-URI"), literal(" "),
+        rule("HTTP-Version"), rule("CRLF"),
+    ),
+    "Status-Code": repeat(rule("DIGIT"), 3),
+    "Reason-Phrase": zero_or_more(chars(_text_chars)),
+    "Status-Line": concat(
+        rule("HTTP-Version"), literal(" "), rule("Status-Code"), literal(" "),
+        rule("Reason-Phrase"), rule("CRLF"),
+    ),
+
+    # rfc1034
+    "letter": rule("ALPHA"),
+    "digit": rule("DIGIT"),
+    "let-dig": choice(rule("letter"), rule("digit")),
+    "let-dig-hyp": choice(rule("let-dig"), literal("-")),
+    "ldh-str": one_or_more(rule("let-dig-hyp")),
+    # <letter> [ [ <ldh-str> ] <let-dig> ], where an ldh-str would take the
+    # last let-dig, and at most 63 characters
+    "label": limit(
+        concat(
+            rule("letter"),
+            zero_or_more(concat(zero_or_more(literal("-")), rule("let-dig"))),
+        ),
+        63,
+    ),
+    "subdomain": concat(
+        rule("label"), zero_or_more(concat(literal("."), rule("label")))
+    ),
+    "domain": choice(limit(rule("subdomain"), 255), literal("")),
+
+    # rfc3986
+    "h16": repeat(rule("HEXDIG"), 1, 4),
+    # Longest first, since the first alternative to match is taken
+    "dec-octet": choice(
+        concat(literal("25"), char_range("0", "5")),
+        concat(literal("2"), char_range("0", "4"), rule("DIGIT")),
+        concat(literal("1"), rule("DIGIT"), rule("DIGIT")),
+        concat(char_range("1", "9"), rule("DIGIT")),
+        rule("DIGIT"),
+    ),
+    "IPv4address": concat(
+        rule("dec-octet"), literal("."), rule("dec-octet"), literal("."),
+        rule("dec-octet"), literal("."), rule("dec-octet"),
+    ),
+    "ls32": choice(
+        concat(rule("h16"), literal(":"), rule("h16")),
+        rule("IPv4address"),
+    ),
+    "IPv6address": choice(
+        concat(*_h16_colons(6), rule("ls32")),
+        concat(literal("::"), *_h16_colons(5), rule("ls32")),
+        concat(_h16_prefix(0), *_h16_colons(4), rule("ls32")),
+        concat(_h16_prefix(1), *_h16_colons(3), rule("ls32")),
+        concat(_h16_prefix(2), *_h16_colons(2), rule("ls32")),
+        concat(_h16_prefix(3), *_h16_colons(1), rule("ls32")),
+        concat(_h16_prefix(4), rule("ls32")),
+        concat(_h16_prefix(5), rule("h16")),
+        _h16_prefix(6),
+    ),
+    "unreserved": choice(
+        rule("ALPHA"), rule("DIGIT"), chars("-"), chars("."), chars("_"),
+        chars("~"),
+    ),
+    "sub-delims": chars("!$&'()*+,;="),
+    "IPvFuture": concat(
+        literal("v", case_insensitive=True),
+        one_or_more(rule("HEXDIG")),
+        literal("."),
+        one_or_more(choice(
+            rule("unreserved"), rule("sub-delims"), literal(":")
+        )),
+    ),
+    "IP-literal": concat(
+        literal("["),
+        choice(rule("IPv6address"), rule("IPvFuture")),
+        literal("]"),
+    ),
+    "pct-encoded": concat(literal("%"), rule("HEXDIG"), rule("HEXDIG")),
+    "reg-name": zero_or_more(choice(
+        rule("unreserved"), rule("pct-encoded"), rule("sub-delims")
+    )),
+    "host": choice(
+        rule("IP-literal"), rule("IPv4address"), rule("reg-name")
+    ),
+    "scheme": concat(
+        rule("ALPHA"),
+        zero_or_more(choice(
+            rule("ALPHA"), rule("DIGIT"), chars("+"), chars("-"), chars("."),
+        )),
+    ),
+    "port": zero_or_more(rule("DIGIT")),
+    "userinfo": zero_or_more(choice(
+        rule("unreserved"), rule("pct-encoded"), rule("sub-delims"),
+        literal(":"),
+    )),
+    # An IPv4address which is the start of a longer reg-name is taken as
+    # the reg-name, as the grammar would backtrack to
+    "authority": concat(
+        optional(concat(rule("userinfo"), literal("@"))),
+        choice(
+            rule("IP-literal"),
+            concat(
+                rule("IPv4address"),
+                Not(choice(
+                    rule("unreserved"), rule("pct-encoded"),
+                    rule("sub-delims"),
+                )),
+            ),
+            rule("reg-name"),
+        ),
+        optional(concat(literal(":"), rule("port"))),
+    ),
+    "pchar": choice(
+        rule("unreserved"), rule("pct-encoded"), rule("sub-delims"),
+        chars(":@"),
+    ),
+    "segment": zero_or_more(rule("pchar")),
+    "segment-nz": one_or_more(rule("pchar")),
+    "segment-nz-nc": one_or_more(choice(
+        rule("unreserved"), rule("pct-encoded"), rule("sub-delims"),
+        literal("@"),
+    )),
+    "path-abempty": zero_or_more(concat(literal("/"), rule("segment"))),
+    "path-absolute": concat(
+        literal("/"),
+        optional(concat(rule("segment-nz"), rule("path-abempty"))),
+    ),
+    "path-noscheme": concat(rule("segment-nz-nc"), rule("path-abempty")),
+    "path-rootless": concat(rule("segment-nz"), rule("path-abempty")),
+    "query": zero_or_more(choice(rule("pchar"), chars("/?"))),
+    "fragment": zero_or_more(choice(rule("pchar"), chars("/?"))),
+    "hier-part": choice(
+        concat(literal("//"), rule("authority"), rule("path-abempty")),
+        rule("path-absolute"),
+        rule("path-rootless"),
+        literal(""),
+    ),
+    "URI": concat(
+        rule("scheme"), literal(":"), rule("hier-part"),
+        optional(concat(literal("?"), rule("query"))),
+        optional(concat(literal("#"), rule("fragment"))),
+    ),
+    "absolute-URI": concat(
+        rule("scheme"), literal(":"), rule("hier-part"),
+        optional(concat(literal("?"), rule("query"))),
+    ),
+    "relative-part": choice(
+        concat(literal("//"), rule("authority"), rule("path-abempty")),
+        rule("path-absolute"),
+        rule("path-noscheme"),
+        literal(""),
+    ),
+    "relative-ref": concat(
+        rule("relative-part"),
+        optional(concat(literal("?"), rule("query"))),
+        optional(concat(literal("#"), rule("fragment"))),
+    ),
+    "URI-reference": choice(rule("URI"), rule("relative-ref")),
+
+    # rfc6455
+    "base64-char": choice(rule("ALPHA"), rule("DIGIT"), chars("+/")),
+    "base64-data": repeat(rule("base64-char"), 4),
+    "base64-padding": choice(
+        concat(repeat(rule("base64-char"), 2), literal("==")),
+        concat(repeat(rule("base64-char"), 3), literal("=")),
+    ),
+    "base64-value-non-empty": choice(
+        concat(
+            one_or_more(rule("base64-data")),
+            optional(rule("base64-padding")),
+        ),
+        rule("base64-padding"),
+    ),
+    # A base64 16 byte value, whose last base64-char holds 2 bits
+    "Sec-WebSocket-Key": concat(
+        repeat(rule("base64-char"), 21),
+        chars(SecWebSocketKey.final_chars),
+        literal("=="),
+    ),
+    "Sec-WebSocket-Version": rule("dec-octet"),
+}
+
+# The rule of grammar each public matcher is ported from
+rules = {
+    "rfc2234.Alpha": "ALPHA",
+    "rfc2234.Digit": "DIGIT",
+    "rfc2234.HexDig": "HEXDIG",
+    "rfc2616.Octet": "OCTET",
+    "rfc2616.UpAlpha": "UPALPHA",
+    "rfc2616.LoAlpha": "LOALPHA",
+    "rfc2616.CRLF": "CRLF",
+    "rfc2616.LWS": "LWS",
+    "rfc2616.Char": "CHAR",
+    "rfc2616.Ctl": "CTL",
+    "rfc2616.Separators": "separators",
+    "rfc2616.TChar": "tchar",
+    "rfc2616.Token": "token",
+    "rfc2616.QuotedPair": "quoted-pair",
+    "rfc2616.QuotedString": "quoted-string",
+    "rfc2616.Comment": "comment",
+    "rfc2616.FieldName": "field-name",
+    "rfc2616.FieldContent": "field-content",
+    "rfc2616.FieldValue": "field-value",
+    "rfc2616.HTTPVersion": "HTTP-Version",
+    "rfc2616.Method": "Method",
+    "rfc2616.RequestURI": "Request-URI",
+    "rfc2616.RequestLine": "Request-Line",
+    "rfc2616.StatusCode": "Status-Code",
+    "rfc2616.ReasonPhrase": "Reason-Phrase",
+    "rfc2616.StatusLine": "Status-Line",
+    "rfc1034.LetDig": "let-dig",
+    "rfc1034.LetDigHyp": "let-dig-hyp",
+    "rfc1034.LDHStr": "ldh-str",
+    "rfc1034.Label": "label",
+    "rfc1034.SubDomain": "subdomain",
+    "rfc1034.Domain": "domain",
+    "rfc3986.H16": "h16",
+    "rfc3986.DecOctet": "dec-octet",
+    "rfc3986.IPv4Address": "IPv4address",
+    "rfc3986.LS32": "ls32",
+    "rfc3986.IPv6Address": "IPv6address",
+    "rfc3986.Unreserved": "unreserved",
+    "rfc3986.SubDelims": "sub-delims",
+    "rfc3986.IPvFuture": "IPvFuture",
+    "rfc3986.IPLiteral": "IP-literal",
+    "rfc3986.PctEncoded": "pct-encoded",
+    "rfc3986.RegName": "reg-name",
+    "rfc3986.Host": "host",
+    "rfc3986.Scheme": "scheme",
+    "rfc3986.Port": "port",
+    "rfc3986.UserInfo": "userinfo",
+    "rfc3986.Authority": "authority",
+    "rfc3986.PathAbEmpty": "path-abempty",
+    "rfc3986.PathAbsolute": "path-absolute",
+    "rfc3986.PathNoScheme": "path-noscheme",
+    "rfc3986.PathRootless": "path-rootless",
+    "rfc3986.Query": "query",
+    "rfc3986.Fragment": "fragment",
+    "rfc3986.URI": "URI",
+    "rfc3986.AbsoluteURI": "absolute-URI",
+    "rfc3986.RelativeRef": "relative-ref",
+    "rfc3986.URIReference": "URI-reference",
+    "rfc6455.Base64Char": "base64-char",
+    "rfc6455.Base64Data": "base64-data",
+    "rfc6455.Base64Padding": "base64-padding",
+    "rfc6455.Base64ValueNonEmpty": "base64-value-non-empty",
+    "rfc6455.SecWebSocketAccept": "base64-value-non-empty",
+    "rfc6455.SecWebSocketKey": "Sec-WebSocket-Key",
+    "rfc6455.SecWebSocketVersion": "Sec-WebSocket-Version",
+}
+
+
+def peg_matchers(*, optimized: bool = True) -> dict[str, type[PegMatcher]]:
+    """
+    A PegMatcher for each public matcher, keyed by the matcher's name in the
+    registry. Unless optimized is False, the
+    grammar is optimized first.
+    """
+    matched_grammar = optimize(grammar) if optimized else grammar
+    return {
+        name: peg_matcher(matched_grammar, start)
+        for name, start in rules.items()
+    }
@@ -0,0 +1,478 @@
+import random
+from typing import Iterable, Sequence
+
+from peg.expressions import (
+    And,
+    CharSet,
+    Choice,
+    Concat,
+    Expression,
+    Grammar,
+    GrammarError,
+    Limit,
+    Literal,
+    Not,
+    Repeat,
+    RuleRef,
+    check_grammar,
+)
+from peg.vm import compile_grammar, run
+
+
+# Rules with bodies of at most this many nodes, once optimized, are inlined
+# where they are used rather than called
+INLINE_LIMIT = 64
+
+_EMPTY = Literal(b"")
+
+
+class OptimizationError(GrammarError):
+    """
+    An optimized rule matched differently from the original
+    """
+    def __init__(self, rule: str, sample: bytes, end: int, optimized_end: int):
+        super().__init__(
+            f"Rule {rule!r} matched {sample!r} to {end}, but to "
+            f"{optimized_end} once optimized"
+        )
+        self.rule = rule
+        self.sample = sample
+        self.end = end
+        self.optimized_end = optimized_end
+
+
+def size(expression: Expression) -> int:
+    """
+    The number of nodes in expression
+    """
+    if isinstance(expression, Concat):
+        return 1 + sum(size(item) for item in expression.items)
+    if isinstance(expression, Choice):
+        return 1 + sum(size(item) for item in expression.alternatives)
+    if isinstance(expression, (Repeat, Not, And, Limit)):
+        return 1 + size(expression.item)
+    return 1
+
+
+def _references(expression: Expression) -> set[str]:
+    if isinstance(expression, Concat):
+        return set().union(*map(_references, expression.items))
+    if isinstance(expression, Choice):
+        return set().union(*map(_references, expression.alternatives))
+    if isinstance(expression, (Repeat, Not, And, Limit)):
+        return _references(expression.item)
+    if isinstance(expression, RuleRef):
+        return {expression.name}
+    return set()
+
+
+def _recursive_rules(grammar: Grammar) -> set[str]:
+    # The rules which can call themselves, directly or through others
+    calls = {name: _references(body) for name, body in grammar.items()}
+    recursive = set()
+    for name in grammar:
+        pending = list(calls[name])
+        seen = set()
+        while pending:
+            called = pending.pop()
+            if called == name:
+                recursive.add(name)
+                break
+            if called not in seen:
+                seen.add(called)
+                pending.extend(calls[called])
+    return recursive
+
+
+def _first_bytes(expression: Expression) -> frozenset[int] | None:
+    """
+    The bytes expression can start a match with, or None if it may match
+    without consuming anything, or looks past its first byte to decide
+    """
+    if isinstance(expression, CharSet):
+        return frozenset(expression.chars)
+    if isinstance(expression, Literal):
+        if not expression.text:
+            return None
+        first = expression.text[:1]
+        if expression.case_insensitive:
+            return frozenset(first.lower() + first.upper())
+        return frozenset(first)
+    if isinstance(expression, Concat) and expression.items:
+        return _first_bytes(expression.items[0])
+    if isinstance(expression, Choice):
+        firsts: frozenset[int] = frozenset()
+        for alternative in expression.alternatives:
+            alternative_firsts = _first_bytes(alternative)
+            if alternative_firsts is None:
+                return None
+            firsts |= alternative_firsts
+        return firsts
+    if isinstance(expression, Repeat) and expression.minimum > 0:
+        return _first_bytes(expression.item)
+    return None
+
+
+def _always_matches(expression: Expression) -> bool:
+    return (
+        expression == _EMPTY
+    ) or (
+        isinstance(expression, Repeat) and expression.minimum == 0
+    )
+
+
+def _concat(items: Iterable[Expression]) -> Expression:
+    # Flattened, with adjacent case-sensitive literals and single bytes
+    # joined into one literal
+    flat: list[Expression] = []
+    for item in items:
+        parts = item.items if isinstance(item, Concat) else (item,)
+        for part in parts:
+            if part == _EMPTY:
+                continue
+            text = _exact_bytes(part)
+            previous = _exact_bytes(flat[-1]) if flat else None
+            if text is not None and previous is not None:
+                flat[-1] = Literal(previous + text)
+            else:
+                flat.append(part)
+    flat = [_single_byte_set(item) for item in flat]
+    if not flat:
+        return _EMPTY
+    if len(flat) == 1:
+        return flat[0]
+    return Concat(tuple(flat))
+
+
+def _exact_bytes(expression: Expression) -> bytes | None:
+    # The only bytes expression matches, if it matches just one string
+    if isinstance(expression, Literal) and not expression.case_insensitive:
+        return expression.text
+    if isinstance(expression, CharSet) and len(set(expression.chars)) == 1:
+        return expression.chars[:1]
+    return None
+
+
+def _single_byte_set(expression: Expression) -> Expression:
+    # A literal of one byte is a set of one byte, so it can be merged
+    if isinstance(expression, Literal) and len(expression.text) == 1:
+        text = expression.text
+        if expression.case_insensitive:
+            return CharSet(bytes(sorted(set(text.lower() + text.upper()))))
+        return CharSet(text)
+    return expression
+
+
+def _split_first(
+    expression: Expression
+) -> tuple[Expression, int, Expression]:
+    """
+    expression as a first item repeated a fixed number of times, and the
+    rest. A literal's first item is its first byte.
+    """
+    items = expression.items if isinstance(expression, Concat) else (
+        expression,
+    )
+    first, rest = items[0], _concat(items[1:])
+    if isinstance(first, Literal) and not first.case_insensitive and (
+        len(first.text) > 1
+    ):
+        return (
+            CharSet(first.text[:1]), 1,
+            _concat((Literal(first.text[1:]), rest)),
+        )
+    if (
+        isinstance(first, Repeat)
+    ) and (
+        first.minimum == first.maximum and first.minimum > 0
+    ):
+        return first.item, first.minimum, rest
+    return first, 1, rest
+
+
+def _repeated(item: Expression, count: int) -> Expression:
+    if count == 1:
+        return item
+    return Repeat(item, count, count)
+
+
+def _left_factor(
+    alternatives: Sequence[Expression]
+) -> list[Expression]:
+    """
+    Adjacent alternatives which start with the same item share it:
+
+        p a / p b  ->  p ( a / b )
+
+    As a PEG expression matches at most one way from a position, matching p
+    again for b would only find the same match.
+    """
+    factored: list[Expression] = []
+    index = 0
+    while index < len(alternatives):
+        first, count, __ = _split_first(alternatives[index])
+        group_end = index + 1
+        while group_end < len(alternatives):
+            other_first, other_count, __ = _split_first(
+                alternatives[group_end]
+            )
+            if other_first != first:
+                break
+            count = min(count, other_count)
+            group_end += 1
+        if group_end - index == 1:
+            factored.append(alternatives[index])
+            index += 1
+            continue
+
+        rests = []
+        for alternative in alternatives[index:group_end]:
+            __, alternative_count, rest = _split_first(alternative)
+            rests.append(_concat((
+                _repeated(first, alternative_count - count)
+                if alternative_count > count else _EMPTY,
+                rest,
+            )))
+        factored.append(
+            _concat((_repeated(first, count), _choice(rests)))
+        )
+        index = group_end
+    return factored
+
+
+def _merge_sets(alternatives: Sequence[Expression]) -> list[Expression]:
+    """
+    Sets join the last set before them, if the alternatives in between
+    can't start with any of their bytes: those would fail wherever the set
+    matches, so trying the set first changes nothing.
+    """
+    merged: list[Expression] = []
+    for alternative in alternatives:
+        if isinstance(alternative, CharSet):
+            members = set(alternative.chars)
+            for index in range(len(merged) - 1, -1, -1):
+                earlier = merged[index]
+                if isinstance(earlier, CharSet):
+                    merged[index] = CharSet(
+                        bytes(sorted(members | set(earlier.chars)))
+                    )
+                    break
+                earlier_firsts = _first_bytes(earlier)
+                if earlier_firsts is None or earlier_firsts & members:
+                    merged.append(alternative)
+                    break
+            else:
+                merged.append(alternative)
+        else:
+            merged.append(alternative)
+    return merged
+
+
+def _choice(alternatives: Iterable[Expression]) -> Expression:
+    flat: list[Expression] = []
+    for alternative in alternatives:
+        parts = alternative.alternatives if isinstance(
+            alternative, Choice
+        ) else (alternative,)
+        for part in parts:
+            flat.append(_single_byte_set(part))
+            if _always_matches(part):
+                # The alternatives after it are never tried
+                break
+        else:
+            continue
+        break
+
+    result = _left_factor(_merge_sets(flat))
+    if len(result) == 1:
+        return result[0]
+    return Choice(tuple(result))
+
+
+def _runs_of_sets(alternatives: Sequence[Expression]) -> list[Expression]:
+    """
+    In *( set / x ), a pass of the loop may take a run of the set:
+    *( 1*set / x ) matches the same, and the run is a single span. Only if
+    no alternative before the set can start with a byte in it, as that
+    would have been tried first at each byte of the run.
+    """
+    runs: list[Expression] = []
+    earlier_firsts: set[int] | None = set()
+    for alternative in alternatives:
+        if (
+            isinstance(alternative, CharSet) and earlier_firsts is not None
+        ) and not (
+            earlier_firsts & set(alternative.chars)
+        ):
+            runs.append(Repeat(alternative, 1, None))
+        else:
+            runs.append(alternative)
+        alternative_firsts = _first_bytes(alternative)
+        if alternative_firsts is None or earlier_firsts is None:
+            earlier_firsts = None
+        else:
+            earlier_firsts |= alternative_firsts
+    return runs
+
+
+def _repeat(item: Expression, minimum: int, maximum: int | None) -> Expression:
+    if maximum == 0:
+        return _EMPTY
+    if minimum == maximum == 1:
+        return item
+    if maximum is None and minimum <= 1 and isinstance(item, Choice):
+        # Only with no more than one pass required, as the passes differ
+        item = Choice(tuple(_runs_of_sets(item.alternatives)))
+    return Repeat(item, minimum, maximum)
+
+
+class _Optimizer:
+    def __init__(self, grammar: Grammar, inline_limit: int):
+        self.grammar = grammar
+        self.inline_limit = inline_limit
+        self.recursive = _recursive_rules(grammar)
+        self.optimized: dict[str, Expression] = {}
+
+    def rule(self, name: str) -> Expression:
+        body = self.optimized.get(name)
+        if body is None:
+            # Rules in self.recursive aren't inlined, so this never recurses
+            # into a rule being optimized
+            body = self.optimized[name] = self.expression(self.grammar[name])
+        return body
+
+    def expression(self, expression: Expression) -> Expression:
+        if isinstance(expression, CharSet):
+            return CharSet(bytes(sorted(set(expression.chars))))
+        if isinstance(expression, Literal):
+            text = expression.text
+            if expression.case_insensitive and text.lower() == text.upper():
+                return Literal(text)
+            return _single_byte_set(expression)
+        if isinstance(expression, Concat):
+            return _concat(map(self.expression, expression.items))
+        if isinstance(expression, Choice):
+            return _choice(map(self.expression, expression.alternatives))
+        if isinstance(expression, Repeat):
+            return _repeat(
+                self.expression(expression.item),
+                expression.minimum,
+                expression.maximum,
+            )
+        if isinstance(expression, Not):
+            return Not(self.expression(expression.item))
+        if isinstance(expression, And):
+            return And(self.expression(expression.item))
+        if isinstance(expression, Limit):
+            return Limit(self.expression(expression.item), expression.length)
+        if expression.name in self.recursive:
+            return expression
+        body = self.rule(expression.name)
+        if size(body) <= self.inline_limit:
+            return body
+        return expression
+
+
+def optimize(
+    grammar: Grammar,
+    *,
+    inline_limit: int = INLINE_LIMIT,
+    verify: bool = False,
+    samples: int = 2000,
+    seed: int = 0,
+) -> Grammar:
+    """
+    An equivalent grammar, with the same rules, which matches faster:
+
+    - small rules which don't recurse are inlined, saving calls
+    - alternatives of single bytes are merged into one set, and repetitions
+      of sets become runs, which the VM matches as spans
+    - alternatives sharing a start are left-factored
+    - alternatives which can never be reached are dropped
+
+    Rules match exactly as before, including where a match ends. With
+    verify, each rule is checked against the original on generated input,
+    raising OptimizationError if any differs.
+    """
+    check_grammar(grammar, next(iter(grammar)))
+    optimizer = _Optimizer(grammar, inline_limit)
+    optimized = {name: optimizer.rule(name) for name in grammar}
+    if verify:
+        verify_optimization(grammar, optimized, samples=samples, seed=seed)
+    return optimized
+
+
+def _tokens(grammar: Grammar) -> list[bytes]:
+    # Pieces to build input from: the literals, the ends and middle of each
+    # set, and a byte no set holds
+    tokens = set()
+    used = set()
+    pending: list[Expression] = list(grammar.values())
+    while pending:
+        expression = pending.pop()
+        if isinstance(expression, CharSet):
+            members = sorted(set(expression.chars))
+            used.update(members)
+            for member in (members[0], members[len(members) // 2],
+                           members[-1]):
+                tokens.add(bytes([member]))
+        elif isinstance(expression, Literal):
+            used.update(expression.text)
+            tokens.add(expression.text)
+            if expression.case_insensitive:
+                tokens.add(expression.text.swapcase())
+        elif isinstance(expression, Concat):
+            pending.extend(expression.items)
+        elif isinstance(expression, Choice):
+            pending.extend(expression.alternatives)
+        elif isinstance(expression, (Repeat, Not, And, Limit)):
+            pending.append(expression.item)
+    unused = next((i for i in range(256) if i not in used), None)
+    if unused is not None:
+        tokens.add(bytes([unused]))
+    tokens.discard(b"")
+    return sorted(tokens)
+
+
+def generate_inputs(
+    grammar: Grammar, count: int, *, seed: int = 0, max_tokens: int = 16
+) -> list[bytes]:
+    """
+    count inputs made of the pieces of grammar, so most of them get some
+    way into its rules before failing
+    """
+    generator = random.Random(seed)
+    tokens = _tokens(grammar)
+    return [
+        b"".join(
+            generator.choice(tokens)
+            for __ in range(generator.randint(0, max_tokens))
+        )
+        for __ in range(count)
+    ]
+
+
+def verify_optimization(
+    grammar: Grammar,
+    optimized: Grammar,
+    *,
+    samples: int = 2000,
+    seed: int = 0,
+    inputs: Sequence[bytes] = (),
+) -> None:
+    """
+    Raise OptimizationError if any rule of optimized matches one of inputs,
+    or of samples inputs generated from grammar, to a different end than
+    the same rule of grammar does
+    """
+    all_inputs = [
+        *inputs, *generate_inputs(grammar, samples, seed=seed)
+    ]
+    for name in grammar:
+        program = compile_grammar(grammar, name)
+        optimized_program = compile_grammar(optimized, name)
+        for sample in all_inputs:
+            end = run(program, sample).end
+            optimized_end = run(optimized_program, sample).end
+            if end != optimized_end:
+                raise OptimizationError(name, sample, end, optimized_end)
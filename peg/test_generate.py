@@ -0,0 +1,103 @@
+from unittest import TestCase
+
+from peg.expressions import (
+    Grammar,
+    GrammarError,
+    Not,
+    chars,
+    concat,
+    literal,
+    zero_or_more,
+)
+from peg.generate import Generator
+from peg.grammars import grammar, rules
+from registry import public_matchers
+
+
+class TestGenerator(TestCase):
+    def test_samples_match(self) -> None:
+        # Valid samples match the matcher classes, and near misses don't
+        matchers = public_matchers()
+        for name, start in rules.items():
+            generator = Generator(grammar, start, seed=1)
+            matcher = matchers[name]
+            for sample in generator.samples(50):
+                with self.subTest(matcher=name, sample=sample[:32]):
+                    self.assertTrue(matcher.match_full(sample))
+            for sample in generator.near_misses(50):
+                with self.subTest(matcher=name, sample=sample[:32]):
+                    self.assertFalse(matcher.match_full(sample))
+
+    def test_deterministic(self) -> None:
+        def samples(seed: int) -> list[bytes]:
+            generator = Generator(grammar, "host", seed=seed)
+            return generator.samples(20) + generator.near_misses(20)
+
+        self.assertEqual(samples(3), samples(3))
+        self.assertNotEqual(samples(3), samples(4))
+        # The same on any machine and version of Python
+        self.assertEqual(
+            Generator(grammar, "IPv4address", seed=0).samples(2),
+            [b"79.55.3.0", b"252.9.205.69"],
+        )
+
+    def test_ipv6_forms(self) -> None:
+        # All nine forms of RFC 3986, told apart by whether they have "::"
+        # and the number of pieces after it, an IPv4 address counting as two
+        forms: set[int | None] = set()
+        for sample in Generator(grammar, "IPv6address").samples(500):
+            if b"::" not in sample:
+                forms.add(None)
+                continue
+            after = sample.split(b"::")[1]
+            pieces = after.split(b":") if after else []
+            forms.add(len(pieces) + (b"." in after))
+        self.assertEqual(forms, {None, 0, 1, 2, 3, 4, 5, 6, 7})
+
+    def test_boundaries(self) -> None:
+        dec_octets = set(Generator(grammar, "dec-octet").samples(500))
+        self.assertLessEqual({b"0", b"9", b"10", b"199", b"250", b"255"},
+                             dec_octets)
+
+        label_lengths = {
+            len(sample) for sample in Generator(grammar, "label").samples(200)
+        }
+        self.assertEqual(max(label_lengths), 63)
+        self.assertIn(1, label_lengths)
+
+        endings = {
+            sample[-2:].count(b"=")
+            for sample in Generator(
+                grammar, "base64-value-non-empty"
+            ).samples(100)
+        }
+        self.assertEqual(endings, {0, 1, 2})
+
+    def test_lengths(self) -> None:
+        def mean_length(mean_repeats: float) -> float:
+            generator = Generator(
+                grammar, "reg-name", mean_repeats=mean_repeats, boundary=0
+            )
+            samples = generator.samples(300)
+            return sum(map(len, samples)) / len(samples)
+
+        self.assertLess(mean_length(1), 2)
+        self.assertGreater(mean_length(8), 8)
+        generator = Generator(grammar, "port", max_repeats=3)
+        self.assertLessEqual(max(map(len, generator.samples(100))), 3)
+
+    def test_lookahead(self) -> None:
+        # Samples a lookahead rules out are thrown away
+        not_a: Grammar = {
+            "start": concat(Not(literal("a")), zero_or_more(chars("ab")))
+        }
+        for sample in Generator(not_a, "start").samples(100):
+            self.assertFalse(sample.startswith(b"a"))
+
+    def test_no_samples(self) -> None:
+        never: Grammar = {"start": concat(Not(literal("a")), literal("a"))}
+        with self.assertRaises(GrammarError):
+            Generator(never, "start").valid()
+        anything: Grammar = {"start": zero_or_more(chars(bytes(range(256))))}
+        with self.assertRaises(GrammarError):
+            Generator(anything, "start").near_miss()
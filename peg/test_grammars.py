@@ -0,0 +1,72 @@
+import random
+from unittest import TestCase
+
+from benchmarks.corpora import CORPORA
+from peg.grammars import peg_matchers
+from peg.vm import PegMatcher
+from registry import public_matchers
+
+
+class TestGrammars(TestCase):
+    pegs: dict[str, type[PegMatcher]]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pegs = peg_matchers()
+
+    def assert_agree(self, name: str, samples: list[bytes]) -> None:
+        # The same match, or no match, from start as the original
+        matcher = public_matchers()[name]
+        peg = self.pegs[name]
+        for sample in samples:
+            with self.subTest(name=name, sample=sample[:32]):
+                match_result = matcher.match_start(sample)
+                peg_result = peg.match_start(sample)
+                if match_result is None:
+                    self.assertIsNone(peg_result)
+                else:
+                    assert peg_result is not None
+                    self.assertEqual(peg_result.end, match_result.end)
+
+    def test_every_matcher_has_a_rule(self) -> None:
+        self.assertEqual(set(self.pegs), set(public_matchers()))
+
+    def test_corpora(self) -> None:
+        for name in self.pegs:
+            corpus = CORPORA[name]
+            self.assert_agree(
+                name, [*corpus.valid, *corpus.near_miss, *corpus.adversarial]
+            )
+
+    def test_generated(self) -> None:
+        # Runs of the pieces of addresses, most of them not quite valid
+        generator = random.Random(0)
+        pieces = [
+            b"1", b"ab", b"fff", b"ffff", b"12345", b":", b"::", b".",
+            b"1.2.3.4", b"255.0.19.9", b"256", b"v1.", b"[", b"]", b"%4",
+            b"%41", b"-", b"a", b"\r\n", b" ", b"/", b"?", b"#", b"@",
+            b"//", b"(", b")", b'"', b"\\", b"\t", b"HTTP/1.1",
+        ]
+        samples = [
+            b"".join(
+                generator.choice(pieces)
+                for __ in range(generator.randint(1, 10))
+            )
+            for __ in range(2000)
+        ]
+        for name in [
+            "rfc3986.IPv6Address",
+            "rfc3986.Host",
+            "rfc3986.IPLiteral",
+            "rfc1034.Domain",
+            "rfc2616.LWS",
+            "rfc2616.QuotedString",
+            "rfc2616.Comment",
+            "rfc2616.FieldValue",
+            "rfc2616.RequestLine",
+            "rfc2616.StatusLine",
+            "rfc3986.Authority",
+            "rfc3986.URIReference",
+            "rfc3986.AbsoluteURI",
+        ]:
+            self.assert_agree(name, samples)
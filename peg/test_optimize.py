@@ -0,0 +1,160 @@
+from unittest import TestCase
+
+from peg.expressions import (
+    CharSet,
+    Choice,
+    Concat,
+    Expression,
+    Grammar,
+    Literal,
+    Repeat,
+    RuleRef,
+    chars,
+    choice,
+    concat,
+    literal,
+    one_or_more,
+    optional,
+    repeat,
+    rule,
+    zero_or_more,
+)
+from peg.grammars import grammar as rfc_grammar
+from peg.optimize import (
+    OptimizationError,
+    generate_inputs,
+    optimize,
+    verify_optimization,
+)
+from peg.vm import compile_grammar, run
+
+
+class TestOptimize(TestCase):
+    def assert_optimized(
+        self, expression: Expression, expected: Expression
+    ) -> None:
+        original: Grammar = {"start": expression}
+        optimized = optimize(original, verify=True, samples=200)
+        self.assertEqual(optimized["start"], expected)
+
+    def test_merges_sets(self) -> None:
+        self.assert_optimized(
+            choice(chars("ab"), literal("c"), literal("d", True)),
+            CharSet(b"Dabcd"),
+        )
+
+    def test_merges_sets_past_disjoint_alternatives(self) -> None:
+        # The sets can move past "%" "4", which never starts with a or b
+        self.assert_optimized(
+            choice(chars("a"), literal("%4"), chars("b")),
+            Choice((CharSet(b"ab"), Literal(b"%4"))),
+        )
+        # but not past "b" "c", which a lone "b" would have come after
+        self.assert_optimized(
+            choice(chars("a"), literal("bc"), chars("bx")),
+            Choice((CharSet(b"a"), Literal(b"bc"), CharSet(b"bx"))),
+        )
+
+    def test_left_factors(self) -> None:
+        self.assert_optimized(
+            choice(literal("25"), literal("2x"), literal("1")),
+            Choice((
+                Concat((CharSet(b"2"), CharSet(b"5x"))),
+                CharSet(b"1"),
+            )),
+        )
+        self.assert_optimized(
+            choice(
+                concat(repeat(chars("a"), 2), literal("==")),
+                concat(repeat(chars("a"), 3), literal("=")),
+            ),
+            Concat((
+                Repeat(CharSet(b"a"), 2, 2),
+                Choice((Literal(b"=="), Literal(b"a="))),
+            )),
+        )
+
+    def test_drops_unreachable_alternatives(self) -> None:
+        self.assert_optimized(
+            choice(literal("ab"), zero_or_more(chars("a")), literal("b")),
+            Choice((Literal(b"ab"), Repeat(CharSet(b"a"), 0, None))),
+        )
+
+    def test_runs_of_sets(self) -> None:
+        self.assert_optimized(
+            zero_or_more(choice(chars("a"), literal("%4"))),
+            Repeat(
+                Choice((Repeat(CharSet(b"a"), 1, None), Literal(b"%4"))),
+                0, None,
+            ),
+        )
+        # "b" "!" is tried before [ab] at each byte, so a run of [ab] would
+        # take the "b" of "b!"
+        self.assert_optimized(
+            zero_or_more(choice(literal("b!"), chars("ab"))),
+            Repeat(Choice((Literal(b"b!"), CharSet(b"ab"))), 0, None),
+        )
+        original: Grammar = {
+            "start": zero_or_more(choice(literal("b!"), chars("ab")))
+        }
+        self.assertEqual(
+            run(compile_grammar(optimize(original), "start"), b"ab!").end, 3
+        )
+        # Each pass of the loop counts, so the set is left as it is
+        self.assert_optimized(
+            Repeat(choice(chars("a"), literal("%4")), 2, None),
+            Repeat(Choice((CharSet(b"a"), Literal(b"%4"))), 2, None),
+        )
+
+    def test_inlines(self) -> None:
+        original: Grammar = {
+            "start": one_or_more(rule("letter")),
+            "letter": choice(chars("a"), chars("b")),
+            "nested": concat(
+                literal("("), optional(rule("nested")), literal(")")
+            ),
+        }
+        optimized = optimize(original)
+        self.assertEqual(
+            optimized["start"], Repeat(CharSet(b"ab"), 1, None)
+        )
+        # Recursive rules are left as calls
+        self.assertEqual(
+            optimized["nested"],
+            Concat((
+                CharSet(b"("), Repeat(RuleRef("nested"), 0, 1), CharSet(b")")
+            )),
+        )
+        self.assertEqual(
+            optimize(original, inline_limit=0)["start"],
+            Repeat(RuleRef("letter"), 1, None),
+        )
+
+    def test_rfc_grammar(self) -> None:
+        optimized = optimize(rfc_grammar)
+        self.assertEqual(set(optimized), set(rfc_grammar))
+        self.assertIsInstance(optimized["unreserved"], CharSet)
+        self.assertIsInstance(optimized["IPvFuture"], Concat)
+        verify_optimization(rfc_grammar, optimized, samples=300)
+
+
+class TestVerifyOptimization(TestCase):
+    def test_mismatch(self) -> None:
+        original: Grammar = {"start": choice(literal("a"), literal("ab"))}
+        wrong: Grammar = {"start": choice(literal("ab"), literal("a"))}
+        with self.assertRaises(OptimizationError) as raised:
+            verify_optimization(original, wrong, samples=0, inputs=[b"ab"])
+        self.assertEqual(
+            (
+                raised.exception.rule, raised.exception.sample,
+                raised.exception.end, raised.exception.optimized_end,
+            ),
+            ("start", b"ab", 1, 2),
+        )
+        with self.assertRaises(OptimizationError):
+            verify_optimization(original, wrong, samples=200)
+
+    def test_generate_inputs(self) -> None:
+        inputs = generate_inputs(rfc_grammar, 100, seed=1)
+        self.assertEqual(len(inputs), 100)
+        self.assertEqual(inputs, generate_inputs(rfc_grammar, 100, seed=1))
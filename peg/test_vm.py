@@ -0,0 +1,183 @@
+from unittest import TestCase
+
+from generic import MatchFailure
+from peg.expressions import (
+    And,
+    Grammar,
+    GrammarError,
+    Not,
+    chars,
+    choice,
+    concat,
+    limit,
+    literal,
+    one_or_more,
+    optional,
+    repeat,
+    rule,
+    zero_or_more,
+)
+from peg.vm import compile_grammar, disassemble, peg_matcher, run
+
+
+class TestRun(TestCase):
+    def assert_ends(
+        self, grammar: Grammar, cases: list[tuple[bytes, int]]
+    ) -> None:
+        program = compile_grammar(grammar, "start")
+        for val, expected_end in cases:
+            with self.subTest(val=val):
+                self.assertEqual(run(program, val)[0], expected_end)
+
+    def test_ordered_choice(self) -> None:
+        # The first alternative to match is taken, even if it is shorter
+        self.assert_ends(
+            {"start": choice(literal("a"), literal("ab"))},
+            [(b"ab", 1), (b"b", -1)],
+        )
+        self.assert_ends(
+            {"start": concat(choice(literal("ab"), literal("a")), chars("c"))},
+            [(b"abc", 3), (b"ac", 2), (b"abd", -1)],
+        )
+
+    def test_repeat(self) -> None:
+        self.assert_ends(
+            {"start": repeat(literal("ab"), 1, 3)},
+            [(b"", -1), (b"ab", 2), (b"abab", 4), (b"ab" * 4, 6), (b"aba", 2)],
+        )
+        # A single set is run as a span
+        self.assert_ends(
+            {"start": repeat(chars("ab"), 2, 6)},
+            [(b"a", -1), (b"ab", 2), (b"ab" * 4, 6), (b"abc", 2)],
+        )
+        self.assert_ends(
+            {"start": repeat(chars("ab"), 2)},
+            [(b"a", -1), (b"ab", 2), (b"abab", 2)],
+        )
+
+        # Repetition never gives back what it matched
+        self.assert_ends(
+            {"start": concat(zero_or_more(chars("a")), literal("a"))},
+            [(b"aaa", -1)],
+        )
+        self.assert_ends(
+            {"start": concat(zero_or_more(literal("ab")), literal("a"))},
+            [(b"ababa", 5), (b"abab", -1), (b"abax", 3)],
+        )
+
+    def test_predicates(self) -> None:
+        self.assert_ends(
+            {"start": concat(Not(literal("x")), chars("abx"))},
+            [(b"a", 1), (b"x", -1)],
+        )
+        self.assert_ends(
+            {"start": concat(And(literal("ab")), chars("a"))},
+            [(b"ab", 1), (b"ac", -1)],
+        )
+
+    def test_case_insensitive(self) -> None:
+        self.assert_ends(
+            {"start": literal("Host:", case_insensitive=True)},
+            [(b"host:", 5), (b"HOST:", 5), (b"hos", -1), (b"host;", -1)],
+        )
+
+    def test_limit(self) -> None:
+        self.assert_ends(
+            {
+                "start": concat(
+                    limit(zero_or_more(chars("a")), 3), optional(chars("a"))
+                )
+            },
+            [(b"aa", 2), (b"aaaaa", 4)],
+        )
+        # Backtracking out of a limit restores the end of the input
+        self.assert_ends(
+            {
+                "start": choice(
+                    concat(limit(chars("a"), 1), chars("x")), literal("aa")
+                )
+            },
+            [(b"aa", 2)],
+        )
+
+    def test_start(self) -> None:
+        program = compile_grammar({"start": one_or_more(chars("a"))}, "start")
+        self.assertEqual(run(program, b"bbaab", 2)[:2], (4, -1))
+
+    def test_deep_nesting(self) -> None:
+        # Nesting is limited by memory, not the recursion limit
+        grammar: Grammar = {
+            "start": choice(
+                concat(literal("("), rule("start"), literal(")")),
+                literal("x"),
+            ),
+        }
+        depth = 20000
+        val = b"(" * depth + b"x" + b")" * depth
+        self.assert_ends(grammar, [(val, len(val)), (val[:-1], -1)])
+
+    def test_furthest_failure(self) -> None:
+        program = compile_grammar(
+            {"start": concat(literal("ab"), choice(chars("c"), chars("d")))},
+            "start",
+        )
+        self.assertEqual(run(program, b"abx")[:2], (-1, 2))
+        self.assertEqual(run(program, b"abc")[:2], (3, -1))
+
+
+class TestCompile(TestCase):
+    def test_errors(self) -> None:
+        grammars: list[Grammar] = [
+            {"start": rule("missing")},
+            {"start": zero_or_more(optional(chars("a")))},
+            {"start": concat(rule("other"), chars("a"))},
+            {"start": repeat(chars("a"), 2, 1)},
+            {"start": choice()},
+            {"other": chars("a")},
+        ]
+        for grammar in grammars:
+            with self.subTest(grammar=grammar):
+                grammar.setdefault("other", optional(rule("start")))
+                with self.assertRaises(GrammarError):
+                    compile_grammar(grammar, "start")
+
+    def test_shared_rules(self) -> None:
+        # Each rule is compiled once, however often it is called
+        program = compile_grammar(
+            {
+                "start": concat(rule("a"), rule("a"), rule("b")),
+                "a": chars("ab"),
+                "b": rule("a"),
+                "unused": chars("x"),
+            },
+            "start",
+        )
+        self.assertEqual(sorted(program.rules), ["a", "b", "start"])
+        self.assertEqual(len(program.sets), 1)
+        listing = disassemble(program)
+        self.assertEqual(listing.count("SET"), 1)
+        self.assertIn("CALL a", listing)
+
+
+class TestPegMatcher(TestCase):
+    def test_match(self) -> None:
+        matcher = peg_matcher(
+            {"start": concat(one_or_more(chars("ab")), literal("c"))}, "start"
+        )
+        self.assertTrue(matcher.match_full(b"abac"))
+        self.assertTrue(matcher.match_full("abac"))
+        self.assertFalse(matcher.match_full(b"abacc"))
+        match_result = matcher.match_from(b"xabc", 1)
+        assert match_result is not None
+        self.assertEqual((match_result.start, match_result.end), (1, 4))
+        self.assertIsNone(matcher.match_from(b"xabc", 0))
+
+    def test_match_failure(self) -> None:
+        matcher = peg_matcher(
+            {"start": concat(one_or_more(chars("ab")), literal("c"))}, "start"
+        )
+        failure = matcher.match_failure(b"abx")
+        assert isinstance(failure, MatchFailure)
+        self.assertEqual(failure.position, 2)
+        self.assertEqual(failure.expected, {"PegMatcher<start>"})
+        self.assertIsNone(matcher.match_failure(b"abc"))
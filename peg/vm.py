@@ -0,0 +1,447 @@
+import re
+import sys
+from typing import NamedTuple
+
+from generic import (
+    DefaultMatchAll,
+    MatchResult,
+    _StepBudgetExhausted,
+    _budget_gate,
+    _failure_gate,
+    _record_failure,
+    _thread_state,
+)
+from peg.expressions import (
+    And,
+    CharSet,
+    Choice,
+    Concat,
+    Expression,
+    Grammar,
+    Limit,
+    Literal,
+    Not,
+    Repeat,
+    check_grammar,
+)
+
+
+# Each instruction is INSTRUCTION_SIZE entries of Program.code: the opcode,
+# then its operand (0 if unused).
+INSTRUCTION_SIZE = 2
+
+(
+    # The byte a
+    CHAR,
+    # A byte in sets[a]
+    SET,
+    # spans[a], a run of bytes from one set, as a regular expression
+    SPAN,
+    # literals[a]
+    LITERAL,
+    # literals[a], which is lower case, ignoring the case of ASCII letters
+    LITERAL_CI,
+    # Push a backtrack entry to resume at a
+    CHOICE,
+    # Pop the backtrack entry, and jump to a
+    COMMIT,
+    # Move the backtrack entry on to the current position, and jump to a
+    PARTIAL_COMMIT,
+    # Pop the backtrack entry, go back to its position, and jump to a
+    BACK_COMMIT,
+    # Pop the backtrack entry, and fail
+    FAIL_TWICE,
+    FAIL,
+    # Jump to a
+    JUMP,
+    # Push the return address, and jump to a
+    CALL,
+    RETURN,
+    # End the input at most a bytes from the current position
+    LIMIT,
+    # Restore the end of the input the last LIMIT changed
+    UNLIMIT,
+    END,
+) = range(17)
+
+OPCODE_NAMES = (
+    "CHAR", "SET", "SPAN", "LITERAL", "LITERAL_CI", "CHOICE", "COMMIT",
+    "PARTIAL_COMMIT", "BACK_COMMIT", "FAIL_TWICE", "FAIL", "JUMP", "CALL",
+    "RETURN", "LIMIT", "UNLIMIT", "END",
+)
+
+# The end run gives when max_steps ran out
+STEPS_EXCEEDED = -2
+
+# The positions of stack entries which aren't backtrack entries
+_RETURN_ADDRESS = -1
+_SAVED_END = -2
+
+
+class Program(NamedTuple):
+    """
+    A grammar compiled for run: code holds the instructions, which refer to
+    the other fields by index. rules holds the address of each rule's code.
+
+    code is a flat tuple of ints rather than an array('l'), which would box
+    each entry as it is read.
+    """
+    code: tuple[int, ...]
+    sets: tuple[bytes, ...]
+    spans: tuple[re.Pattern[bytes], ...]
+    literals: tuple[bytes, ...]
+    rules: dict[str, int]
+    start: str
+
+
+class _Compiler:
+    def __init__(self, grammar: Grammar):
+        self.grammar = grammar
+        self.code: list[int] = []
+        self.sets: dict[bytes, int] = {}
+        self.spans: dict[bytes, int] = {}
+        self.literals: dict[bytes, int] = {}
+        self.rules: dict[str, int] = {}
+        # Rules called but not compiled yet, and the CALLs to point at them
+        self.pending: list[str] = []
+        self.calls: list[tuple[int, str]] = []
+
+    def emit(self, opcode: int, operand: int = 0) -> int:
+        address = len(self.code)
+        self.code += (opcode, operand)
+        return address
+
+    def here(self) -> int:
+        return len(self.code)
+
+    def patch(self, address: int, operand: int) -> None:
+        self.code[address + 1] = operand
+
+    def index(self, table: dict[bytes, int], key: bytes) -> int:
+        return table.setdefault(key, len(table))
+
+    def compile_rule(self, name: str) -> None:
+        self.rules[name] = self.here()
+        self.compile(self.grammar[name])
+        self.emit(RETURN)
+
+    def compile(self, expression: Expression) -> None:
+        if isinstance(expression, CharSet):
+            self.compile_char_set(expression.chars)
+        elif isinstance(expression, Literal):
+            self.compile_literal(expression)
+        elif isinstance(expression, Concat):
+            for item in expression.items:
+                self.compile(item)
+        elif isinstance(expression, Choice):
+            self.compile_choice(expression.alternatives)
+        elif isinstance(expression, Repeat):
+            self.compile_repeat(expression)
+        elif isinstance(expression, Not):
+            choice = self.emit(CHOICE)
+            self.compile(expression.item)
+            self.emit(FAIL_TWICE)
+            self.patch(choice, self.here())
+        elif isinstance(expression, And):
+            choice = self.emit(CHOICE)
+            self.compile(expression.item)
+            back_commit = self.emit(BACK_COMMIT)
+            self.patch(choice, self.here())
+            self.emit(FAIL)
+            self.patch(back_commit, self.here())
+        elif isinstance(expression, Limit):
+            self.emit(LIMIT, expression.length)
+            self.compile(expression.item)
+            self.emit(UNLIMIT)
+        else:
+            if expression.name not in self.rules:
+                self.pending.append(expression.name)
+            self.calls.append((self.emit(CALL), expression.name))
+
+    def compile_char_set(self, chars: bytes) -> None:
+        members = sorted(set(chars))
+        if not members:
+            self.emit(FAIL)
+        elif len(members) == 1:
+            self.emit(CHAR, members[0])
+        else:
+            table = bytes(int(i in members) for i in range(256))
+            self.emit(SET, self.index(self.sets, table))
+
+    def compile_literal(self, expression: Literal) -> None:
+        text = expression.text
+        if expression.case_insensitive and text.lower() != text.upper():
+            if len(text) == 1:
+                self.compile_char_set(text.lower() + text.upper())
+            else:
+                self.emit(LITERAL_CI, self.index(self.literals, text.lower()))
+        elif len(text) == 1:
+            self.emit(CHAR, text[0])
+        elif text:
+            self.emit(LITERAL, self.index(self.literals, text))
+
+    def compile_choice(self, alternatives: tuple[Expression, ...]) -> None:
+        commits = []
+        for alternative in alternatives[:-1]:
+            choice = self.emit(CHOICE)
+            self.compile(alternative)
+            commits.append(self.emit(COMMIT))
+            self.patch(choice, self.here())
+        self.compile(alternatives[-1])
+        for commit in commits:
+            self.patch(commit, self.here())
+
+    def compile_repeat(self, expression: Repeat) -> None:
+        item, minimum, maximum = expression
+        if isinstance(item, CharSet) and item.chars:
+            # A run of one set is a single regular expression match
+            pattern = b"[" + b"".join(
+                re.escape(bytes([i])) for i in sorted(set(item.chars))
+            ) + b"]{%d,%s}" % (
+                minimum, b"" if maximum is None else b"%d" % maximum
+            )
+            self.emit(SPAN, self.index(self.spans, pattern))
+            return
+
+        for __ in range(minimum):
+            self.compile(item)
+        if maximum is None:
+            choice = self.emit(CHOICE)
+            body = self.here()
+            self.compile(item)
+            self.emit(PARTIAL_COMMIT, body)
+            self.patch(choice, self.here())
+        elif maximum > minimum:
+            # Unrolled, with one backtrack entry moved on after each item
+            choice = self.emit(CHOICE)
+            for __ in range(maximum - minimum - 1):
+                self.compile(item)
+                partial_commit = self.emit(PARTIAL_COMMIT)
+                self.patch(partial_commit, self.here())
+            self.compile(item)
+            commit = self.emit(COMMIT)
+            self.patch(choice, self.here())
+            self.patch(commit, self.here())
+
+
+def compile_grammar(grammar: Grammar, start: str) -> Program:
+    """
+    Compile the rules of grammar which start uses, raising GrammarError if
+    the grammar can't be matched
+    """
+    check_grammar(grammar, start)
+    compiler = _Compiler(grammar)
+    compiler.calls.append((compiler.emit(CALL), start))
+    compiler.emit(END)
+    compiler.pending.append(start)
+    while compiler.pending:
+        name = compiler.pending.pop()
+        if name not in compiler.rules:
+            compiler.compile_rule(name)
+    for address, name in compiler.calls:
+        compiler.patch(address, compiler.rules[name])
+
+    return Program(
+        code=tuple(compiler.code),
+        sets=tuple(compiler.sets),
+        spans=tuple(re.compile(pattern) for pattern in compiler.spans),
+        literals=tuple(compiler.literals),
+        rules=compiler.rules,
+        start=start,
+    )
+
+
+class RunResult(NamedTuple):
+    # The end of the match, -1 if there was none, or STEPS_EXCEEDED
+    end: int
+    # The furthest position at which a test failed, or -1 if none did
+    furthest: int
+    # The CHOICE instructions run, and the bytes SPANs matched
+    steps: int
+
+
+def run(
+    program: Program, val: bytes, start: int = 0, max_steps: int = -1
+) -> RunResult:
+    """
+    Match program's start rule against val from start.
+
+    The rules call each other through the stack, not Python frames, so the
+    depth of a grammar isn't limited by the recursion limit.
+
+    A step is a CHOICE, where backtracking can start, or a byte matched by
+    a SPAN, which scans at C level. Between them the program consumes input,
+    or makes calls which can't recurse without consuming it, so steps bound
+    the work done. If max_steps isn't -1, matching stops with STEPS_EXCEEDED
+    at the first CHOICE after it has taken max_steps. A SPAN may take it
+    past max_steps, which the caller sees from the steps returned.
+    """
+    code = program.code
+    sets = program.sets
+    spans = program.spans
+    literals = program.literals
+    # Entries of (address, position, end of input). Backtrack entries have
+    # a position, and the others _RETURN_ADDRESS or _SAVED_END.
+    stack: list[tuple[int, int, int]] = []
+    pc = 0
+    pos = start
+    end = len(val)
+    furthest = -1
+    steps = 0
+    if max_steps < 0:
+        max_steps = sys.maxsize
+
+    while 1:
+        op = code[pc]
+        if op == SET:
+            if pos < end and sets[code[pc + 1]][val[pos]]:
+                pos += 1
+                pc += 2
+                continue
+        elif op == CHAR:
+            if pos < end and val[pos] == code[pc + 1]:
+                pos += 1
+                pc += 2
+                continue
+        elif op == CHOICE:
+            if steps >= max_steps:
+                return RunResult(STEPS_EXCEEDED, furthest, steps)
+            steps += 1
+            stack.append((code[pc + 1], pos, end))
+            pc += 2
+            continue
+        elif op == COMMIT:
+            stack.pop()
+            pc = code[pc + 1]
+            continue
+        elif op == SPAN:
+            span = spans[code[pc + 1]].match(val, pos, end)
+            if span is not None:
+                steps += span.end() - pos
+                pos = span.end()
+                pc += 2
+                continue
+        elif op == CALL:
+            stack.append((pc + 2, _RETURN_ADDRESS, end))
+            pc = code[pc + 1]
+            continue
+        elif op == RETURN:
+            pc = stack.pop()[0]
+            continue
+        elif op == PARTIAL_COMMIT:
+            stack[-1] = (stack[-1][0], pos, end)
+            pc = code[pc + 1]
+            continue
+        elif op == LITERAL:
+            text = literals[code[pc + 1]]
+            if val.startswith(text, pos, end):
+                pos += len(text)
+                pc += 2
+                continue
+        elif op == LITERAL_CI:
+            text = literals[code[pc + 1]]
+            text_end = pos + len(text)
+            if text_end <= end and val[pos:text_end].lower() == text:
+                pos = text_end
+                pc += 2
+                continue
+        elif op == BACK_COMMIT:
+            pos = stack.pop()[1]
+            pc = code[pc + 1]
+            continue
+        elif op == JUMP:
+            pc = code[pc + 1]
+            continue
+        elif op == LIMIT:
+            stack.append((0, _SAVED_END, end))
+            end = min(end, pos + code[pc + 1])
+            pc += 2
+            continue
+        elif op == UNLIMIT:
+            end = stack.pop()[2]
+            pc += 2
+            continue
+        elif op == END:
+            return RunResult(pos, furthest, steps)
+        elif op == FAIL_TWICE:
+            stack.pop()
+
+        # Fail: resume at the last backtrack entry
+        if pos > furthest:
+            furthest = pos
+        while stack:
+            pc, pos, end = stack.pop()
+            if pos >= 0:
+                break
+        else:
+            return RunResult(-1, furthest, steps)
+
+
+def disassemble(program: Program) -> str:
+    """
+    One line per instruction, with the rules' entry points labelled
+    """
+    labels = {address: name for name, address in program.rules.items()}
+    lines = []
+    code = program.code
+    for address in range(0, len(code), INSTRUCTION_SIZE):
+        if address in labels:
+            lines.append(f"{labels[address]}:")
+        opcode, operand = code[address:address + INSTRUCTION_SIZE]
+        name = OPCODE_NAMES[opcode]
+        if opcode == CHAR:
+            argument = repr(bytes([operand]))
+        elif opcode == SPAN:
+            argument = repr(program.spans[operand].pattern)
+        elif opcode in (LITERAL, LITERAL_CI):
+            argument = repr(program.literals[operand])
+        elif opcode == CALL:
+            argument = labels[operand]
+        elif opcode in (
+            SET, CHOICE, COMMIT, PARTIAL_COMMIT, BACK_COMMIT, JUMP, LIMIT
+        ):
+            argument = str(operand)
+        else:
+            argument = ""
+        lines.append(f"{address:6} {name} {argument}".rstrip())
+    return "\n".join(lines)
+
+
+class PegMatcher(DefaultMatchAll):
+    """
+    A grammar compiled to a Program, matched by run rather than by a
+    match_from per rule.
+
+    A failed match reports the furthest position any test reached, with the
+    class as the expected rule: the program doesn't know the names of the
+    hand-written matchers it stands for. In a budgeted match, each step of
+    the program is a step of the budget.
+    """
+    program: Program
+
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        counter = _thread_state.step_counter if _budget_gate.active else None
+        if counter is None:
+            end, furthest, __ = run(cls.program, val, start)
+        else:
+            end, furthest, steps = run(
+                cls.program, val, start, counter.remaining
+            )
+            counter.remaining -= steps
+            if end == STEPS_EXCEEDED or counter.remaining < 0:
+                raise _StepBudgetExhausted
+        if _failure_gate.active and furthest >= 0:
+            _record_failure(furthest, cls.__qualname__)
+        if end < 0:
+            return None
+        return MatchResult(start=start, length=end - start)
+
+
+def peg_matcher(grammar: Grammar, start: str) -> type[PegMatcher]:
+    # Creates a Matcher class for the start rule of grammar
+    name = f"PegMatcher<{start}>"
+    attrs = {
+        "program": compile_grammar(grammar, start),
+    }
+    return type(name, (PegMatcher,), attrs)
@@ -0,0 +1,38 @@
+import importlib
+
+from generic import Matcher
+
+
+PATTERN_PACKAGES = ("rfc2234", "rfc2616", "rfc1034", "rfc3986", "rfc6455")
+
+
+def public_matchers() -> dict[str, type[Matcher]]:
+    """
+    Every public Matcher defined in the rfc*/patterns.py modules, keyed by
+    "<package>.<ClassName>", for example "rfc3986.Host".
+
+    Names imported from other modules (such as rfc1034's Letter, which is
+    rfc2234's Alpha) are only listed under the package that defines them.
+    """
+    matchers: dict[str, type[Matcher]] = {}
+    for package in PATTERN_PACKAGES:
+        module = importlib.import_module(f"{package}.patterns")
+        for name, value in vars(module).items():
+            if name.startswith("_") or not isinstance(value, type):
+                continue
+            if not issubclass(value, Matcher):
+                continue
+            if value.__module__ != module.__name__:
+                continue
+            matchers[f"{package}.{name}"] = value
+    return matchers
+
+
+def resolve_matcher(name: str) -> type[Matcher]:
+    """
+    Look up a matcher by its "<package>.<ClassName>" name
+    """
+    try:
+        return public_matchers()[name]
+    except KeyError:
+        raise ValueError(f"Unknown matcher: {name!r}") from None
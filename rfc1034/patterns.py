@@ -1,69 +1,110 @@
-from rfc2234.patterns import Alpha as Letter, Digit
-
-from generic import Matcher, literal_compare, DefaultMatchAll, MatchResult
+from typing import Any
 
+from rfc2234.patterns import Alpha as Letter, Digit
 
-class LetDig(DefaultMatchAll):
+from generic import (
+    Alternation,
+    AlternationMatchResult,
+    CharClass,
+    DefaultMatchAll,
+    Input,
+    Matcher,
+    MatchResult,
+    _failure_gate,
+    _record_failure,
+    literal_compare,
+)
+
+
+class LetDig(Alternation):
     """
         <let-dig> ::= <letter> | <digit>
-    """
-
-    @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        return Letter.match_start(val) or Digit.match_start(val)
 
+    The result's branch is letter_branch or digit_branch.
+    """
+    alternatives = (Letter, Digit)
+    letter_branch = 0
+    digit_branch = 1
 
-class LetDigHypMatchResult(MatchResult):
-    matching_symbol: type[Matcher]
 
-    def __init__(
-        self, *, start: int, length: int, matching_symbol: type[Matcher]
-    ):
-        self.matching_symbol = matching_symbol
-        super().__init__(start=start, length=length)
+class LetDigHypMatchResult(AlternationMatchResult):
+    @property
+    def matching_symbol(self) -> type[Matcher[Any]]:
+        """
+        LetDig or LetDigHyp.hyphen_matcher, whichever branch matched
+        """
+        if self.branch == LetDigHyp.let_dig_branch:
+            return LetDig
+        return LetDigHyp.hyphen_matcher
 
 
 class LetDigHyp(DefaultMatchAll[LetDigHypMatchResult]):
     """
         <let-dig-hyp> ::= <let-dig> | "-"
+
+    The result's branch is let_dig_branch or hyphen_branch.
     """
 
     hyphen_matcher = literal_compare(b"-")
+    let_dig_branch = 0
+    hyphen_branch = 1
 
     @classmethod
-    def match_start(cls, val: bytes) -> LetDigHypMatchResult | None:
-        let_dig_match = LetDig.match_start(val)
+    def match_from(
+        cls, val: bytes, start: int
+    ) -> LetDigHypMatchResult | None:
+        # LetDig's alternatives, without building a result for its branch
+        let_dig_match = (
+            Letter.match_from(val, start)
+        ) or (
+            Digit.match_from(val, start)
+        )
         if let_dig_match:
             return LetDigHypMatchResult(
-                start=0, length=let_dig_match.length, matching_symbol=LetDig
+                start=start,
+                length=let_dig_match.length,
+                branch=cls.let_dig_branch,
             )
-        hyphen_match = cls.hyphen_matcher.match_start(val)
+        hyphen_match = cls.hyphen_matcher.match_from(val, start)
         if hyphen_match:
             return LetDigHypMatchResult(
-                start=0,
+                start=start,
                 length=hyphen_match.length,
-                matching_symbol=cls.hyphen_matcher
+                branch=cls.hyphen_branch,
             )
 
         return None
 
 
+class _LetterChar(CharClass):
+    chars = bytes(i for i in range(256) if Letter.match_full(bytes([i])))
+
+
+class _LetDigHypChar(CharClass):
+    chars = bytes(i for i in range(256) if LetDigHyp.match_full(bytes([i])))
+
+
+# "-" and "." as a byte of bytes input, or a character of str input
+_hyphen_items = frozenset((b"-"[0], "-"))
+_dot_items = frozenset((b"."[0], "."))
+
+
 class LDHStr(DefaultMatchAll):
     """
         <let-dig-hyp> | <let-dig-hyp> <ldh-str>
     """
 
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        offset = 0
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        offset = start
         while 1:
             lhd_match = LetDigHyp.match_from(val, offset)
             if not lhd_match:
                 break
             else:
                 offset = lhd_match.end
-        if offset > 0:
-            return MatchResult(start=0, length=offset)
+        if offset > start:
+            return MatchResult(start=start, length=offset - start)
         else:
             return None
 
@@ -76,37 +117,27 @@ class Label(DefaultMatchAll):
             Labels must be 63 characters or less.
     """
     max_label_length: int = 63
+    text_input = True
 
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        letter_match = Letter.match_start(val)
-        if not letter_match:
+    def match_from(cls, val: Input, start: int) -> MatchResult | None:
+        if start >= len(val) or val[start] not in _LetterChar.items:
+            if _failure_gate.active:
+                _record_failure(min(start, len(val)), Letter.__qualname__)
             return None
 
         # After a proceeding <letter> this pattern requires looking ahead.
         # The 'let-dig' is also an 'ldh-str' so if we just take the largest
         # possible ldh-str, we won't have any remaining let-dig to consider.
         # Rather than consuming a whole ldh-str which is of arbitrary length,
-        # we manually compute label without needing the LDHStr pattern.
-
-        offset = letter_match.end
-
-        last_let_dig_match = offset
-        while offset < cls.max_label_length:
-            ldh_match = LetDigHyp.match_from(val, offset)
-
-            if ldh_match:
-                # For mypy. Unhappy with having to do this. Tried lots of ways
-                # to use generic types to get the match_from to automatically
-                # return type LetDigHypeMatchResult but I can't work out how
-                # to do it.
-                offset = ldh_match.end
-                if ldh_match.matching_symbol is LetDig:
-                    last_let_dig_match = offset
-            else:
-                break
-
-        return MatchResult(start=0, length=last_let_dig_match)
+        # the run of let-dig-hyp up to the length limit is scanned at once,
+        # and gives back the hyphens at its end.
+        end = _LetDigHypChar.run_end(
+            val, start + 1, start + cls.max_label_length
+        )
+        while val[end - 1] in _hyphen_items:
+            end -= 1
+        return MatchResult(start=start, length=end - start)
 
 
 class SubDomain(DefaultMatchAll):
@@ -117,26 +148,45 @@ class SubDomain(DefaultMatchAll):
     """
 
     length_limit: int | None = None
+    dot_matcher = literal_compare(b".")
+    text_input = True
 
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        if cls.length_limit is not None:
-            val = val[: cls.length_limit]
+    def match_from(cls, val: Input, start: int) -> MatchResult | None:
+        end = cls.match_end(val, start)
+        if end < 0:
+            return None
+        return MatchResult(start=start, length=end - start)
 
-        label_match = Label.match_start(val)
+    @classmethod
+    def match_end(cls, val: Input, start: int) -> int:
+        """
+        The end of the subdomain from start, or -1, for alternations which
+        give the match their own result
+        """
+        if (
+            cls.length_limit is not None
+        ) and (
+            len(val) > start + cls.length_limit
+        ):
+            # Dropping the end of the string leaves the offsets unchanged.
+            val = val[: start + cls.length_limit]
+
+        label_match = Label.match_from(val, start)
         if not label_match:
-            return None
+            return -1
 
         offset = label_match.end
         while 1:
-            dot_match = literal_compare(b".").match_from(val, offset)
-            if not dot_match:
-                return MatchResult(start=0, length=offset)
-            label_match = Label.match_from(val, dot_match.end)
+            if offset >= len(val) or val[offset] not in _dot_items:
+                if _failure_gate.active:
+                    _record_failure(offset, cls.dot_matcher.__qualname__)
+                return offset
+            label_match = Label.match_from(val, offset + 1)
             if label_match:
                 offset = label_match.end
             else:
-                return MatchResult(start=0, length=offset)
+                return offset
 
 
 class Domain(SubDomain):
@@ -153,13 +203,23 @@ class Domain(SubDomain):
 
         The only subdomain of A.B.C.D which " " makes sense to represent is the
         root node, and it specifies that the root node is zero length.
+
+    The result's branch is subdomain_branch or root_branch.
     """
     length_limit = 255
+    subdomain_branch = 0
+    root_branch = 1
 
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        return (
-            super().match_start(val)
-        ) or (
-            literal_compare(b"").match_start(val)
+    def match_from(
+        cls, val: Input, start: int
+    ) -> AlternationMatchResult | None:
+        end = cls.match_end(val, start)
+        if end < 0:
+            # The root, which is empty, so always matches
+            return AlternationMatchResult(
+                start=start, length=0, branch=cls.root_branch
+            )
+        return AlternationMatchResult(
+            start=start, length=end - start, branch=cls.subdomain_branch
         )
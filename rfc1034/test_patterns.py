@@ -1,12 +1,13 @@
 from unittest import TestCase
 
-from generic import MatchResult
+from generic import AlternationMatchResult, MatchResult
 from rfc1034.patterns import (
     Domain,
     Label,
     LDHStr,
     LetDig,
     LetDigHyp,
+    LetDigHypMatchResult,
     SubDomain,
 )
 
@@ -24,6 +25,20 @@ class TestLetDig(TestCase):
         self.assertFalse(LetDig.match_full(b'xyz'))
         self.assertFalse(LetDig.match_full(b'-'))
 
+    def test_branch(self) -> None:
+        for val, branch in [
+            (b'a', LetDig.letter_branch),
+            (b'7', LetDig.digit_branch),
+        ]:
+            with self.subTest(val=val):
+                match_result = LetDig.match_start(val)
+                assert match_result is not None
+                self.assertEqual(match_result.branch, branch)
+                self.assertIs(
+                    LetDig.alternative(match_result),
+                    LetDig.alternatives[branch],
+                )
+
 
 class TestLetDigHype(TestCase):
     def test_let_dig_hype(self) -> None:
@@ -38,6 +53,26 @@ class TestLetDigHype(TestCase):
         self.assertFalse(LetDigHyp.match_full(b'123'))
         self.assertFalse(LetDigHyp.match_full(b'xyz'))
 
+    def test_branch(self) -> None:
+        for val, branch in [
+            (b'a', LetDigHyp.let_dig_branch),
+            (b'7', LetDigHyp.let_dig_branch),
+            (b'-', LetDigHyp.hyphen_branch),
+        ]:
+            with self.subTest(val=val):
+                match_result = LetDigHyp.match_start(val)
+                assert match_result is not None
+                self.assertEqual(match_result.branch, branch)
+
+    def test_matching_symbol(self) -> None:
+        match_result = LetDigHyp.match_start(b'a')
+        assert match_result is not None
+        self.assertIsInstance(match_result, LetDigHypMatchResult)
+        self.assertIs(match_result.matching_symbol, LetDig)
+        match_result = LetDigHyp.match_start(b'-')
+        assert match_result is not None
+        self.assertIs(match_result.matching_symbol, LetDigHyp.hyphen_matcher)
+
 
 class TestLDHStr(TestCase):
     def test_lhd_str(self) -> None:
@@ -102,6 +137,17 @@ class TestDomain(TestCase):
         self.assertTrue(Domain.match_full(b"a"))
         self.assertTrue(Domain.match_full(b""))
 
+        for val, branch in [
+            (b"a.b", Domain.subdomain_branch),
+            (b"", Domain.root_branch),
+            (b"-", Domain.root_branch),
+        ]:
+            with self.subTest(val=val):
+                match_result = Domain.match_start(val)
+                assert isinstance(match_result, AlternationMatchResult)
+                self.assertIs(type(match_result), AlternationMatchResult)
+                self.assertEqual(match_result.branch, branch)
+
         long_domain = b".".join([b"a"*63]*4)
         self.assertEqual(len(long_domain), 255)
         self.assertTrue(Domain.match_full(long_domain))
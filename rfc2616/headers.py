@@ -0,0 +1,219 @@
+from array import array
+from typing import Iterator
+
+from rfc2616.patterns import TChar, _TextChar
+
+
+Buffer = bytes | bytearray
+
+crlf = b"\r\n"
+whitespace_chars = b" \t"
+
+# Entries per field in HeaderIndex.offsets
+_FIELD_SIZE = 4
+
+
+class HeaderBlockError(ValueError):
+    """
+    A malformed header line. offset is the position in the buffer of the
+    first byte which couldn't be accepted.
+    """
+    def __init__(self, message: str, offset: int):
+        super().__init__(f"{message} at offset {offset}")
+        self.offset = offset
+
+
+class HeaderIndex:
+    """
+    The fields of a header block, as offsets into the buffer it was found in.
+
+    offsets holds (name_start, name_end, value_start, value_end) for each
+    field in turn. Values don't include leading or trailing whitespace, but
+    do include any folded continuation lines. end is the offset just past
+    the CRLF ending the block.
+    """
+    __slots__ = ("buffer", "offsets", "end")
+
+    def __init__(self, buffer: Buffer, offsets: array[int], end: int):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.end = end
+
+    def __len__(self) -> int:
+        return len(self.offsets) // _FIELD_SIZE
+
+    def spans(self, index: int) -> tuple[int, int, int, int]:
+        position = index * _FIELD_SIZE
+        name_start, name_end, value_start, value_end = (
+            self.offsets[position:position + _FIELD_SIZE]
+        )
+        return name_start, name_end, value_start, value_end
+
+    def name(self, index: int) -> memoryview:
+        position = index * _FIELD_SIZE
+        return memoryview(self.buffer)[
+            self.offsets[position]:self.offsets[position + 1]
+        ]
+
+    def value(self, index: int) -> memoryview:
+        position = index * _FIELD_SIZE
+        return memoryview(self.buffer)[
+            self.offsets[position + 2]:self.offsets[position + 3]
+        ]
+
+    def __iter__(self) -> Iterator[tuple[memoryview, memoryview]]:
+        view = memoryview(self.buffer)
+        offsets = self.offsets
+        for position in range(0, len(offsets), _FIELD_SIZE):
+            yield (
+                view[offsets[position]:offsets[position + 1]],
+                view[offsets[position + 2]:offsets[position + 3]],
+            )
+
+    def find_all(self, name: bytes) -> Iterator[int]:
+        """
+        The indexes of the fields called name, compared case-insensitively.
+        name must be lower case.
+
+        Only names of the same length are compared, and only those are
+        copied to lower them.
+        """
+        buffer = self.buffer
+        offsets = self.offsets
+        length = len(name)
+        for position in range(0, len(offsets), _FIELD_SIZE):
+            name_start = offsets[position]
+            name_end = offsets[position + 1]
+            if name_end - name_start != length:
+                continue
+            if buffer[name_start:name_end].lower() == name:
+                yield position // _FIELD_SIZE
+
+    def get(self, name: bytes) -> memoryview | None:
+        """
+        The value of the first field called name (in lower case), or None
+        """
+        for index in self.find_all(name):
+            return self.value(index)
+        return None
+
+    def get_all(self, name: bytes) -> list[memoryview]:
+        return [self.value(index) for index in self.find_all(name)]
+
+    def unfolded_value(self, index: int) -> list[memoryview]:
+        """
+        The value of field index as unfold_value segments
+        """
+        position = index * _FIELD_SIZE + 2
+        return unfold_value(
+            self.buffer, self.offsets[position], self.offsets[position + 1]
+        )
+
+
+def _value_start(buffer: Buffer, start: int, end: int) -> int:
+    # Leave out leading whitespace
+    while start < end and buffer[start] in whitespace_chars:
+        start += 1
+    return start
+
+
+def _value_end(buffer: Buffer, start: int, end: int) -> int:
+    # Leave out trailing whitespace
+    while end > start and buffer[end - 1] in whitespace_chars:
+        end -= 1
+    return end
+
+
+def index_header_block(
+    buffer: Buffer, start: int = 0
+) -> HeaderIndex | None:
+    """
+    Index the header block starting at offset start, the fields following
+    the request or status line, up to and including the empty line ending
+    it:
+
+        *( message-header CRLF ) CRLF
+        message-header = field-name ":" [ field-value ]
+
+    The block is scanned once, validating names and values as it goes.
+    Returns None if the buffer ends before the block does, and raises
+    HeaderBlockError for a malformed line.
+    """
+    offsets = array("l")
+    position = start
+    while 1:
+        line_end = buffer.find(crlf, position)
+        if line_end < 0:
+            return None
+        if line_end == position:
+            return HeaderIndex(buffer, offsets, line_end + 2)
+
+        if buffer[position] in whitespace_chars:
+            # A continuation line, part of the previous field's value
+            if not offsets:
+                raise HeaderBlockError(
+                    "Continuation line before the first field", position
+                )
+            text_end = _TextChar.run_end(buffer, position)
+            if text_end != line_end:
+                raise HeaderBlockError("Invalid field value", text_end)
+            value_start = _value_start(buffer, position, line_end)
+            if value_start < line_end:
+                if offsets[-2] == offsets[-1]:
+                    # The value so far is empty
+                    offsets[-2] = value_start
+                offsets[-1] = _value_end(buffer, value_start, line_end)
+            position = line_end + 2
+            continue
+
+        name_end = TChar.run_end(buffer, position)
+        if name_end == position or buffer[name_end:name_end + 1] != b":":
+            raise HeaderBlockError("Invalid field name", name_end)
+
+        value_start = _value_start(buffer, name_end + 1, line_end)
+        text_end = _TextChar.run_end(buffer, value_start)
+        if text_end != line_end:
+            raise HeaderBlockError("Invalid field value", text_end)
+
+        offsets.extend((
+            position,
+            name_end,
+            value_start,
+            _value_end(buffer, value_start, line_end),
+        ))
+        position = line_end + 2
+
+
+def unfold_value(buffer: Buffer, start: int, end: int) -> list[memoryview]:
+    """
+    Split the field-value buffer[start:end] at its folds, each CRLF and the
+    whitespace around it, returning views of the text between them. Joining
+    these with single spaces, as join_unfolded does, gives the unfolded
+    value RFC 2616 section 4.2 allows the folds to be replaced with.
+
+    A value without folds, which is nearly every value, is returned as a
+    single view of the original span. An empty value has no segments.
+    """
+    view = memoryview(buffer)
+    fold = buffer.find(crlf, start, end)
+    if fold < 0:
+        return [view[start:end]] if end > start else []
+
+    segments = []
+    segment_start = start
+    while fold >= 0:
+        segment_end = _value_end(buffer, segment_start, fold)
+        if segment_end > segment_start:
+            segments.append(view[segment_start:segment_end])
+        segment_start = _value_start(buffer, fold + 2, end)
+        fold = buffer.find(crlf, segment_start, end)
+    if segment_start < end:
+        segments.append(view[segment_start:end])
+    return segments
+
+
+def join_unfolded(segments: list[memoryview]) -> bytes:
+    """
+    The unfolded value as bytes, only copied when this is asked for
+    """
+    return b" ".join(segments)
@@ -1,8 +1,12 @@
 from generic import (
+    CharClass,
     ConstantLength,
     DefaultMatchAll,
+    Input,
     MatchResult,
     LiteralCompare,
+    case_insensitive_compare,
+    literal_compare,
 )
 import special_chars
 
@@ -54,18 +58,18 @@ class LWS(DefaultMatchAll):
             return val in (special_chars.space, special_chars.horizontal_tab)
 
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        matched_length = 0
-        crlf_match = CRLF.match_start(val)
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        offset = start
+        crlf_match = CRLF.match_from(val, offset)
         if crlf_match is not None:
-            matched_length += crlf_match.length
+            offset = crlf_match.end
 
         have_whitespace = False
 
         while 1:
-            result = cls.WhiteSpace.match_from(val, matched_length)
+            result = cls.WhiteSpace.match_from(val, offset)
             if result is not None:
-                matched_length += result.length
+                offset = result.end
                 have_whitespace = True
             else:
                 break
@@ -73,4 +77,405 @@ class LWS(DefaultMatchAll):
         if not have_whitespace:
             return None
         else:
-            return MatchResult(start=0, length=matched_length)
+            return MatchResult(start=start, length=offset - start)
+
+
+class Char(CharClass):
+    # CHAR           = <any US-ASCII character (octets 0 - 127)>
+    chars = bytes(range(128))
+
+
+class Ctl(CharClass):
+    """
+        CTL            = <any US-ASCII control character
+                         (octets 0 - 31) and DEL (127)>
+    """
+    chars = bytes(range(32)) + b"\x7f"
+
+
+class Separators(CharClass):
+    """
+        separators     = "(" | ")" | "<" | ">" | "@"
+                       | "," | ";" | ":" | "\\" | <">
+                       | "/" | "[" | "]" | "?" | "="
+                       | "{" | "}" | SP | HT
+    """
+    chars = b'()<>@,;:\\"/[]?={} \t'
+
+
+class TChar(CharClass):
+    # A character of a token: any CHAR except CTLs or separators
+    chars = bytes(
+        i for i in Char.chars
+        if not Ctl.table[i] and not Separators.table[i]
+    )
+
+
+class _Digit(CharClass):
+    # DIGIT          = <any US-ASCII digit "0".."9">, kept private as
+    # rfc2234.Digit is the public one
+    chars = b"0123456789"
+
+
+class _TextChar(CharClass):
+    # A single octet of TEXT: any OCTET except CTLs, with HT allowed as it is
+    # part of LWS. CR and LF are only allowed in LWS.
+    chars = bytes(i for i in range(256) if not Ctl.table[i]) + b"\t"
+
+
+class _QdTextChar(CharClass):
+    # qdtext other than LWS: a quoted-pair is always taken for a backslash, as
+    # RFC 7230 clarifies, so that \" doesn't end the string
+    chars = bytes(i for i in _TextChar.chars if i not in b'"\\')
+
+
+class _CTextChar(CharClass):
+    # ctext other than LWS, with backslash kept for quoted-pair as in qdtext
+    chars = bytes(i for i in _TextChar.chars if i not in b"()\\")
+
+
+class _RequestURIChar(CharClass):
+    # Any CHAR except CTLs and SP
+    chars = bytes(range(0x21, 0x7f))
+
+
+class Token(DefaultMatchAll):
+    """
+        token          = 1*<any CHAR except CTLs or separators>
+    """
+    text_input = True
+
+    @classmethod
+    def match_from(cls, val: Input, start: int) -> MatchResult | None:
+        end = TChar.run_end(val, start)
+        if end == start:
+            return None
+        return MatchResult(start=start, length=end - start)
+
+
+class QuotedPair(DefaultMatchAll):
+    """
+        quoted-pair    = "\\" CHAR
+    """
+    backslash_matcher = literal_compare(b"\\")
+
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        backslash_match = cls.backslash_matcher.match_from(val, start)
+        if not backslash_match:
+            return None
+        char_match = Char.match_from(val, backslash_match.end)
+        if not char_match:
+            return None
+        return MatchResult(start=start, length=char_match.end - start)
+
+
+def _text_run_end(
+    text_char: type[CharClass], val: bytes, start: int
+) -> int:
+    """
+    The end of a run of text_char, LWS and quoted-pairs from start
+    """
+    offset = start
+    while 1:
+        offset = text_char.run_end(val, offset)
+        part_match = (
+            QuotedPair.match_from(val, offset)
+        ) or (
+            LWS.match_from(val, offset)
+        )
+        if not part_match:
+            return offset
+        offset = part_match.end
+
+
+class QuotedString(DefaultMatchAll):
+    """
+        quoted-string  = ( <"> *(qdtext | quoted-pair ) <"> )
+        qdtext         = <any TEXT except <">>
+    """
+    quote_matcher = literal_compare(b'"')
+
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        opening_quote_match = cls.quote_matcher.match_from(val, start)
+        if not opening_quote_match:
+            return None
+        offset = _text_run_end(_QdTextChar, val, opening_quote_match.end)
+        closing_quote_match = cls.quote_matcher.match_from(val, offset)
+        if not closing_quote_match:
+            return None
+        return MatchResult(start=start, length=closing_quote_match.end - start)
+
+
+class Comment(DefaultMatchAll):
+    """
+        comment        = "(" *( ctext | quoted-pair | comment ) ")"
+        ctext          = <any TEXT excluding "(" and ")">
+
+    Nested comments are counted rather than recursed into, so deeply nested
+    input can't exhaust the stack.
+    """
+    opening_matcher = literal_compare(b"(")
+    closing_matcher = literal_compare(b")")
+
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        opening_match = cls.opening_matcher.match_from(val, start)
+        if not opening_match:
+            return None
+        depth = 1
+        offset = opening_match.end
+        while depth:
+            offset = _text_run_end(_CTextChar, val, offset)
+            opening_match = cls.opening_matcher.match_from(val, offset)
+            if opening_match:
+                depth += 1
+                offset = opening_match.end
+                continue
+            closing_match = cls.closing_matcher.match_from(val, offset)
+            if not closing_match:
+                return None
+            depth -= 1
+            offset = closing_match.end
+        return MatchResult(start=start, length=offset - start)
+
+
+class FieldName(Token):
+    """
+        field-name     = token
+    """
+
+
+class FieldContent(DefaultMatchAll):
+    """
+        field-content  = <the OCTETs making up the field-value
+                         and consisting of either *TEXT or combinations
+                         of token, separators, and quoted-string>
+
+    Tokens, separators and quoted-strings are all TEXT, so this is a
+    non-empty run of TEXT without the line folding of LWS.
+    """
+    text_input = True
+
+    @classmethod
+    def match_from(cls, val: Input, start: int) -> MatchResult | None:
+        end = _TextChar.run_end(val, start)
+        if end == start:
+            return None
+        return MatchResult(start=start, length=end - start)
+
+
+class FieldValue(DefaultMatchAll):
+    """
+        field-value    = *( field-content | LWS )
+
+    Folded lines (CRLF followed by SP or HT) are part of the value, which
+    ends at the first CRLF not followed by whitespace.
+    """
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        offset = start
+        while 1:
+            offset = _TextChar.run_end(val, offset)
+            lws_match = LWS.match_from(val, offset)
+            if not lws_match:
+                return MatchResult(start=start, length=offset - start)
+            offset = lws_match.end
+
+
+class HTTPVersion(DefaultMatchAll):
+    """
+        HTTP-Version   = "HTTP" "/" 1*DIGIT "." 1*DIGIT
+
+    "HTTP" is case-insensitive, as are all literals in RFC 2616.
+    """
+    http_matcher = case_insensitive_compare(b"HTTP/")
+    full_stop_matcher = literal_compare(b".")
+
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        http_match = cls.http_matcher.match_from(val, start)
+        if not http_match:
+            return None
+        major_end = _Digit.run_end(val, http_match.end)
+        if major_end == http_match.end:
+            return None
+        full_stop_match = cls.full_stop_matcher.match_from(val, major_end)
+        if not full_stop_match:
+            return None
+        minor_end = _Digit.run_end(val, full_stop_match.end)
+        if minor_end == full_stop_match.end:
+            return None
+        return MatchResult(start=start, length=minor_end - start)
+
+
+class Method(Token):
+    """
+        Method         = "OPTIONS" | "GET" | "HEAD" | "POST" | "PUT"
+                       | "DELETE" | "TRACE" | "CONNECT" | extension-method
+        extension-method = token
+    """
+
+
+class RequestURI(DefaultMatchAll):
+    """
+        Request-URI    = "*" | absoluteURI | abs_path | authority
+
+    Matched as any non-empty run of CHARs other than CTLs and SP, which is
+    all of these can contain, leaving the URI itself to be validated by the
+    rfc3986 patterns.
+    """
+    text_input = True
+
+    @classmethod
+    def match_from(cls, val: Input, start: int) -> MatchResult | None:
+        end = _RequestURIChar.run_end(val, start)
+        if end == start:
+            return None
+        return MatchResult(start=start, length=end - start)
+
+
+class RequestLineMatchResult(MatchResult):
+    method: MatchResult
+    request_uri: MatchResult
+    http_version: MatchResult
+
+    def __init__(
+        self,
+        *,
+        start: int,
+        length: int,
+        method: MatchResult,
+        request_uri: MatchResult,
+        http_version: MatchResult,
+    ):
+        self.method = method
+        self.request_uri = request_uri
+        self.http_version = http_version
+        super().__init__(start=start, length=length)
+
+
+class RequestLine(DefaultMatchAll[RequestLineMatchResult]):
+    """
+        Request-Line   = Method SP Request-URI SP HTTP-Version CRLF
+
+    The result has the span of each part of the line.
+    """
+    space_matcher = literal_compare(special_chars.space)
+
+    @classmethod
+    def match_from(
+        cls, val: bytes, start: int
+    ) -> RequestLineMatchResult | None:
+        method_match = Method.match_from(val, start)
+        if not method_match:
+            return None
+        space_match = cls.space_matcher.match_from(val, method_match.end)
+        if not space_match:
+            return None
+        request_uri_match = RequestURI.match_from(val, space_match.end)
+        if not request_uri_match:
+            return None
+        space_match = cls.space_matcher.match_from(
+            val, request_uri_match.end
+        )
+        if not space_match:
+            return None
+        http_version_match = HTTPVersion.match_from(val, space_match.end)
+        if not http_version_match:
+            return None
+        crlf_match = CRLF.match_from(val, http_version_match.end)
+        if not crlf_match:
+            return None
+        return RequestLineMatchResult(
+            start=start,
+            length=crlf_match.end - start,
+            method=method_match,
+            request_uri=request_uri_match,
+            http_version=http_version_match,
+        )
+
+
+class StatusCode(ConstantLength):
+    # Status-Code    = 3DIGIT
+    length = 3
+
+    @classmethod
+    def match_length_correct(cls, val: bytes) -> bool:
+        return not val.translate(None, _Digit.chars)
+
+
+class ReasonPhrase(DefaultMatchAll):
+    """
+        Reason-Phrase  = *<TEXT, excluding CR, LF>
+
+    Always matches, if only the empty string.
+    """
+    text_input = True
+
+    @classmethod
+    def match_from(cls, val: Input, start: int) -> MatchResult:
+        end = _TextChar.run_end(val, start)
+        return MatchResult(start=start, length=end - start)
+
+
+class StatusLineMatchResult(MatchResult):
+    http_version: MatchResult
+    status_code: MatchResult
+    reason_phrase: MatchResult
+
+    def __init__(
+        self,
+        *,
+        start: int,
+        length: int,
+        http_version: MatchResult,
+        status_code: MatchResult,
+        reason_phrase: MatchResult,
+    ):
+        self.http_version = http_version
+        self.status_code = status_code
+        self.reason_phrase = reason_phrase
+        super().__init__(start=start, length=length)
+
+
+class StatusLine(DefaultMatchAll[StatusLineMatchResult]):
+    """
+        Status-Line = HTTP-Version SP Status-Code SP Reason-Phrase CRLF
+
+    The result has the span of each part of the line.
+    """
+    space_matcher = literal_compare(special_chars.space)
+
+    @classmethod
+    def match_from(
+        cls, val: bytes, start: int
+    ) -> StatusLineMatchResult | None:
+        http_version_match = HTTPVersion.match_from(val, start)
+        if not http_version_match:
+            return None
+        space_match = cls.space_matcher.match_from(
+            val, http_version_match.end
+        )
+        if not space_match:
+            return None
+        status_code_match = StatusCode.match_from(val, space_match.end)
+        if not status_code_match:
+            return None
+        space_match = cls.space_matcher.match_from(
+            val, status_code_match.end
+        )
+        if not space_match:
+            return None
+        reason_phrase_match = ReasonPhrase.match_from(val, space_match.end)
+        crlf_match = CRLF.match_from(val, reason_phrase_match.end)
+        if not crlf_match:
+            return None
+        return StatusLineMatchResult(
+            start=start,
+            length=crlf_match.end - start,
+            http_version=http_version_match,
+            status_code=status_code_match,
+            reason_phrase=reason_phrase_match,
+        )
@@ -0,0 +1,116 @@
+from unittest import TestCase
+
+from rfc2616.headers import (
+    HeaderBlockError,
+    index_header_block,
+    join_unfolded,
+    unfold_value,
+)
+
+
+request = (
+    b"GET / HTTP/1.1\r\n"
+    b"Host: example.com\r\n"
+    b"Accept:text/html,\r\n"
+    b"\tapplication/xml  \r\n"
+    b"X-Empty:\r\n"
+    b"Set-Cookie: a=1\r\n"
+    b"set-cookie:  b=2 \r\n"
+    b"\r\n"
+    b"body"
+)
+headers_start = request.index(b"\r\n") + 2
+
+
+class TestIndexHeaderBlock(TestCase):
+    def test_index(self) -> None:
+        index = index_header_block(request, headers_start)
+        assert index is not None
+        self.assertEqual(index.end, len(request) - 4)
+        self.assertEqual(len(index), 5)
+        self.assertEqual(len(index.offsets), 20)
+        self.assertEqual(
+            [(bytes(name), bytes(value)) for name, value in index],
+            [
+                (b"Host", b"example.com"),
+                (b"Accept", b"text/html,\r\n\tapplication/xml"),
+                (b"X-Empty", b""),
+                (b"Set-Cookie", b"a=1"),
+                (b"set-cookie", b"b=2"),
+            ],
+        )
+        name_start, name_end, value_start, value_end = index.spans(0)
+        self.assertEqual(request[name_start:name_end], b"Host")
+        self.assertEqual(request[value_start:value_end], b"example.com")
+
+    def test_lookup(self) -> None:
+        buffer = bytearray(request)
+        index = index_header_block(buffer, headers_start)
+        assert index is not None
+        host = index.get(b"host")
+        assert host is not None
+        self.assertEqual(host, b"example.com")
+        self.assertEqual(index.get_all(b"set-cookie"), [b"a=1", b"b=2"])
+        self.assertIsNone(index.get(b"content-length"))
+
+        # Values are views of the buffer
+        self.assertIs(host.obj, buffer)
+
+    def test_empty_and_incomplete(self) -> None:
+        index = index_header_block(b"\r\n")
+        assert index is not None
+        self.assertEqual((len(index), index.end), (0, 2))
+
+        self.assertIsNone(index_header_block(b""))
+        self.assertIsNone(index_header_block(b"Host: a\r\n"))
+        self.assertIsNone(index_header_block(request[:-6], headers_start))
+
+    def test_folded_empty_value(self) -> None:
+        index = index_header_block(b"X:\r\n  \r\n   a b \r\n\r\n")
+        assert index is not None
+        self.assertEqual(index.get(b"x"), b"a b")
+
+    def test_malformed(self) -> None:
+        for block, offset in [
+            (b" Host: a\r\n\r\n", 0),
+            (b"Host a\r\n\r\n", 4),
+            (b": a\r\n\r\n", 0),
+            (b"Ho(st: a\r\n\r\n", 2),
+            (b"Host: a\x00b\r\n\r\n", 7),
+            (b"Host: a\nX: b\r\n\r\n", 7),
+            (b"Host: a\rX: b\r\n\r\n", 7),
+            (b"Host: a\r\n b\x7f\r\n\r\n", 11),
+        ]:
+            with self.subTest(block=block):
+                with self.assertRaises(HeaderBlockError) as context:
+                    index_header_block(block)
+                self.assertEqual(context.exception.offset, offset)
+
+
+class TestUnfoldValue(TestCase):
+    def test_unfold_value(self) -> None:
+        for value, segments in [
+            (b"", []),
+            (b"a b", [b"a b"]),
+            (b"a,\r\n b", [b"a,", b"b"]),
+            (b"a \t\r\n\t  b\r\n c", [b"a", b"b", b"c"]),
+            (b"a\r\n \r\n b", [b"a", b"b"]),
+            (b"\r\n a", [b"a"]),
+        ]:
+            with self.subTest(value=value):
+                buffer = b"X: " + value + b"\r\n"
+                unfolded = unfold_value(buffer, 3, 3 + len(value))
+                self.assertEqual(unfolded, segments)
+                self.assertEqual(join_unfolded(unfolded), b" ".join(segments))
+
+    def test_unfolded_value_is_not_copied(self) -> None:
+        buffer = bytearray(request)
+        index = index_header_block(buffer, headers_start)
+        assert index is not None
+        [host] = index.unfolded_value(0)
+        self.assertIs(host.obj, buffer)
+        self.assertEqual(host, b"example.com")
+
+        accept = index.unfolded_value(1)
+        self.assertEqual(join_unfolded(accept), b"text/html, application/xml")
+        self.assertEqual(index.unfolded_value(2), [])
@@ -8,6 +8,15 @@ from rfc2616.patterns import (
     LoAlpha,
     UpAlpha,
     Octet,
+
+    Comment,
+    FieldValue,
+    HTTPVersion,
+    QuotedString,
+    RequestLine,
+    StatusLine,
+    TChar,
+    Token,
 )
 
 
@@ -81,3 +90,125 @@ class TestLWS(TestCase):
         match_result = LWS.match_start(b" \r\n")
         assert isinstance(match_result, MatchResult)
         self.assertEqual(match_result.length, 1)
+
+
+class TestToken(TestCase):
+    def test_tchar(self) -> None:
+        for char in b"!#$%&'*+-.^_`|~09AZaz":
+            self.assertTrue(TChar.match_full(bytes([char])))
+        for char in b'()<>@,;:\\"/[]?={} \t\x00\x7f\x80':
+            self.assertFalse(TChar.match_full(bytes([char])))
+
+    def test_token(self) -> None:
+        self.assertTrue(Token.match_full(b"Content-Type"))
+        self.assertFalse(Token.match_full(b""))
+        self.assertFalse(Token.match_full(b"Content Type"))
+
+        match_result = Token.match_from(b"GET /index.html", 0)
+        assert isinstance(match_result, MatchResult)
+        self.assertEqual(match_result.end, 3)
+        match_result = Token.match_from(b"a: text/html", 3)
+        assert isinstance(match_result, MatchResult)
+        self.assertEqual((match_result.start, match_result.end), (3, 7))
+
+        failure = Token.match_failure(b"abc def")
+        assert failure is not None
+        self.assertEqual(failure.position, 3)
+
+
+class TestQuotedString(TestCase):
+    def test_quoted_string(self) -> None:
+        self.assertTrue(QuotedString.match_full(b'""'))
+        self.assertTrue(QuotedString.match_full(b'"a \\"b\\" c"'))
+        self.assertTrue(QuotedString.match_full(b'"a\r\n b"'))
+        self.assertTrue(QuotedString.match_full(b'"\\\\"'))
+        self.assertFalse(QuotedString.match_full(b'"\\"'))
+        self.assertFalse(QuotedString.match_full(b'"a\r\nb"'))
+        self.assertFalse(QuotedString.match_full(b'"abc'))
+        self.assertFalse(QuotedString.match_full(b'"a\x00"'))
+
+        match_result = QuotedString.match_start(b'"a"b"')
+        assert isinstance(match_result, MatchResult)
+        self.assertEqual(match_result.length, 3)
+
+
+class TestComment(TestCase):
+    def test_comment(self) -> None:
+        self.assertTrue(Comment.match_full(b"()"))
+        self.assertTrue(Comment.match_full(b"(Linux; (nested (twice)))"))
+        self.assertTrue(Comment.match_full(b"(a \\) b)"))
+        self.assertFalse(Comment.match_full(b"(a))"))
+        self.assertFalse(Comment.match_full(b"((a)"))
+        self.assertFalse(Comment.match_full(b"a"))
+
+        # No recursion, however deep the nesting
+        self.assertTrue(Comment.match_full(b"(" * 10000 + b")" * 10000))
+        self.assertFalse(Comment.match_full(b"(" * 10000 + b")" * 9999))
+
+
+class TestFieldValue(TestCase):
+    def test_field_value(self) -> None:
+        self.assertTrue(FieldValue.match_full(b""))
+        self.assertTrue(FieldValue.match_full(b"text/html; q=0.5"))
+        self.assertTrue(FieldValue.match_full(b"a,\r\n b,\r\n\tc"))
+        self.assertFalse(FieldValue.match_full(b"a\r\nb"))
+        self.assertFalse(FieldValue.match_full(b"a\nb"))
+
+        # The value ends at the CRLF ending the header
+        val = b"Accept: a,\r\n b\r\nHost: x\r\n"
+        match_result = FieldValue.match_from(val, 8)
+        assert isinstance(match_result, MatchResult)
+        self.assertEqual(val[match_result.start:match_result.end],
+                         b"a,\r\n b")
+
+
+class TestHTTPVersion(TestCase):
+    def test_http_version(self) -> None:
+        self.assertTrue(HTTPVersion.match_full(b"HTTP/1.1"))
+        self.assertTrue(HTTPVersion.match_full(b"http/12.34"))
+        self.assertFalse(HTTPVersion.match_full(b"HTTP/1"))
+        self.assertFalse(HTTPVersion.match_full(b"HTTP/1."))
+        self.assertFalse(HTTPVersion.match_full(b"HTTP/a.1"))
+
+
+class TestRequestLine(TestCase):
+    def test_request_line(self) -> None:
+        val = b"GET /index.html?q=1 HTTP/1.1\r\nHost: x\r\n"
+        match_result = RequestLine.match_start(val)
+        assert match_result is not None
+        self.assertEqual(match_result.end, 30)
+        for span, expected in [
+            (match_result.method, b"GET"),
+            (match_result.request_uri, b"/index.html?q=1"),
+            (match_result.http_version, b"HTTP/1.1"),
+        ]:
+            self.assertEqual(val[span.start:span.end], expected)
+
+        self.assertTrue(RequestLine.match_full(b"OPTIONS * HTTP/1.0\r\n"))
+        self.assertFalse(RequestLine.match_full(b"GET / HTTP/1.1"))
+        self.assertFalse(RequestLine.match_full(b"GET / HTTP/1.1\n"))
+        self.assertFalse(RequestLine.match_full(b"GET  / HTTP/1.1\r\n"))
+        self.assertFalse(RequestLine.match_full(b"G(T / HTTP/1.1\r\n"))
+
+        failure = RequestLine.match_failure(b"GET /a b HTTP/1.1\r\n")
+        assert failure is not None
+        self.assertEqual(failure.position, 7)
+
+
+class TestStatusLine(TestCase):
+    def test_status_line(self) -> None:
+        val = b"HTTP/1.1 404 Not Found\r\n"
+        match_result = StatusLine.match_start(val)
+        assert match_result is not None
+        self.assertEqual(match_result.length, len(val))
+        for span, expected in [
+            (match_result.http_version, b"HTTP/1.1"),
+            (match_result.status_code, b"404"),
+            (match_result.reason_phrase, b"Not Found"),
+        ]:
+            self.assertEqual(val[span.start:span.end], expected)
+
+        self.assertTrue(StatusLine.match_full(b"HTTP/1.1 204 \r\n"))
+        self.assertFalse(StatusLine.match_full(b"HTTP/1.1 204\r\n"))
+        self.assertFalse(StatusLine.match_full(b"HTTP/1.1 2045 No\r\n"))
+        self.assertFalse(StatusLine.match_full(b"HTTP/1.1 200 O\nK\r\n"))
@@ -1,12 +1,20 @@
+from enum import IntEnum
+from typing import NamedTuple, overload
+
 from generic import (
-    ConstantLength,
+    AlternationMatchResult,
+    CharClass,
     DefaultMatchAll,
+    Input,
     MatchResult,
+    _failure_gate,
+    _record_failure,
     case_insensitive_compare,
     literal_compare,
 )
 
 from rfc2234.patterns import Alpha, Digit, HexDig
+from rfc3986.percent import scan_percent_encoded
 
 
 class H16(DefaultMatchAll):
@@ -14,10 +22,10 @@ class H16(DefaultMatchAll):
         h16         = 1*4HEXDIG
     """
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
         matches = 0
         for n in range(4):
-            if HexDig.match_from(val, n) is None:
+            if HexDig.match_from(val, start + n) is None:
                 break
             else:
                 matches += 1
@@ -25,7 +33,7 @@ class H16(DefaultMatchAll):
         if matches == 0:
             return None
         else:
-            return MatchResult(start=0, length=matches)
+            return MatchResult(start=start, length=matches)
 
 
 class DecOctet(DefaultMatchAll):
@@ -39,27 +47,27 @@ class DecOctet(DefaultMatchAll):
     """
 
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
         # A bit messy, but we follow the rules faithfully.
 
-        dig_1_match = Digit.match_from(val, 0)
-        dig_2_match = Digit.match_from(val, 1)
-        dig_3_match = Digit.match_from(val, 2)
+        dig_1_match = Digit.match_from(val, start)
+        dig_2_match = Digit.match_from(val, start + 1)
+        dig_3_match = Digit.match_from(val, start + 2)
 
         no_match = None
-        match_1 = MatchResult(start=0, length=1)
-        match_2 = MatchResult(start=0, length=2)
-        match_3 = MatchResult(start=0, length=3)
+        match_1 = MatchResult(start=start, length=1)
+        match_2 = MatchResult(start=start, length=2)
+        match_3 = MatchResult(start=start, length=3)
 
         if dig_1_match is None:
             # The first value is not a digit: no match
             return no_match
 
-        if Digit.byte_equals_digit(val[0], 0):
+        if Digit.byte_equals_digit(val[start], 0):
             # The first value is a 'zero', this is all it can match, as things
             # like '01' aren't defined to match the ABNF.
             return dig_1_match
-        elif Digit.byte_equals_digit(val[0], 1):
+        elif Digit.byte_equals_digit(val[start], 1):
             # The first value is a 1, see how many more digits follow it, there
             # is no restriction here up to length three as all values 100-199
             # are acceptable.
@@ -69,23 +77,23 @@ class DecOctet(DefaultMatchAll):
                 return match_2
             else:
                 return match_3
-        elif Digit.byte_equals_digit(val[0], 2):
+        elif Digit.byte_equals_digit(val[start], 2):
             # First digit is a 2, some special cases here:
             if dig_2_match is None:
                 # Not followed by another digit, return the first value.
                 return match_1
-            elif Digit.byte_in_range(val[1], 0, 4):
+            elif Digit.byte_in_range(val[start + 1], 0, 4):
                 # Followed by 0-4, see if any other digit follows, all values
                 # 200 to 249 are acceptable.
                 if dig_3_match is None:
                     return match_2
                 else:
                     return match_3
-            elif Digit.byte_equals_digit(val[1], 5):
+            elif Digit.byte_equals_digit(val[start + 1], 5):
                 # Followed by a 5, either followed by no digit, or 0-5.
                 if dig_3_match is None:
                     return match_2
-                elif Digit.byte_in_range(val[2], 0, 5):
+                elif Digit.byte_in_range(val[start + 2], 0, 5):
                     # The values 250-255
                     return match_3
                 else:
@@ -112,61 +120,88 @@ class IPv4Address(DefaultMatchAll):
     """
         dec-octet "." dec-octet "." dec-octet "." dec-octet
     """
+    dot_matcher = literal_compare(b".")
+
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        end = cls.match_end(val, start)
+        if end < 0:
+            return None
+        return MatchResult(start=start, length=end - start)
+
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        matched_length = 0
-        dot_matcher = literal_compare(b".")
+    def match_end(cls, val: bytes, start: int) -> int:
+        """
+        The end of the address from start, or -1, for alternations which
+        give the match their own result
+        """
+        offset = start
         for i in range(4):
-            dec_octet_match = DecOctet.match_from(val, matched_length)
+            dec_octet_match = DecOctet.match_from(val, offset)
             if dec_octet_match is None:
-                return None
+                return -1
             else:
-                matched_length += dec_octet_match.length
+                offset = dec_octet_match.end
 
             if i == 3:
-                return MatchResult(start=0, length=matched_length)
+                return offset
 
-            dot_match = dot_matcher.match_from(val, matched_length)
+            dot_match = cls.dot_matcher.match_from(val, offset)
             if dot_match is None:
-                return None
+                return -1
             else:
-                matched_length += dot_match.length
-        return None
+                offset = dot_match.end
+        return -1
 
 
-class LS32(DefaultMatchAll):
+class LS32(DefaultMatchAll[AlternationMatchResult]):
     """
         ls32        = ( h16 ":" h16 ) / IPv4address
+
+    The result's branch is h16_pair_branch or ipv4_branch.
     """
     colon_matcher = literal_compare(b":")
+    h16_pair_branch = 0
+    ipv4_branch = 1
 
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        return cls.h16_pair_match(val) or cls.ipv4_match(val)
+    def match_from(
+        cls, val: bytes, start: int
+    ) -> AlternationMatchResult | None:
+        return cls.h16_pair_match(val, start) or cls.ipv4_match(val, start)
 
     @classmethod
-    def h16_pair_match(cls, val: bytes) -> MatchResult | None:
-        h16_match = H16.match_start(val)
+    def h16_pair_match(
+        cls, val: bytes, start: int
+    ) -> AlternationMatchResult | None:
+        h16_match = H16.match_from(val, start)
         if h16_match is None:
             return None
 
-        matched_length = h16_match.length
-        colon_match = cls.colon_matcher.match_from(val, matched_length)
+        colon_match = cls.colon_matcher.match_from(val, h16_match.end)
         if colon_match is None:
             return None
 
-        matched_length += colon_match.length
-
-        h16_match = H16.match_from(val, matched_length)
+        h16_match = H16.match_from(val, colon_match.end)
         if h16_match is None:
             return None
         else:
-            matched_length += h16_match.length
-            return MatchResult(start=0, length=matched_length)
+            return AlternationMatchResult(
+                start=start,
+                length=h16_match.end - start,
+                branch=cls.h16_pair_branch,
+            )
 
     @classmethod
-    def ipv4_match(cls, val: bytes) -> MatchResult | None:
-        return IPv4Address.match_start(val)
+    def ipv4_match(
+        cls, val: bytes, start: int
+    ) -> AlternationMatchResult | None:
+        end = IPv4Address.match_end(val, start)
+        if end < 0:
+            return None
+        return AlternationMatchResult(
+            start=start, length=end - start, branch=cls.ipv4_branch
+        )
 
 
 class IPv6Address(DefaultMatchAll):
@@ -196,12 +231,12 @@ class IPv6Address(DefaultMatchAll):
     colon_matcher = literal_compare(b":").match_from
 
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
         # First see how many repeats of
         #     ( h16 ":" )
         # we can find, up to a maximum of 6.
         h16s_matched = 0
-        offset = 0
+        offset = start
 
         while h16s_matched < 6:
             h16_match_result = H16.match_from(val, offset)
@@ -224,7 +259,9 @@ class IPv6Address(DefaultMatchAll):
                 return None
             ls32_match_result = LS32.match_from(val, offset)
             if ls32_match_result:
-                return MatchResult(start=0, length=ls32_match_result.end)
+                return MatchResult(
+                    start=start, length=ls32_match_result.end - start
+                )
             # Otherwise it must end with (h16 "::")
             offset = h16_match_result.end
             for _ in range(2):
@@ -232,7 +269,7 @@ class IPv6Address(DefaultMatchAll):
                 if not colon_match_result:
                     return None
                 offset += colon_match_result.length
-            return MatchResult(start=0, length=offset)
+            return MatchResult(start=start, length=offset - start)
 
         # All remaining cases must have "::" at this point, if no colon
         # we return None
@@ -257,7 +294,9 @@ class IPv6Address(DefaultMatchAll):
         # just treat it as ending at the "::"
         h16_match_result = H16.match_from(val, colon_match_result.end)
         if not h16_match_result:
-            return MatchResult(start=0, length=colon_match_result.end)
+            return MatchResult(
+                start=start, length=colon_match_result.end - start
+            )
         h16_end = h16_match_result.end
 
         for i in range(6 - h16s_matched):
@@ -266,53 +305,49 @@ class IPv6Address(DefaultMatchAll):
             ls32_match_result = LS32.match_from(val, colon_match_result.end)
             if not ls32_match_result:
                 # If not, then the :h16 must have been the end of the address.
-                return MatchResult(start=0, length=h16_end)
+                return MatchResult(start=start, length=h16_end - start)
             # Did a colon follow the h16?
             colon_match_result = cls.colon_matcher(val, h16_end)
             ls32_end = ls32_match_result.end
             if not colon_match_result:
                 # If a colon didn't follow the h16, then the ls32 must have
                 # been in the ipv4 format, and this is the end of the address.
-                return MatchResult(start=0, length=ls32_end)
+                return MatchResult(start=start, length=ls32_end - start)
             # If a colon does follow the h16, then the ls32 must have been in
             # the (h16 : h16) form, so the ls32 also ends where a h16 ends, so
             # there is no need to test for a h16 here explicitly
             h16_end = ls32_end
 
-        return MatchResult(start=0, length=h16_end)
-
-
-class Unreserved(ConstantLength):
-    length = 1
+        return MatchResult(start=start, length=h16_end - start)
 
-    @classmethod
-    def match_length_correct(cls, val: bytes) -> bool:
-        if Alpha.match_full(val):
-            return True
-        elif Digit.match_full(val):
-            return True
-        elif val[0] in b"-._~":
-            return True
-        else:
-            return False
 
+class Unreserved(CharClass):
+    # unreserved  = ALPHA / DIGIT / "-" / "." / "_" / "~"
+    chars = (
+        b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+        b"0123456789-._~"
+    )
 
-class SubDelims(ConstantLength):
-    length = 1
 
-    @classmethod
-    def match_length_correct(cls, val: bytes) -> bool:
-        return val[0] in b"!$&'()*+,;="
+class SubDelims(CharClass):
+    """
+        sub-delims  = "!" / "$" / "&" / "'" / "(" / ")"
+                    / "*" / "+" / "," / ";" / "="
+    """
+    chars = b"!$&'()*+,;="
 
 
 class IPvFuture(DefaultMatchAll):
+    v_matcher = case_insensitive_compare(b"v")
+    full_stop_matcher = literal_compare(b".")
+    colon_matcher = literal_compare(b":")
 
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
         """
             IPvFuture  = "v" 1*HEXDIG "." 1*( unreserved / sub-delims / ":" )
         """
-        v_match_result = case_insensitive_compare(b"v").match_start(val)
+        v_match_result = cls.v_matcher.match_from(val, start)
         if not v_match_result:
             return None
 
@@ -330,7 +365,7 @@ class IPvFuture(DefaultMatchAll):
         if hex_matches == 0:
             return None
 
-        full_stop_match = literal_compare(b".").match_from(val, offset)
+        full_stop_match = cls.full_stop_matcher.match_from(val, offset)
         if not full_stop_match:
             return None
         offset = full_stop_match.end
@@ -347,7 +382,7 @@ class IPvFuture(DefaultMatchAll):
         if future_ip_matches == 0:
             return None
         else:
-            return MatchResult(start=0, length=offset)
+            return MatchResult(start=start, length=offset - start)
 
     @classmethod
     def future_ip_char_match(
@@ -358,43 +393,67 @@ class IPvFuture(DefaultMatchAll):
         ) or (
             SubDelims.match_from(val, offset)
         ) or (
-            literal_compare(b":").match_from(val, offset)
+            cls.colon_matcher.match_from(val, offset)
         )
 
 
-class IPLiteral(DefaultMatchAll):
+class HostKind(IntEnum):
+    """
+    The branch of host which matched, as the branch of Host's result
+    """
+    IPV6_ADDRESS = 0
+    IPVFUTURE = 1
+    IPV4_ADDRESS = 2
+    REG_NAME = 3
+
+
+class IPLiteral(DefaultMatchAll[AlternationMatchResult]):
+    """
+        IP-literal = "[" ( IPv6address / IPvFuture  ) "]"
+
+    The result's branch is HostKind.IPV6_ADDRESS or HostKind.IPVFUTURE.
+    """
+    opening_bracket_matcher = literal_compare(b"[")
+    closing_bracket_matcher = literal_compare(b"]")
+
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        opening_bracket_match = literal_compare(b"[").match_start(val)
+    def match_from(
+        cls, val: bytes, start: int
+    ) -> AlternationMatchResult | None:
+        opening_bracket_match = cls.opening_bracket_matcher.match_from(
+            val, start
+        )
         if not opening_bracket_match:
             return None
 
-        ip_match = cls.match_ip_part(val, opening_bracket_match.end)
+        branch = HostKind.IPV6_ADDRESS
+        ip_match = IPv6Address.match_from(val, opening_bracket_match.end)
         if not ip_match:
-            return None
+            branch = HostKind.IPVFUTURE
+            ip_match = IPvFuture.match_from(val, opening_bracket_match.end)
+            if not ip_match:
+                return None
 
-        closing_bracket_match = literal_compare(b"]").match_from(
+        closing_bracket_match = cls.closing_bracket_matcher.match_from(
             val, ip_match.end
         )
 
         if not closing_bracket_match:
             return None
         else:
-            return MatchResult(start=0, length=closing_bracket_match.end)
-
-    @classmethod
-    def match_ip_part(cls, val: bytes, start: int) -> MatchResult | None:
-        return (
-            IPv6Address.match_from(val, start)
-        ) or (
-            IPvFuture.match_from(val, start)
-        )
+            return AlternationMatchResult(
+                start=start,
+                length=closing_bracket_match.end - start,
+                branch=branch,
+            )
 
 
 class PctEncoded(DefaultMatchAll):
+    percent_matcher = literal_compare(b"%")
+
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        percent_match = literal_compare(b"%").match_start(val)
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        percent_match = cls.percent_matcher.match_from(val, start)
         if not percent_match:
             return None
 
@@ -405,18 +464,53 @@ class PctEncoded(DefaultMatchAll):
                 return None
             offset = hex_match.end
 
-        return MatchResult(start=0, length=offset)
+        return MatchResult(start=start, length=offset - start)
+
+
+class _RegNameChar(CharClass):
+    # reg-name other than pct-encoded
+    chars = Unreserved.chars + SubDelims.chars
+
+
+def _record_pct_run_failure(
+    val: Input, end: int, expected: tuple[str, ...]
+) -> None:
+    # Where a run of expected and pct-encoded scanned to end, what matching
+    # it part by part would have expected: another part, or the HEXDIG
+    # missing from an escape
+    _record_failure(end, PctEncoded.percent_matcher.__qualname__)
+    for name in expected:
+        _record_failure(end, name)
+    if val[end:end + 1] == b"%":
+        hex_end = end + 1
+        if HexDig.match_full(val[hex_end:hex_end + 1]):
+            hex_end += 1
+        _record_failure(hex_end, HexDig.__qualname__)
 
 
 class RegName(DefaultMatchAll):
+    """
+        reg-name    = *( unreserved / pct-encoded / sub-delims )
+    """
+    # The parts, which a failure says were expected
+    parts = (Unreserved.__qualname__, SubDelims.__qualname__)
+    text_input = True
+
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        offset = 0
-        while 1:
-            matched_part = cls.match_part(val, offset)
-            if not matched_part:
-                return MatchResult(start=0, length=offset)
-            offset = matched_part.end
+    def match_from(cls, val: Input, start: int) -> MatchResult:
+        end = cls.match_end(val, start)
+        return MatchResult(start=start, length=end - start)
+
+    @classmethod
+    def match_end(cls, val: Input, start: int) -> int:
+        """
+        The end of the reg-name from start, which always matches, for
+        alternations which give the match their own result
+        """
+        end = scan_percent_encoded(_RegNameChar, val, start).end
+        if _failure_gate.active:
+            _record_pct_run_failure(val, end, cls.parts)
+        return end
 
     @classmethod
     def match_part(cls, val: bytes, start: int) -> MatchResult | None:
@@ -429,13 +523,527 @@ class RegName(DefaultMatchAll):
         )
 
 
-class Host(DefaultMatchAll):
+class Host(DefaultMatchAll[AlternationMatchResult]):
+    """
+        host        = IP-literal / IPv4address / reg-name
+
+    The result's branch is the HostKind of the host, telling IPv6 addresses
+    and IPvFuture literals apart, so it needn't be matched again to find
+    out.
+    """
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        return (
-            IPLiteral.match_start(val)
-        ) or (
-            IPv4Address.match_start(val)
+    def match_from(
+        cls, val: bytes, start: int
+    ) -> AlternationMatchResult | None:
+        literal_match = IPLiteral.match_from(val, start)
+        if literal_match:
+            return literal_match
+
+        end = IPv4Address.match_end(val, start)
+        if end >= 0:
+            return AlternationMatchResult(
+                start=start, length=end - start, branch=HostKind.IPV4_ADDRESS
+            )
+
+        reg_name_match = RegName.match_from(val, start)
+        return AlternationMatchResult(
+            start=start,
+            length=reg_name_match.length,
+            branch=HostKind.REG_NAME,
+        )
+
+
+class _SchemeChar(CharClass):
+    chars = Unreserved.chars.replace(b"_", b"").replace(b"~", b"") + b"+"
+
+
+class _UserInfoChar(CharClass):
+    chars = Unreserved.chars + SubDelims.chars + b":"
+
+
+class _PChar(CharClass):
+    # pchar other than pct-encoded
+    chars = Unreserved.chars + SubDelims.chars + b":@"
+
+
+class _PCharNoColon(CharClass):
+    # segment-nz-nc other than pct-encoded
+    chars = Unreserved.chars + SubDelims.chars + b"@"
+
+
+class _QueryChar(CharClass):
+    chars = _PChar.chars + b"/?"
+
+
+class _PortChar(CharClass):
+    chars = b"0123456789"
+
+
+def _pct_run_end(char_class: type[CharClass], val: Input, start: int) -> int:
+    """
+    The end of a run of char_class and pct-encoded from start
+    """
+    end = scan_percent_encoded(char_class, val, start).end
+    if _failure_gate.active:
+        _record_pct_run_failure(val, end, (char_class.__qualname__,))
+    return end
+
+
+class Scheme(DefaultMatchAll):
+    """
+        scheme      = ALPHA *( ALPHA / DIGIT / "+" / "-" / "." )
+    """
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        alpha_match = Alpha.match_from(val, start)
+        if not alpha_match:
+            return None
+        end = _SchemeChar.run_end(val, alpha_match.end)
+        return MatchResult(start=start, length=end - start)
+
+
+class UserInfo(DefaultMatchAll):
+    """
+        userinfo    = *( unreserved / pct-encoded / sub-delims / ":" )
+    """
+    text_input = True
+
+    @classmethod
+    def match_from(cls, val: Input, start: int) -> MatchResult | None:
+        end = _pct_run_end(_UserInfoChar, val, start)
+        return MatchResult(start=start, length=end - start)
+
+
+class Port(DefaultMatchAll):
+    """
+        port        = *DIGIT
+    """
+    text_input = True
+
+    @classmethod
+    def match_from(cls, val: Input, start: int) -> MatchResult | None:
+        end = _PortChar.run_end(val, start)
+        return MatchResult(start=start, length=end - start)
+
+
+class AuthorityMatchResult(MatchResult):
+    userinfo: MatchResult | None
+    host: AlternationMatchResult
+    port: MatchResult | None
+
+    def __init__(
+        self,
+        *,
+        start: int,
+        length: int,
+        userinfo: MatchResult | None,
+        host: AlternationMatchResult,
+        port: MatchResult | None,
+    ):
+        self.userinfo = userinfo
+        self.host = host
+        self.port = port
+        super().__init__(start=start, length=length)
+
+
+class Authority(DefaultMatchAll[AuthorityMatchResult]):
+    """
+        authority   = [ userinfo "@" ] host [ ":" port ]
+
+    The result has the span of each part, with userinfo and port None when
+    they are left out. The host's branch is its HostKind.
+    """
+    at_matcher = literal_compare(b"@")
+    colon_matcher = literal_compare(b":")
+
+    @classmethod
+    def match_from(
+        cls, val: bytes, start: int
+    ) -> AuthorityMatchResult | None:
+        userinfo_match: MatchResult | None = None
+        host_start = start
+        userinfo_end = _pct_run_end(_UserInfoChar, val, start)
+        at_match = cls.at_matcher.match_from(val, userinfo_end)
+        if at_match:
+            userinfo_match = MatchResult(
+                start=start, length=userinfo_end - start
+            )
+            host_start = at_match.end
+
+        host_match = Host.match_from(val, host_start)
+        if not host_match:
+            return None
+        if host_match.end < len(val) and val[host_match.end] not in b":/?#":
+            # An IPv4address can be the start of a longer reg-name, which
+            # the grammar would backtrack to
+            reg_name_end = RegName.match_end(val, host_start)
+            if reg_name_end > host_match.end:
+                host_match = AlternationMatchResult(
+                    start=host_start,
+                    length=reg_name_end - host_start,
+                    branch=HostKind.REG_NAME,
+                )
+
+        end = host_match.end
+        port_match = None
+        colon_match = cls.colon_matcher.match_from(val, end)
+        if colon_match:
+            end = _PortChar.run_end(val, colon_match.end)
+            port_match = MatchResult(
+                start=colon_match.end, length=end - colon_match.end
+            )
+
+        return AuthorityMatchResult(
+            start=start,
+            length=end - start,
+            userinfo=userinfo_match,
+            host=host_match,
+            port=port_match,
+        )
+
+
+# "/" as a byte of bytes input, or a character of str input
+_slash_items = frozenset((b"/"[0], "/"))
+
+
+def _segments_end(val: Input, start: int) -> int:
+    # *( "/" segment )
+    offset = start
+    length = len(val)
+    while offset < length and val[offset] in _slash_items:
+        offset = _pct_run_end(_PChar, val, offset + 1)
+    return offset
+
+
+class PathAbEmpty(DefaultMatchAll):
+    """
+        path-abempty  = *( "/" segment )
+        segment       = *pchar
+    """
+    text_input = True
+
+    @classmethod
+    def match_from(cls, val: Input, start: int) -> MatchResult | None:
+        end = _segments_end(val, start)
+        return MatchResult(start=start, length=end - start)
+
+
+class PathAbsolute(DefaultMatchAll):
+    """
+        path-absolute = "/" [ segment-nz *( "/" segment ) ]
+        segment-nz    = 1*pchar
+    """
+    slash_matcher = literal_compare(b"/")
+    text_input = True
+
+    @classmethod
+    def match_from(cls, val: Input, start: int) -> MatchResult | None:
+        if start >= len(val) or val[start] not in _slash_items:
+            if _failure_gate.active:
+                _record_failure(
+                    min(start, len(val)), cls.slash_matcher.__qualname__
+                )
+            return None
+        end = start + 1
+        segment_end = _pct_run_end(_PChar, val, end)
+        if segment_end > end:
+            end = _segments_end(val, segment_end)
+        return MatchResult(start=start, length=end - start)
+
+
+class PathNoScheme(DefaultMatchAll):
+    """
+        path-noscheme = segment-nz-nc *( "/" segment )
+        segment-nz-nc = 1*( unreserved / pct-encoded / sub-delims / "@" )
+                      ; non-zero-length segment without any colon ":"
+    """
+    text_input = True
+
+    @classmethod
+    def match_from(cls, val: Input, start: int) -> MatchResult | None:
+        segment_end = _pct_run_end(_PCharNoColon, val, start)
+        if segment_end == start:
+            return None
+        end = _segments_end(val, segment_end)
+        return MatchResult(start=start, length=end - start)
+
+
+class PathRootless(DefaultMatchAll):
+    """
+        path-rootless = segment-nz *( "/" segment )
+    """
+    text_input = True
+
+    @classmethod
+    def match_from(cls, val: Input, start: int) -> MatchResult | None:
+        segment_end = _pct_run_end(_PChar, val, start)
+        if segment_end == start:
+            return None
+        end = _segments_end(val, segment_end)
+        return MatchResult(start=start, length=end - start)
+
+
+class Query(DefaultMatchAll):
+    """
+        query       = *( pchar / "/" / "?" )
+    """
+    text_input = True
+
+    @classmethod
+    def match_from(cls, val: Input, start: int) -> MatchResult | None:
+        end = _pct_run_end(_QueryChar, val, start)
+        return MatchResult(start=start, length=end - start)
+
+
+class Fragment(Query):
+    """
+        fragment    = *( pchar / "/" / "?" )
+    """
+
+
+class URIComponents(NamedTuple):
+    """
+    The start and end offsets of each component of a URI or relative
+    reference, -1 for components which are left out. The path is always
+    present, though it may be empty.
+    """
+    scheme_start: int
+    scheme_end: int
+    userinfo_start: int
+    userinfo_end: int
+    host_start: int
+    host_end: int
+    port_start: int
+    port_end: int
+    path_start: int
+    path_end: int
+    query_start: int
+    query_end: int
+    fragment_start: int
+    fragment_end: int
+
+    def component(self, val: bytes, name: str) -> bytes | None:
+        """
+        The named component ("scheme", "host", ...) of val, or None
+        """
+        start: int = getattr(self, f"{name}_start")
+        if start < 0:
+            return None
+        end: int = getattr(self, f"{name}_end")
+        return val[start:end]
+
+
+class URIMatchResult(MatchResult):
+    components: URIComponents
+    # The HostKind of the host, or None without an authority
+    host_kind: HostKind | None
+
+    def __init__(
+        self,
+        *,
+        start: int,
+        length: int,
+        components: URIComponents,
+        host_kind: HostKind | None,
+    ):
+        self.components = components
+        self.host_kind = host_kind
+        super().__init__(start=start, length=length)
+
+
+class URIReferenceMatchResult(URIMatchResult, AlternationMatchResult):
+    """
+    A URIMatchResult which is also the AlternationMatchResult of
+    URI-reference, with the branch which matched
+    """
+    def __init__(
+        self,
+        *,
+        start: int,
+        length: int,
+        components: URIComponents,
+        host_kind: HostKind | None,
+        branch: int,
+    ):
+        self.components = components
+        self.host_kind = host_kind
+        AlternationMatchResult.__init__(
+            self, start=start, length=length, branch=branch
+        )
+
+
+@overload
+def _match_reference(
+    val: bytes,
+    start: int,
+    *,
+    relative: bool,
+    fragment: bool = True,
+    branch: None = None,
+) -> URIMatchResult | None:
+    ...
+
+
+@overload
+def _match_reference(
+    val: bytes,
+    start: int,
+    *,
+    relative: bool,
+    fragment: bool = True,
+    branch: int,
+) -> URIReferenceMatchResult | None:
+    ...
+
+
+def _match_reference(
+    val: bytes,
+    start: int,
+    *,
+    relative: bool,
+    fragment: bool = True,
+    branch: int | None = None,
+) -> URIMatchResult | None:
+    """
+    URI (or absolute-URI, without the fragment) or, if relative, relative-ref.
+    With a branch, the result is a URIReferenceMatchResult with that branch,
+    so URIReference needn't build a second one.
+    """
+    scheme_start = scheme_end = -1
+    offset = start
+    if not relative:
+        scheme_match = Scheme.match_from(val, start)
+        if not scheme_match:
+            return None
+        scheme_start, scheme_end = scheme_match.start, scheme_match.end
+        colon_match = Authority.colon_matcher.match_from(val, scheme_end)
+        if not colon_match:
+            return None
+        offset = colon_match.end
+
+    userinfo_start = userinfo_end = host_start = host_end = -1
+    port_start = port_end = -1
+    host_kind = None
+    if val.startswith(b"//", offset):
+        # "//" authority path-abempty
+        authority_match = Authority.match_from(val, offset + 2)
+        if not authority_match:
+            return None
+        if authority_match.userinfo:
+            userinfo_start = authority_match.userinfo.start
+            userinfo_end = authority_match.userinfo.end
+        host_start = authority_match.host.start
+        host_end = authority_match.host.end
+        host_kind = HostKind(authority_match.host.branch)
+        if authority_match.port:
+            port_start = authority_match.port.start
+            port_end = authority_match.port.end
+        path_start = authority_match.end
+        path_end = _segments_end(val, path_start)
+    else:
+        # path-absolute / path-rootless (or path-noscheme) / path-empty
+        path_start = offset
+        path_match = (
+            PathAbsolute.match_from(val, offset)
         ) or (
-            RegName.match_start(val)
+            (PathNoScheme if relative else PathRootless).match_from(
+                val, offset
+            )
+        )
+        path_end = path_match.end if path_match else offset
+    offset = path_end
+
+    query_start = query_end = -1
+    if val.startswith(b"?", offset):
+        query_start = offset + 1
+        query_end = _pct_run_end(_QueryChar, val, query_start)
+        offset = query_end
+
+    fragment_start = fragment_end = -1
+    if fragment and val.startswith(b"#", offset):
+        fragment_start = offset + 1
+        fragment_end = _pct_run_end(_QueryChar, val, fragment_start)
+        offset = fragment_end
+
+    components = URIComponents(
+        scheme_start, scheme_end,
+        userinfo_start, userinfo_end,
+        host_start, host_end,
+        port_start, port_end,
+        path_start, path_end,
+        query_start, query_end,
+        fragment_start, fragment_end,
+    )
+    if branch is not None:
+        return URIReferenceMatchResult(
+            start=start,
+            length=offset - start,
+            components=components,
+            host_kind=host_kind,
+            branch=branch,
+        )
+    return URIMatchResult(
+        start=start,
+        length=offset - start,
+        components=components,
+        host_kind=host_kind,
+    )
+
+
+class URI(DefaultMatchAll[URIMatchResult]):
+    """
+        URI         = scheme ":" hier-part [ "?" query ] [ "#" fragment ]
+
+        hier-part   = "//" authority path-abempty
+                    / path-absolute
+                    / path-rootless
+                    / path-empty
+
+    The result has the offsets of every component, found in the same pass.
+    """
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> URIMatchResult | None:
+        return _match_reference(val, start, relative=False)
+
+
+class AbsoluteURI(DefaultMatchAll[URIMatchResult]):
+    """
+        absolute-URI  = scheme ":" hier-part [ "?" query ]
+    """
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> URIMatchResult | None:
+        return _match_reference(val, start, relative=False, fragment=False)
+
+
+class RelativeRef(DefaultMatchAll[URIMatchResult]):
+    """
+        relative-ref  = relative-part [ "?" query ] [ "#" fragment ]
+
+        relative-part = "//" authority path-abempty
+                      / path-absolute
+                      / path-noscheme
+                      / path-empty
+    """
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> URIMatchResult | None:
+        return _match_reference(val, start, relative=True)
+
+
+class URIReference(DefaultMatchAll[URIReferenceMatchResult]):
+    """
+        URI-reference = URI / relative-ref
+
+    The result's branch is uri_branch or relative_ref_branch.
+    """
+    uri_branch = 0
+    relative_ref_branch = 1
+
+    @classmethod
+    def match_from(
+        cls, val: bytes, start: int
+    ) -> URIReferenceMatchResult | None:
+        return _match_reference(
+            val, start, relative=False, branch=cls.uri_branch
+        ) or _match_reference(
+            val, start, relative=True, branch=cls.relative_ref_branch
         )
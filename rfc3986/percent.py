@@ -0,0 +1,144 @@
+from typing import Any, NamedTuple
+
+from generic import CharClass, _budget_gate, _charge_step
+
+
+Buffer = bytes | bytearray
+
+percent = b"%"
+_percent_octet = percent[0]
+
+
+class _HexDigChar(CharClass):
+    chars = b"0123456789ABCDEFabcdef"
+
+
+# The value of each hex digit, by byte
+_hex_values = bytes(
+    int(bytes([i]), 16) if _HexDigChar.table[i] else 0 for i in range(256)
+)
+
+
+class PercentEncodingError(ValueError):
+    """
+    Text which isn't valid percent-encoded text. offset is the position in
+    the buffer of the first byte which couldn't be accepted, the "%" of an
+    invalid escape.
+    """
+    def __init__(self, message: str, offset: int):
+        super().__init__(f"{message} at offset {offset}")
+        self.offset = offset
+
+
+class PercentScan(NamedTuple):
+    # The offset of the first byte which isn't part of the valid text
+    end: int
+    # Whether the valid text held any pct-encoded escapes
+    escaped: bool
+    # The length of the valid text once decoded
+    decoded_length: int
+
+
+def scan_percent_encoded(
+    char_class: type[CharClass],
+    val: Buffer | str,
+    start: int = 0,
+    end: int | None = None,
+    *,
+    into: bytearray | None = None,
+) -> PercentScan:
+    """
+    Scan the run of char_class and pct-encoded from start, stopping at end,
+    the end of val by default:
+
+        *( char_class / pct-encoded )
+        pct-encoded = "%" HEXDIG HEXDIG
+
+    The run of char_class is matched in one go, and an escape is only
+    looked for where it stops, so text without escapes is scanned without
+    a Python level loop, and no further than it reaches. val may also be
+    str, scanned over its characters, when it isn't decoded.
+
+    If into is given the text is also decoded into it, from its start, in
+    the same pass. into must be at least end - start bytes long, and is only
+    written to if an escape is found: otherwise the text decodes to itself,
+    and the caller can use it as it is.
+    """
+    if end is None:
+        end = len(val)
+    if into is not None:
+        if isinstance(val, str):
+            raise TypeError("Only bytes can be decoded into a buffer")
+        if len(into) < end - start:
+            raise ValueError("Buffer too short to decode into")
+        view = memoryview(val)
+
+    # A bytes or a str pattern, to match val with
+    run_pattern: Any
+    if isinstance(val, str):
+        run_pattern = char_class.run_text_pattern
+        percent_item: int | str = "%"
+    else:
+        run_pattern = char_class.run_pattern
+        percent_item = _percent_octet
+    hex_items = _HexDigChar.items
+    escaped = False
+    decoded_length = 0
+    offset = start
+    while 1:
+        run = run_pattern.match(val, offset, end)
+        escape = offset if run is None else run.end()
+        if _budget_gate.active:
+            # A step per escape, each a pass of this loop, and one for each
+            # byte of the run before it
+            _charge_step(1 + escape - offset)
+        if (
+            escape + 3 > end
+        ) or (
+            val[escape] != percent_item
+        ) or not (
+            val[escape + 1] in hex_items and val[escape + 2] in hex_items
+        ):
+            # The end of the valid text
+            run_length = escape - offset
+            if escaped and into is not None:
+                into[decoded_length:decoded_length + run_length] = (
+                    view[offset:escape]
+                )
+            return PercentScan(escape, escaped, decoded_length + run_length)
+
+        run_length = escape - offset
+        if into is not None:
+            into[decoded_length:decoded_length + run_length] = (
+                view[offset:escape]
+            )
+            into[decoded_length + run_length] = (
+                _hex_values[view[escape + 1]] << 4
+            ) | _hex_values[view[escape + 2]]
+        decoded_length += run_length + 1
+        escaped = True
+        offset = escape + 3
+
+
+def percent_decode(
+    char_class: type[CharClass],
+    val: Buffer,
+    start: int = 0,
+    end: int | None = None,
+) -> bytes:
+    """
+    Decode val[start:end], which must be made up of char_class and
+    pct-encoded, raising PercentEncodingError if it isn't.
+
+    Text without escapes is returned without decoding it.
+    """
+    if end is None:
+        end = len(val)
+    into = bytearray(end - start)
+    scan = scan_percent_encoded(char_class, val, start, end, into=into)
+    if scan.end != end:
+        raise PercentEncodingError("Invalid percent-encoded text", scan.end)
+    if not scan.escaped:
+        return bytes(val[start:end])
+    del into[scan.decoded_length:]
+    return bytes(into)
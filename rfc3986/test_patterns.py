@@ -1,10 +1,21 @@
 from unittest import TestCase
 
-from generic import MatchResult
+from generic import AlternationMatchResult, END_OF_INPUT, MatchResult
 from rfc3986.patterns import (
+    AbsoluteURI,
+    Authority,
+    PathAbEmpty,
+    PathAbsolute,
+    PathNoScheme,
+    RelativeRef,
+    Scheme,
+    URI,
+    URIReference,
+
     DecOctet,
     H16,
     Host,
+    HostKind,
     IPLiteral,
     IPv4Address,
     IPv6Address,
@@ -123,6 +134,17 @@ class TestLS32(TestCase):
 
         self.assertFalse(LS32.match_full(b"0.256.0.0"))
 
+    def test_branch(self) -> None:
+        for val, branch in [
+            (b"1:1", LS32.h16_pair_branch),
+            (b"1.2.11.255", LS32.ipv4_branch),
+        ]:
+            with self.subTest(val=val):
+                match_result = LS32.match_start(val)
+                assert match_result is not None
+                self.assertIs(type(match_result), AlternationMatchResult)
+                self.assertEqual(match_result.branch, branch)
+
 
 class TestIPv6Address(TestCase):
     def test_ipv6_address(self) -> None:
@@ -373,6 +395,35 @@ class TestRegName(TestCase):
         self.assertFalse(RegName.match_full(b'"'))
         self.assertFalse(RegName.match_full(b'['))
 
+    def test_match_start(self) -> None:
+        for val, end in [
+            (b"a%41b", 5), (b"a%4", 1), (b"a%4gb", 1), (b"ab cd", 2),
+            (b"x%20", 4), (b"%%", 0),
+        ]:
+            with self.subTest(val=val):
+                match_result = RegName.match_start(val)
+                assert match_result is not None
+                self.assertEqual(match_result.end, end)
+                # match_failure takes the same path
+                failure = RegName.match_failure(val)
+                self.assertEqual(failure is None, end == len(val))
+
+    def test_match_failure(self) -> None:
+        # The parts expected where the scan stopped, or the missing HEXDIG
+        for val, position, expected in [
+            (
+                b"ab cd", 2,
+                {END_OF_INPUT, "LiteralCompare<%>", "SubDelims", "Unreserved"},
+            ),
+            (b"a%4gb", 3, {"HexDig"}),
+            (b"a%", 2, {"HexDig"}),
+        ]:
+            with self.subTest(val=val):
+                failure = RegName.match_failure(val)
+                assert failure is not None
+                self.assertEqual(failure.position, position)
+                self.assertEqual(failure.expected, expected)
+
 
 class TestHost(TestCase):
     def test_host(self) -> None:
@@ -388,3 +439,213 @@ class TestHost(TestCase):
         self.assertFalse(Host.match_full(b"[]"))
         self.assertFalse(Host.match_full(b"[abc"))
         self.assertFalse(Host.match_full(b"[::"))
+
+    def test_host_kind(self) -> None:
+        for val, kind in [
+            (b"[::1]", HostKind.IPV6_ADDRESS),
+            (b"[v1.x]", HostKind.IPVFUTURE),
+            (b"127.0.0.1", HostKind.IPV4_ADDRESS),
+            (b"example.com", HostKind.REG_NAME),
+            (b"", HostKind.REG_NAME),
+        ]:
+            with self.subTest(val=val):
+                match_result = Host.match_start(val)
+                assert match_result is not None
+                self.assertIs(type(match_result), AlternationMatchResult)
+                self.assertEqual(match_result.length, len(val))
+                self.assertIs(HostKind(match_result.branch), kind)
+
+    def test_host_failure(self) -> None:
+        self.assertIsNone(Host.match_failure(b"[::1]"))
+
+        failure = Host.match_failure(b"exa mple.com")
+        assert failure is not None
+        self.assertEqual(failure.position, 3)
+        self.assertEqual(
+            failure.expected,
+            {END_OF_INPUT, "LiteralCompare<%>", "SubDelims", "Unreserved"},
+        )
+
+        failure = Host.match_failure(b"[::1")
+        assert failure is not None
+        self.assertEqual(failure.position, 4)
+        self.assertIn("LiteralCompare<]>", failure.expected)
+
+        failure = Host.match_failure(b"[1:2:3:4:5:6:7:8x]")
+        assert failure is not None
+        self.assertEqual(failure.position, 16)
+        self.assertIn("HexDig", failure.expected)
+
+    def test_host_match_from(self) -> None:
+        match_result = Host.match_from(b"http://[::1]:80/", 7)
+        assert isinstance(match_result, MatchResult)
+        self.assertEqual(match_result.start, 7)
+        self.assertEqual(match_result.end, 12)
+
+
+class TestScheme(TestCase):
+    def test_scheme(self) -> None:
+        self.assertTrue(Scheme.match_full(b"http"))
+        self.assertTrue(Scheme.match_full(b"svn+ssh"))
+        self.assertTrue(Scheme.match_full(b"a.b-1"))
+        self.assertFalse(Scheme.match_full(b"1a"))
+        self.assertFalse(Scheme.match_full(b"a_b"))
+        self.assertFalse(Scheme.match_full(b""))
+
+
+class TestAuthority(TestCase):
+    def test_authority(self) -> None:
+        val = b"user:pw@example.com:8080"
+        match_result = Authority.match_start(val)
+        assert match_result is not None
+        self.assertEqual(match_result.length, len(val))
+        assert match_result.userinfo is not None
+        assert match_result.port is not None
+        self.assertEqual(
+            val[match_result.userinfo.start:match_result.userinfo.end],
+            b"user:pw",
+        )
+        self.assertEqual(
+            val[match_result.host.start:match_result.host.end],
+            b"example.com",
+        )
+        self.assertEqual(
+            val[match_result.port.start:match_result.port.end], b"8080"
+        )
+
+        match_result = Authority.match_start(b"[::1]")
+        assert match_result is not None
+        self.assertIsNone(match_result.userinfo)
+        self.assertIsNone(match_result.port)
+        self.assertEqual(match_result.host.length, 5)
+
+        # An IPv4address prefix doesn't stop a longer reg-name
+        self.assertTrue(Authority.match_full(b"1.2.3.4.example:80"))
+        self.assertTrue(Authority.match_full(b"example.com:"))
+        self.assertFalse(Authority.match_full(b"a@b@c"))
+        self.assertFalse(Authority.match_full(b"example.com:8o"))
+
+
+class TestPaths(TestCase):
+    def test_path_absolute(self) -> None:
+        self.assertTrue(PathAbsolute.match_full(b"/"))
+        self.assertTrue(PathAbsolute.match_full(b"/a/b//c"))
+        self.assertFalse(PathAbsolute.match_full(b"//a"))
+        self.assertFalse(PathAbsolute.match_full(b"a"))
+
+    def test_long_paths(self) -> None:
+        # Paths with no pct-encoded, a segment at a time
+        val = b"/a" * 100_000
+        self.assertTrue(PathAbEmpty.match_full(val))
+        self.assertTrue(PathAbsolute.match_full(val))
+        self.assertTrue(URI.match_full(b"http://h" + val))
+        self.assertFalse(PathAbEmpty.match_full(val + b" "))
+
+    def test_path_noscheme(self) -> None:
+        self.assertTrue(PathNoScheme.match_full(b"a/b:c"))
+        self.assertFalse(PathNoScheme.match_full(b"a:b/c"))
+
+
+class TestURI(TestCase):
+    def test_components(self) -> None:
+        val = b"https://user@example.com:8443/a/b?q=1&r#frag"
+        match_result = URI.match_start(val)
+        assert match_result is not None
+        self.assertEqual(match_result.length, len(val))
+        components = match_result.components
+        for name, expected in [
+            ("scheme", b"https"),
+            ("userinfo", b"user"),
+            ("host", b"example.com"),
+            ("port", b"8443"),
+            ("path", b"/a/b"),
+            ("query", b"q=1&r"),
+            ("fragment", b"frag"),
+        ]:
+            self.assertEqual(components.component(val, name), expected)
+        self.assertIs(match_result.host_kind, HostKind.REG_NAME)
+
+        for val, kind in [
+            (b"http://[::1]/", HostKind.IPV6_ADDRESS),
+            (b"http://10.0.0.1:80/", HostKind.IPV4_ADDRESS),
+            # An IPv4address prefix of a reg-name
+            (b"http://10.0.0.1.example/", HostKind.REG_NAME),
+        ]:
+            with self.subTest(val=val):
+                match_result = URI.match_start(val)
+                assert match_result is not None
+                self.assertEqual(match_result.length, len(val))
+                self.assertIs(match_result.host_kind, kind)
+
+        match_result = URI.match_start(b"mailto:user@example.com")
+        assert match_result is not None
+        components = match_result.components
+        self.assertEqual(components.host_start, -1)
+        self.assertIsNone(match_result.host_kind)
+        self.assertEqual(
+            components.component(b"mailto:user@example.com", "path"),
+            b"user@example.com",
+        )
+
+    def test_uri(self) -> None:
+        for val in [
+            b"ftp://ftp.is.co.za/rfc/rfc1808.txt",
+            b"http://www.ietf.org/rfc/rfc2396.txt",
+            b"ldap://[2001:db8::7]/c=GB?objectClass?one",
+            b"mailto:John.Doe@example.com",
+            b"news:comp.infosystems.www.servers.unix",
+            b"tel:+1-816-555-1212",
+            b"telnet://192.0.2.16:80/",
+            b"urn:oasis:names:specification:docbook:dtd:xml:4.1.2",
+            b"file:///etc/hosts",
+            b"a:",
+        ]:
+            with self.subTest(val=val):
+                self.assertTrue(URI.match_full(val))
+                self.assertTrue(URIReference.match_full(val))
+
+        self.assertFalse(URI.match_full(b"//example.com"))
+        self.assertFalse(URI.match_full(b"http://exa mple.com"))
+        self.assertFalse(URI.match_full(b"http://a/#b#c"))
+        self.assertFalse(URI.match_full(b"http://[::1/"))
+
+    def test_absolute_uri(self) -> None:
+        self.assertTrue(AbsoluteURI.match_full(b"http://a/b?c"))
+        self.assertFalse(AbsoluteURI.match_full(b"http://a/b?c#d"))
+
+    def test_relative_ref(self) -> None:
+        # The examples from section 5.4
+        for val in [
+            b"g", b"./g", b"g/", b"/g", b"//g", b"?y", b"g?y", b"#s",
+            b"g#s", b"g?y#s", b";x", b"g;x", b"g;x?y#s", b"", b".", b"./",
+            b"..", b"../", b"../g", b"../..", b"../../", b"../../g",
+        ]:
+            with self.subTest(val=val):
+                self.assertTrue(RelativeRef.match_full(val))
+                self.assertTrue(URIReference.match_full(val))
+
+        self.assertFalse(RelativeRef.match_full(b"g:h"))
+        self.assertTrue(URIReference.match_full(b"g:h"))
+
+        match_result = URIReference.match_start(b"g:h")
+        assert match_result is not None
+        self.assertIsInstance(match_result, AlternationMatchResult)
+        self.assertEqual(match_result.branch, URIReference.uri_branch)
+
+        match_result = URIReference.match_start(b"//host:1/p?q")
+        assert match_result is not None
+        self.assertEqual(
+            match_result.branch, URIReference.relative_ref_branch
+        )
+        self.assertIs(match_result.host_kind, HostKind.REG_NAME)
+        components = match_result.components
+        self.assertEqual(components.scheme_start, -1)
+        self.assertEqual(
+            (components.host_start, components.host_end), (2, 6)
+        )
+        self.assertEqual(
+            (components.port_start, components.port_end), (7, 8)
+        )
+        self.assertEqual(
+            (components.path_start, components.path_end), (8, 10)
+        )
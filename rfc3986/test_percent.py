@@ -0,0 +1,105 @@
+import timeit
+from unittest import TestCase
+from urllib.parse import unquote_to_bytes
+
+from rfc3986.patterns import Unreserved
+from rfc3986.percent import (
+    PercentEncodingError,
+    percent_decode,
+    scan_percent_encoded,
+)
+
+
+valid = [
+    b"",
+    b"abc",
+    b"%41",
+    b"a%2fb",
+    b"%e2%82%AC",
+    b"%00%ff%25",
+    b"caf%C3%A9-au-lait",
+    b"%20%20",
+]
+
+# (text, offset the valid text ends at)
+invalid = [
+    (b"a b", 1),
+    (b"%", 0),
+    (b"%4", 0),
+    (b"a%4g", 1),
+    (b"%41%zz", 3),
+    (b"%41/", 3),
+    (b"ab%", 2),
+]
+
+
+class TestScanPercentEncoded(TestCase):
+    def test_valid(self) -> None:
+        for text in valid:
+            with self.subTest(text=text):
+                into = bytearray(len(text))
+                scan = scan_percent_encoded(Unreserved, text, into=into)
+                self.assertEqual(scan.end, len(text))
+                self.assertEqual(scan.escaped, b"%" in text)
+                decoded = unquote_to_bytes(text)
+                self.assertEqual(scan.decoded_length, len(decoded))
+                if scan.escaped:
+                    self.assertEqual(into[:scan.decoded_length], decoded)
+                else:
+                    # Nothing to decode, so into is left alone
+                    self.assertEqual(into, bytes(len(text)))
+
+    def test_invalid(self) -> None:
+        for text, end in invalid:
+            with self.subTest(text=text):
+                scan = scan_percent_encoded(Unreserved, text)
+                self.assertEqual(scan.end, end)
+                self.assertEqual(
+                    scan.decoded_length, len(unquote_to_bytes(text[:end]))
+                )
+
+    def test_bounds(self) -> None:
+        val = bytearray(b"x/a%41b/%zz")
+        scan = scan_percent_encoded(Unreserved, val, 2, 7)
+        self.assertEqual(scan, (7, True, 3))
+
+        # An escape cut off by end isn't valid
+        scan = scan_percent_encoded(Unreserved, val, 2, 5)
+        self.assertEqual(scan, (3, False, 1))
+
+        with self.assertRaises(ValueError):
+            scan_percent_encoded(Unreserved, val, 2, 7, into=bytearray(4))
+
+    def test_scans_no_further_than_the_run(self) -> None:
+        # Scanning a short run takes no longer before a long tail without
+        # escapes, so scanning segment by segment stays linear
+        def seconds(val: bytes) -> float:
+            return min(
+                timeit.repeat(
+                    lambda: scan_percent_encoded(Unreserved, val, 1),
+                    number=10,
+                    repeat=5,
+                )
+            )
+
+        short = b"/a/"
+        long = short + b"a" * (1 << 24)
+        self.assertEqual(scan_percent_encoded(Unreserved, long, 1).end, 2)
+        self.assertLess(seconds(long), seconds(short) * 20)
+
+
+class TestPercentDecode(TestCase):
+    def test_decode(self) -> None:
+        for text in valid:
+            with self.subTest(text=text):
+                self.assertEqual(
+                    percent_decode(Unreserved, text), unquote_to_bytes(text)
+                )
+        self.assertEqual(percent_decode(Unreserved, b"/a%41b/", 1, 6), b"aAb")
+
+    def test_invalid(self) -> None:
+        for text, end in invalid:
+            with self.subTest(text=text):
+                with self.assertRaises(PercentEncodingError) as context:
+                    percent_decode(Unreserved, text)
+                self.assertEqual(context.exception.offset, end)
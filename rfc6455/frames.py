@@ -0,0 +1,273 @@
+import enum
+import struct
+from typing import NamedTuple
+
+try:
+    import numpy as _numpy  # type: ignore[import-not-found, unused-ignore]
+except ImportError:
+    _numpy = None  # type: ignore[assignment, unused-ignore]
+
+
+Buffer = bytes | bytearray | memoryview
+
+
+class Opcode(enum.IntEnum):
+    CONTINUATION = 0x0
+    TEXT = 0x1
+    BINARY = 0x2
+    CLOSE = 0x8
+    PING = 0x9
+    PONG = 0xA
+
+
+_known_opcodes = frozenset(Opcode)
+
+fin_bit = 0x80
+rsv_bits = 0x70
+opcode_bits = 0x0F
+mask_bit = 0x80
+payload_length_bits = 0x7F
+
+control_opcode_bit = 0x08
+max_control_payload_length = 125
+
+_uint16 = struct.Struct("!H")
+_uint32 = struct.Struct("!I")
+_uint64 = struct.Struct("!Q")
+
+# Payloads are unmasked this many bytes at a time, bounding the size of the
+# temporary integers. A multiple of 4 so every chunk starts at the same phase.
+unmask_chunk_size = 64 * 1024
+# Below these lengths the setup costs more than it saves, so shorter payloads
+# are unmasked a byte at a time, and with integers rather than NumPy.
+_short_unmask_length = 12
+_numpy_unmask_length = 1024
+
+
+class FrameError(ValueError):
+    """
+    A frame header breaking section 5 of RFC 6455. The connection should be
+    failed with status code 1002 (protocol error).
+    """
+
+
+class FrameHeader(NamedTuple):
+    """
+    A parsed frame header. Offsets are into the buffer that was parsed, so
+    the payload is buffer[payload_start:payload_end] without being copied
+    until it is sliced.
+
+    masking_key is the 32 bit key as a big endian integer, or None for an
+    unmasked frame.
+    """
+    fin: bool
+    rsv: int
+    opcode: int
+    masking_key: int | None
+    payload_length: int
+    header_start: int
+    payload_start: int
+
+    @property
+    def masked(self) -> bool:
+        return self.masking_key is not None
+
+    @property
+    def payload_end(self) -> int:
+        return self.payload_start + self.payload_length
+
+    @property
+    def is_control(self) -> bool:
+        return bool(self.opcode & control_opcode_bit)
+
+
+class FrameScan(NamedTuple):
+    """
+    The complete frames found in a buffer. 'end' is the offset just past the
+    last complete frame, where parsing should resume once 'needed' more bytes
+    have been received (0 if the buffer ended on a frame boundary).
+    """
+    headers: list[FrameHeader]
+    end: int
+    needed: int
+
+
+def parse_frame_header(
+    buffer: Buffer,
+    offset: int = 0,
+    *,
+    allowed_rsv: int = 0,
+    require_mask: bool | None = None,
+) -> FrameHeader | int:
+    """
+    Parse the frame header starting at offset in buffer, returning it or, if
+    the buffer ends part way through the header, the number of bytes still
+    needed. Nothing is sliced or copied from the buffer.
+
+    allowed_rsv are the RSV bits (as they appear in the first byte, so 0x40
+    for RSV1) which negotiated extensions give a meaning to. require_mask is
+    True for servers, which must only receive masked frames, and False for
+    clients, which must only receive unmasked ones.
+
+    Raises FrameError for headers which break the protocol.
+    """
+    available = len(buffer) - offset
+    if available < 2:
+        return 2 - available
+
+    first_byte = buffer[offset]
+    second_byte = buffer[offset + 1]
+
+    rsv = first_byte & rsv_bits
+    if rsv & ~allowed_rsv:
+        raise FrameError("Reserved bits set without an extension")
+    opcode = first_byte & opcode_bits
+    if opcode not in _known_opcodes:
+        raise FrameError(f"Reserved opcode {opcode:#x}")
+    fin = bool(first_byte & fin_bit)
+
+    masked = bool(second_byte & mask_bit)
+    if require_mask is not None and masked != require_mask:
+        raise FrameError(
+            "Unmasked frame from a client" if require_mask
+            else "Masked frame from a server"
+        )
+
+    payload_length = second_byte & payload_length_bits
+    header_length = 2
+    if payload_length == 126:
+        header_length = 4
+    elif payload_length == 127:
+        header_length = 10
+    if masked:
+        header_length += 4
+
+    if available < header_length:
+        return header_length - available
+
+    if payload_length == 126:
+        payload_length = _uint16.unpack_from(buffer, offset + 2)[0]
+        if payload_length < 126:
+            raise FrameError("Payload length not minimally encoded")
+    elif payload_length == 127:
+        payload_length = _uint64.unpack_from(buffer, offset + 2)[0]
+        if payload_length >> 63:
+            raise FrameError("Most significant bit of payload length set")
+        if payload_length <= 0xFFFF:
+            raise FrameError("Payload length not minimally encoded")
+
+    if opcode & control_opcode_bit:
+        if not fin:
+            raise FrameError("Fragmented control frame")
+        if payload_length > max_control_payload_length:
+            raise FrameError("Control frame payload too long")
+
+    if masked:
+        masking_key: int | None = _uint32.unpack_from(
+            buffer, offset + header_length - 4
+        )[0]
+    else:
+        masking_key = None
+
+    return FrameHeader(
+        fin=fin,
+        rsv=rsv,
+        opcode=opcode,
+        masking_key=masking_key,
+        payload_length=payload_length,
+        header_start=offset,
+        payload_start=offset + header_length,
+    )
+
+
+def parse_frames(
+    buffer: Buffer,
+    offset: int = 0,
+    *,
+    allowed_rsv: int = 0,
+    require_mask: bool | None = None,
+) -> FrameScan:
+    """
+    Parse the header of every complete frame in buffer from offset onwards,
+    in one call. The arguments are as for parse_frame_header.
+    """
+    headers: list[FrameHeader] = []
+    length = len(buffer)
+    while offset < length:
+        header = parse_frame_header(
+            buffer,
+            offset,
+            allowed_rsv=allowed_rsv,
+            require_mask=require_mask,
+        )
+        if isinstance(header, int):
+            return FrameScan(headers, offset, header)
+        payload_end = header.payload_start + header.payload_length
+        if payload_end > length:
+            return FrameScan(headers, offset, payload_end - length)
+        headers.append(header)
+        offset = payload_end
+    return FrameScan(headers, offset, 0)
+
+
+def frame_payload(buffer: Buffer, header: FrameHeader) -> memoryview:
+    """
+    A view of the frame's (still masked) payload, without copying it
+    """
+    return memoryview(buffer)[header.payload_start:header.payload_end]
+
+
+def unmask(
+    buffer: bytearray | memoryview,
+    masking_key: int,
+    phase: int = 0,
+    start: int = 0,
+    end: int | None = None,
+) -> int:
+    """
+    XOR buffer[start:end] in place with the masking key, as in section 5.3,
+    where phase is the position within the key of the first byte. Returns
+    the phase of the byte following end, so a payload received in pieces can
+    be unmasked a piece at a time. Masking and unmasking are the same.
+
+    Each chunk is XORed as one big integer, or as a NumPy array when NumPy
+    is installed, rather than a byte at a time. buffer must be writable.
+    """
+    view = memoryview(buffer)
+    if view.format != "B":
+        view = view.cast("B")
+    if start or end is not None:
+        view = view[start:end]
+    length = len(view)
+
+    key = _uint32.pack(masking_key)
+    if phase:
+        key = key[phase:] + key[:phase]
+
+    if length < _short_unmask_length:
+        for index in range(length):
+            view[index] ^= key[index & 3]
+        return (phase + length) & 3
+
+    chunk_size = min((length + 3) & ~3, unmask_chunk_size)
+    chunk_mask = key * (chunk_size >> 2)
+
+    if _numpy is not None and length >= _numpy_unmask_length:
+        mask_array = _numpy.frombuffer(chunk_mask, dtype=_numpy.uint8)
+        for offset in range(0, length, chunk_size):
+            data = _numpy.frombuffer(
+                view[offset:offset + chunk_size], dtype=_numpy.uint8
+            )
+            data ^= mask_array[:len(data)]
+    else:
+        mask_int = int.from_bytes(chunk_mask)
+        for offset in range(0, length, chunk_size):
+            chunk = view[offset:offset + chunk_size]
+            chunk_length = len(chunk)
+            # The last chunk may be short: keep the leading mask bytes
+            chunk[:] = (
+                int.from_bytes(chunk)
+                ^ mask_int >> ((chunk_size - chunk_length) << 3)
+            ).to_bytes(chunk_length)
+
+    return (phase + length) & 3
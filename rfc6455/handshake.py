@@ -0,0 +1,197 @@
+import binascii
+import enum
+import hashlib
+from typing import Iterable, Iterator, Sequence
+
+from rfc2616.patterns import TChar
+from rfc6455.patterns import SecWebSocketKey, SecWebSocketVersion
+
+
+# Appended to the Sec-WebSocket-Key before hashing, section 1.3
+accept_guid = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+supported_versions = (b"13",)
+
+token_chars = TChar.chars
+whitespace_chars = b" \t"
+
+_token_list_chars = token_chars + whitespace_chars + b","
+_product_list_chars = _token_list_chars + b"/"
+
+
+class HandshakeError(enum.Enum):
+    INVALID_KEY = "invalid Sec-WebSocket-Key"
+    INVALID_VERSION = "invalid Sec-WebSocket-Version"
+    # The server should respond with 426 and its Sec-WebSocket-Version
+    UNSUPPORTED_VERSION = "unsupported Sec-WebSocket-Version"
+    INVALID_UPGRADE = "Upgrade does not include websocket"
+    INVALID_CONNECTION = "Connection does not include Upgrade"
+    INVALID_PROTOCOL = "invalid Sec-WebSocket-Protocol"
+    INVALID_ACCEPT = "Sec-WebSocket-Accept does not match the key"
+
+
+def compute_accept(key: bytes) -> bytes:
+    """
+    The Sec-WebSocket-Accept value for a Sec-WebSocket-Key: the base64 of
+    the SHA-1 of the key followed by the GUID.
+    """
+    digest = hashlib.sha1(key)
+    digest.update(accept_guid)
+    return binascii.b2a_base64(digest.digest(), newline=False)
+
+
+def _element_offsets(val: bytes) -> Iterator[tuple[int, int]]:
+    """
+    The (start, end) offsets of each non-empty element of a comma separated
+    list, without the optional whitespace around it.
+    """
+    length = len(val)
+    start = 0
+    while start <= length:
+        end = val.find(b",", start)
+        if end < 0:
+            end = length
+        next_start = end + 1
+        while start < end and val[start] in whitespace_chars:
+            start += 1
+        while end > start and val[end - 1] in whitespace_chars:
+            end -= 1
+        if start < end:
+            yield start, end
+        start = next_start
+
+
+def token_list_valid(val: bytes, *, products: bool = False) -> bool:
+    """
+    Whether val is a comma separated list of tokens, RFC 2616's 1#token,
+    with optional whitespace around the elements and empty elements allowed.
+
+    With products, elements may be a product (token ["/" product-version]),
+    as in the Upgrade header.
+    """
+    if val.translate(
+        None, _product_list_chars if products else _token_list_chars
+    ):
+        return False
+
+    have_element = False
+    for start, end in _element_offsets(val):
+        have_element = True
+        if (
+            val.find(b" ", start, end) >= 0
+        ) or (
+            val.find(b"\t", start, end) >= 0
+        ):
+            return False
+        if products:
+            slash = val.find(b"/", start, end)
+            if slash >= 0 and (
+                slash == start
+                or slash == end - 1
+                or val.find(b"/", slash + 1, end) >= 0
+            ):
+                return False
+    return have_element
+
+
+def token_list_contains(
+    val: bytes, token: bytes, *, products: bool = False
+) -> bool | None:
+    """
+    Whether the token list val contains token, compared case-insensitively.
+    token must be lower case. With products, only the token part of each
+    product is compared. None if the list is malformed.
+
+    Elements are compared by offset, so nothing is allocated per element.
+    """
+    if not token_list_valid(val, products=products):
+        return None
+    lowered = val.lower()
+    for start, end in _element_offsets(val):
+        if products:
+            slash = val.find(b"/", start, end)
+            if slash >= 0:
+                end = slash
+        if end - start == len(token) and lowered.startswith(token, start):
+            return True
+    return False
+
+
+def select_protocol(
+    val: bytes, supported: Sequence[bytes]
+) -> bytes | None:
+    """
+    The first subprotocol in the client's Sec-WebSocket-Protocol list which
+    is also in supported, or None. Subprotocol names are case-sensitive.
+    """
+    if not token_list_valid(val):
+        return None
+    for start, end in _element_offsets(val):
+        for protocol in supported:
+            if end - start == len(protocol) and val.startswith(
+                protocol, start
+            ):
+                return protocol
+    return None
+
+
+def validate_client_handshake(
+    key: bytes,
+    version: bytes,
+    upgrade: bytes,
+    connection: bytes,
+    protocol: bytes | None = None,
+) -> bytes | HandshakeError:
+    """
+    Check the WebSocket header fields of a client's opening handshake,
+    returning the Sec-WebSocket-Accept value for the response, or the first
+    problem found.
+
+    protocol is the Sec-WebSocket-Protocol value, if the client sent one.
+    """
+    if not SecWebSocketKey.match_full(key):
+        return HandshakeError.INVALID_KEY
+    if version not in supported_versions:
+        if SecWebSocketVersion.match_full(version):
+            return HandshakeError.UNSUPPORTED_VERSION
+        return HandshakeError.INVALID_VERSION
+    if not token_list_contains(upgrade, b"websocket", products=True):
+        return HandshakeError.INVALID_UPGRADE
+    if not token_list_contains(connection, b"upgrade"):
+        return HandshakeError.INVALID_CONNECTION
+    if protocol is not None and not token_list_valid(protocol):
+        return HandshakeError.INVALID_PROTOCOL
+    return compute_accept(key)
+
+
+def validate_client_handshakes(
+    handshakes: Iterable[
+        tuple[bytes, bytes, bytes, bytes]
+        | tuple[bytes, bytes, bytes, bytes, bytes | None]
+    ],
+) -> list[bytes | HandshakeError]:
+    """
+    validate_client_handshake for each tuple of its arguments
+    """
+    validate = validate_client_handshake
+    return [validate(*handshake) for handshake in handshakes]
+
+
+def validate_server_handshake(
+    key: bytes,
+    accept: bytes,
+    upgrade: bytes,
+    connection: bytes,
+) -> HandshakeError | None:
+    """
+    Check the WebSocket header fields of a server's opening handshake
+    response to a request which sent key, returning the first problem found
+    or None.
+    """
+    if not token_list_contains(upgrade, b"websocket", products=True):
+        return HandshakeError.INVALID_UPGRADE
+    if not token_list_contains(connection, b"upgrade"):
+        return HandshakeError.INVALID_CONNECTION
+    if accept != compute_accept(key):
+        return HandshakeError.INVALID_ACCEPT
+    return None
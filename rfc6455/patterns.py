@@ -1,23 +1,29 @@
-from rfc2234.patterns import Alpha, Digit
+import binascii
+
 from generic import (
     ConstantLength,
     DefaultMatchAll,
+    Input,
     MatchResult,
+    text_octets,
     literal_compare,
 )
 
+from rfc3986.patterns import DecOctet
+
+
+# base64-char = ALPHA / DIGIT / "+" / "/"
+base64_alphabet = (
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+)
+
 
 class Base64Char(ConstantLength):
     length = 1
 
     @classmethod
     def match_length_correct(cls, val: bytes) -> bool:
-        return (
-            Alpha.match_full(val)
-            or Digit.match_full(val)
-            or literal_compare(b"+").match_full(val)
-            or literal_compare(b"/").match_full(val)
-        )
+        return val[0] in base64_alphabet
 
 
 class Base64Data(ConstantLength):
@@ -25,7 +31,8 @@ class Base64Data(ConstantLength):
 
     @classmethod
     def match_length_correct(cls, val: bytes) -> bool:
-        return all(Base64Char.match_from(val, i) for i in range(cls.length))
+        # Deleting every base64-char leaves nothing
+        return not val.translate(None, base64_alphabet)
 
 
 class Base64Padding(ConstantLength):
@@ -39,13 +46,9 @@ class Base64Padding(ConstantLength):
 
     @classmethod
     def match_n_padding(cls, val: bytes, n: int) -> bool:
-        data_part = all(
-            Base64Char.match_from(val, i)
-            for i in range(cls.length - n)
-        )
-        padding_part = all(
-            cls.padding_matcher.match_from(val, i)
-            for i in range(cls.length - n, cls.length)
+        data_part = not val[:cls.length - n].translate(None, base64_alphabet)
+        padding_part = (
+            val[cls.length - n:] == cls.padding_matcher.str_to_match * n
         )
         return data_part and padding_part
 
@@ -55,25 +58,99 @@ class Base64ValueNonEmpty(DefaultMatchAll):
         base64-value-non-empty = (1*base64-data [ base64-padding ]) |
                                  base64-padding
     """
+    padding_char = b"="[0]
+
+    @classmethod
+    def match_full(cls, val: Input) -> bool:
+        if isinstance(val, str):
+            octets = text_octets(val)
+            if octets is None:
+                return False
+            val = octets
+        # Equivalent to matching the quads one by one, but done by C level
+        # bytes methods: the value is a whole number of quads, and deleting
+        # every base64-char must leave just the padding at the end.
+        length = len(val)
+        if length == 0 or length % 4:
+            return False
+        padding_length = 0
+        if val[-1] == cls.padding_char:
+            padding_length = 2 if val[-2] == cls.padding_char else 1
+        return val.translate(None, base64_alphabet) == b"=" * padding_length
+
     @classmethod
-    def match_start(cls, val: bytes) -> MatchResult | None:
-        matched_length = 0
+    def decode_full(cls, val: bytes) -> bytes | None:
+        """
+        As match_full, but return the decoded bytes when the whole value
+        matches, or None. Validating and decoding are the same pass: strict
+        binascii decoding accepts exactly this grammar, apart from the empty
+        value.
+        """
+        if not val:
+            return None
+        try:
+            return binascii.a2b_base64(val, strict_mode=True)
+        except binascii.Error:
+            return None
+
+    @classmethod
+    def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+        offset = start
         while 1:
-            data_result = Base64Data.match_from(val, matched_length)
+            data_result = Base64Data.match_from(val, offset)
             if data_result is not None:
-                matched_length += data_result.length
+                offset = data_result.end
             else:
                 break
-        padding_result = Base64Padding.match_from(val, matched_length)
-        if matched_length == 0:
+        padding_result = Base64Padding.match_from(val, offset)
+        if offset == start:
             # Only a match if the padding was found
             return padding_result
         else:
             # Already have a match. Extend match if there is also padding.
             if padding_result is not None:
-                matched_length += padding_result.length
-            return MatchResult(start=0, length=matched_length)
+                offset = padding_result.end
+            return MatchResult(start=start, length=offset - start)
 
 
 class SecWebSocketAccept(Base64ValueNonEmpty):
     ...
+
+
+class SecWebSocketKey(ConstantLength):
+    """
+        Sec-WebSocket-Key = base64-value-non-empty
+        and:
+            The request MUST include a header field with the name
+            |Sec-WebSocket-Key|.  The value of this header field MUST be a
+            nonce consisting of a randomly selected 16-byte value that has
+            been base64-encoded
+
+        A 16 byte value is always 22 base64-chars followed by "==". The
+        last of them holds the last 2 bits of the value, and 4 zero bits, so
+        is one of final_chars.
+    """
+    length = 24
+    final_chars = b"AQgw"
+
+    @classmethod
+    def match_length_correct(cls, val: bytes) -> bool:
+        return (
+            val.endswith(b"==")
+        ) and (
+            val[21] in cls.final_chars
+        ) and (
+            not val[:21].translate(None, base64_alphabet)
+        )
+
+
+class SecWebSocketVersion(DecOctet):
+    """
+        Sec-WebSocket-Version-Client = version
+
+        version = DIGIT | (NZDIGIT DIGIT) |
+                  ("1" DIGIT DIGIT) | ("2" DIGIT DIGIT)
+                  ; Limited to 0-255 range, with no leading zeros
+
+        which, with its range limit, is the same as rfc3986's dec-octet.
+    """
@@ -0,0 +1,246 @@
+from importlib.util import find_spec
+from unittest import TestCase, mock, skipUnless
+
+from benchmarks.unmasking import unmask_per_byte
+
+from rfc6455.frames import (
+    FrameError,
+    FrameHeader,
+    Opcode,
+    frame_payload,
+    parse_frame_header,
+    parse_frames,
+    unmask,
+    unmask_chunk_size,
+)
+
+
+# The examples from section 5.7
+unmasked_text = b"\x81\x05Hello"
+masked_text = b"\x81\x85\x37\xfa\x21\x3d\x7f\x9f\x4d\x51\x58"
+fragmented_text = b"\x01\x03Hel\x80\x02lo"
+unmasked_ping = b"\x89\x05Hello"
+binary_256 = b"\x82\x7e\x01\x00" + bytes(256)
+binary_64k = b"\x82\x7f\x00\x00\x00\x00\x00\x01\x00\x00" + bytes(65536)
+
+
+class TestParseFrameHeader(TestCase):
+    def test_rfc_examples(self) -> None:
+        self.assertEqual(
+            parse_frame_header(unmasked_text),
+            FrameHeader(
+                fin=True,
+                rsv=0,
+                opcode=Opcode.TEXT,
+                masking_key=None,
+                payload_length=5,
+                header_start=0,
+                payload_start=2,
+            ),
+        )
+
+        header = parse_frame_header(masked_text)
+        assert isinstance(header, FrameHeader)
+        self.assertTrue(header.masked)
+        self.assertEqual(header.masking_key, 0x37FA213D)
+        self.assertEqual(header.payload_start, 6)
+        self.assertEqual(header.payload_end, 11)
+
+        header = parse_frame_header(fragmented_text)
+        assert isinstance(header, FrameHeader)
+        self.assertFalse(header.fin)
+        self.assertEqual(header.opcode, Opcode.TEXT)
+        header = parse_frame_header(fragmented_text, 5)
+        assert isinstance(header, FrameHeader)
+        self.assertTrue(header.fin)
+        self.assertEqual(header.opcode, Opcode.CONTINUATION)
+        self.assertEqual(header.header_start, 5)
+        self.assertEqual(header.payload_start, 7)
+
+        header = parse_frame_header(unmasked_ping)
+        assert isinstance(header, FrameHeader)
+        self.assertTrue(header.is_control)
+        self.assertEqual(header.opcode, Opcode.PING)
+
+        header = parse_frame_header(binary_256)
+        assert isinstance(header, FrameHeader)
+        self.assertEqual(header.payload_length, 256)
+        self.assertEqual(header.payload_start, 4)
+
+        header = parse_frame_header(binary_64k)
+        assert isinstance(header, FrameHeader)
+        self.assertEqual(header.payload_length, 65536)
+        self.assertEqual(header.payload_start, 10)
+
+    def test_buffer_types(self) -> None:
+        expected = parse_frame_header(masked_text)
+        assert isinstance(expected, FrameHeader)
+        self.assertEqual(
+            parse_frame_header(bytearray(masked_text)), expected
+        )
+        self.assertEqual(
+            parse_frame_header(memoryview(masked_text)), expected
+        )
+        self.assertEqual(
+            parse_frame_header(b"junk" + masked_text, 4),
+            expected._replace(header_start=4, payload_start=10),
+        )
+
+    def test_partial_header(self) -> None:
+        self.assertEqual(parse_frame_header(b""), 2)
+        self.assertEqual(parse_frame_header(b"\x81"), 1)
+        self.assertEqual(parse_frame_header(masked_text[:2]), 4)
+        self.assertEqual(parse_frame_header(masked_text[:5]), 1)
+        self.assertEqual(parse_frame_header(binary_256[:3]), 1)
+        self.assertEqual(parse_frame_header(binary_64k[:2]), 8)
+        self.assertEqual(parse_frame_header(b"\x82\xff" + bytes(8)), 4)
+        self.assertEqual(parse_frame_header(masked_text, 10), 1)
+        # Only the header is needed, not the payload
+        self.assertIsInstance(
+            parse_frame_header(binary_64k[:10]), FrameHeader
+        )
+
+    def test_protocol_errors(self) -> None:
+        for frame in [
+            b"\xc1\x00",  # RSV1
+            b"\x83\x00",  # Reserved data opcode
+            b"\x8b\x00",  # Reserved control opcode
+            b"\x09\x00",  # Fragmented ping
+            b"\x89\x7e\x00\x7e" + bytes(126),  # Control payload too long
+            b"\x82\x7e\x00\x7d",  # 16 bit length under 126
+            b"\x82\x7f" + bytes(6) + b"\xff\xff",  # 64 bit length under 64K
+            b"\x82\x7f\x80" + bytes(7),  # Most significant bit set
+        ]:
+            with self.subTest(frame=frame):
+                with self.assertRaises(FrameError):
+                    parse_frame_header(frame)
+
+    def test_extensions_and_masking(self) -> None:
+        header = parse_frame_header(b"\xc1\x00", allowed_rsv=0x40)
+        assert isinstance(header, FrameHeader)
+        self.assertEqual(header.rsv, 0x40)
+        with self.assertRaises(FrameError):
+            parse_frame_header(b"\xe1\x00", allowed_rsv=0x40)
+
+        self.assertIsInstance(
+            parse_frame_header(masked_text, require_mask=True), FrameHeader
+        )
+        self.assertIsInstance(
+            parse_frame_header(unmasked_text, require_mask=False),
+            FrameHeader,
+        )
+        with self.assertRaises(FrameError):
+            parse_frame_header(unmasked_text, require_mask=True)
+        with self.assertRaises(FrameError):
+            parse_frame_header(masked_text, require_mask=False)
+
+
+class TestParseFrames(TestCase):
+    def test_parse_frames(self) -> None:
+        buffer = bytearray(
+            fragmented_text + unmasked_ping + masked_text + binary_256
+        )
+        scan = parse_frames(buffer)
+        self.assertEqual(
+            [header.opcode for header in scan.headers],
+            [Opcode.TEXT, Opcode.CONTINUATION, Opcode.PING, Opcode.TEXT,
+             Opcode.BINARY],
+        )
+        self.assertEqual(scan.end, len(buffer))
+        self.assertEqual(scan.needed, 0)
+        self.assertEqual(
+            b"".join(
+                frame_payload(buffer, header) for header in scan.headers[:2]
+            ),
+            b"Hello",
+        )
+
+    def test_incomplete_frames(self) -> None:
+        buffer = memoryview(unmasked_text + binary_256[:100])
+        scan = parse_frames(buffer)
+        self.assertEqual(len(scan.headers), 1)
+        self.assertEqual(scan.end, len(unmasked_text))
+        self.assertEqual(scan.needed, 256 + 4 - 100)
+
+        scan = parse_frames(unmasked_text + b"\x81")
+        self.assertEqual(len(scan.headers), 1)
+        self.assertEqual(scan.end, len(unmasked_text))
+        self.assertEqual(scan.needed, 1)
+
+        scan = parse_frames(unmasked_text, len(unmasked_text))
+        self.assertEqual(scan, ([], len(unmasked_text), 0))
+
+    def test_payload_not_copied(self) -> None:
+        buffer = bytearray(unmasked_text)
+        header = parse_frame_header(buffer)
+        assert isinstance(header, FrameHeader)
+        payload = frame_payload(buffer, header)
+        self.assertEqual(payload, b"Hello")
+        buffer[2] = ord("J")
+        self.assertEqual(payload, b"Jello")
+
+
+class TestUnmask(TestCase):
+    def test_rfc_example(self) -> None:
+        buffer = bytearray(masked_text)
+        header = parse_frame_header(buffer)
+        assert isinstance(header, FrameHeader) and header.masking_key
+        phase = unmask(
+            buffer, header.masking_key, 0,
+            header.payload_start, header.payload_end,
+        )
+        self.assertEqual(phase, 1)
+        self.assertEqual(buffer, masked_text[:6] + b"Hello")
+
+    def test_matches_per_byte(self) -> None:
+        for length in [0, 1, 3, 4, 5, 31, unmask_chunk_size - 1,
+                       unmask_chunk_size, unmask_chunk_size * 2 + 5]:
+            data = bytearray(range(256)) * (length // 256 + 1)
+            del data[length:]
+            for phase in range(4):
+                with self.subTest(length=length, phase=phase):
+                    expected = bytearray(data)
+                    expected_phase = unmask_per_byte(
+                        expected, 0x01234567, phase
+                    )
+                    buffer = bytearray(data)
+                    self.assertEqual(
+                        unmask(buffer, 0x01234567, phase), expected_phase
+                    )
+                    self.assertEqual(buffer, expected)
+
+    @skipUnless(find_spec("numpy"), "NumPy is not installed")
+    def test_numpy_matches_integers(self) -> None:
+        for length in [1024, 1027, unmask_chunk_size * 2 + 5]:
+            data = bytearray(range(256)) * (length // 256 + 1)
+            del data[length:]
+            for phase in range(4):
+                with self.subTest(length=length, phase=phase):
+                    expected = bytearray(data)
+                    with mock.patch("rfc6455.frames._numpy", None):
+                        expected_phase = unmask(expected, 0x01234567, phase)
+                    buffer = bytearray(data)
+                    self.assertEqual(
+                        unmask(buffer, 0x01234567, phase), expected_phase
+                    )
+                    self.assertEqual(buffer, expected)
+
+    def test_continuation(self) -> None:
+        data = bytes(range(256)) * 4
+        expected = bytearray(data)
+        unmask(expected, 0xDEADBEEF)
+
+        buffer = bytearray(data)
+        view = memoryview(buffer)
+        phase = 0
+        for start, end in [(0, 3), (3, 3), (3, 130), (130, 1000),
+                           (1000, 1024)]:
+            phase = unmask(view[start:end], 0xDEADBEEF, phase)
+        self.assertEqual(phase, 0)
+        self.assertEqual(buffer, expected)
+
+        # And within one buffer
+        buffer = bytearray(data)
+        phase = unmask(buffer, 0xDEADBEEF, 0, 0, 517)
+        unmask(buffer, 0xDEADBEEF, phase, 517)
+        self.assertEqual(buffer, expected)
@@ -0,0 +1,191 @@
+import base64
+from unittest import TestCase
+
+from rfc6455.handshake import (
+    HandshakeError,
+    compute_accept,
+    select_protocol,
+    token_list_contains,
+    token_list_valid,
+    validate_client_handshake,
+    validate_client_handshakes,
+    validate_server_handshake,
+)
+from rfc6455.patterns import (
+    SecWebSocketKey,
+    SecWebSocketVersion,
+    base64_alphabet,
+)
+
+
+# The example from section 1.3
+key = b"dGhlIHNhbXBsZSBub25jZQ=="
+accept = b"s3pPLMBiTxaQ9kYGzzhZRbK+xOo="
+
+
+class TestSecWebSocketKey(TestCase):
+    def test_sec_websocket_key(self) -> None:
+        self.assertTrue(SecWebSocketKey.match_full(key))
+        self.assertTrue(
+            SecWebSocketKey.match_full(b"AQIDBAUGBwgJCgsMDQ4PEA==")
+        )
+        # Base64 of more than 16 bytes' bits: "C" has bits set past them
+        self.assertFalse(
+            SecWebSocketKey.match_full(b"AQIDBAUGBwgJCgsMDQ4PEC==")
+        )
+
+        self.assertFalse(SecWebSocketKey.match_full(b""))
+        self.assertFalse(SecWebSocketKey.match_full(accept))
+        self.assertFalse(SecWebSocketKey.match_full(b"QUJD" * 6))
+        self.assertFalse(SecWebSocketKey.match_full(key[:-1]))
+        self.assertFalse(SecWebSocketKey.match_full(key + b"="))
+        self.assertFalse(
+            SecWebSocketKey.match_full(b"dGhlIHNhbXBsZSBub25jZ-==")
+        )
+
+    def test_only_16_byte_values(self) -> None:
+        # Exactly the keys which decode to 16 bytes and encode back the same
+        for final_char in base64_alphabet:
+            val = key[:21] + bytes([final_char]) + b"=="
+            with self.subTest(val=val):
+                self.assertEqual(
+                    SecWebSocketKey.match_full(val),
+                    base64.b64encode(base64.b64decode(val)) == val,
+                )
+
+
+class TestSecWebSocketVersion(TestCase):
+    def test_sec_websocket_version(self) -> None:
+        self.assertTrue(SecWebSocketVersion.match_full(b"13"))
+        self.assertTrue(SecWebSocketVersion.match_full(b"0"))
+        self.assertTrue(SecWebSocketVersion.match_full(b"255"))
+
+        self.assertFalse(SecWebSocketVersion.match_full(b"013"))
+        self.assertFalse(SecWebSocketVersion.match_full(b"256"))
+        self.assertFalse(SecWebSocketVersion.match_full(b""))
+
+
+class TestTokenLists(TestCase):
+    def test_token_list_valid(self) -> None:
+        self.assertTrue(token_list_valid(b"chat"))
+        self.assertTrue(token_list_valid(b"chat, superchat"))
+        self.assertTrue(token_list_valid(b" chat ,\tsuperchat , "))
+        self.assertTrue(token_list_valid(b",,chat"))
+
+        self.assertFalse(token_list_valid(b""))
+        self.assertFalse(token_list_valid(b" , "))
+        self.assertFalse(token_list_valid(b"super chat"))
+        self.assertFalse(token_list_valid(b"chat; q=1"))
+        self.assertFalse(token_list_valid(b"chat/1"))
+
+        self.assertTrue(token_list_valid(b"websocket/13", products=True))
+        self.assertFalse(token_list_valid(b"websocket/", products=True))
+        self.assertFalse(token_list_valid(b"/13", products=True))
+        self.assertFalse(token_list_valid(b"a/b/c", products=True))
+
+    def test_token_list_contains(self) -> None:
+        self.assertTrue(token_list_contains(b"Upgrade", b"upgrade"))
+        self.assertTrue(
+            token_list_contains(b"keep-alive, Upgrade", b"upgrade")
+        )
+        self.assertFalse(token_list_contains(b"keep-alive", b"upgrade"))
+        self.assertFalse(token_list_contains(b"upgrades", b"upgrade"))
+        self.assertIsNone(token_list_contains(b"keep alive", b"upgrade"))
+
+        self.assertTrue(
+            token_list_contains(b"WebSocket", b"websocket", products=True)
+        )
+        self.assertTrue(
+            token_list_contains(
+                b"h2c, websocket/13", b"websocket", products=True
+            )
+        )
+        self.assertFalse(
+            token_list_contains(b"websocket/13", b"websocket")
+        )
+
+    def test_select_protocol(self) -> None:
+        self.assertEqual(
+            select_protocol(b"chat, superchat", [b"superchat", b"chat"]),
+            b"chat",
+        )
+        self.assertEqual(
+            select_protocol(b"v1.proto, v2.proto", [b"v2.proto"]),
+            b"v2.proto",
+        )
+        self.assertIsNone(select_protocol(b"Chat", [b"chat"]))
+        self.assertIsNone(select_protocol(b"chat superchat", [b"chat"]))
+
+
+class TestHandshake(TestCase):
+    def test_compute_accept(self) -> None:
+        self.assertEqual(compute_accept(key), accept)
+
+    def test_validate_client_handshake(self) -> None:
+        self.assertEqual(
+            validate_client_handshake(key, b"13", b"websocket", b"Upgrade"),
+            accept,
+        )
+        self.assertEqual(
+            validate_client_handshake(
+                key, b"13", b"WebSocket", b"keep-alive, Upgrade",
+                b"chat, superchat",
+            ),
+            accept,
+        )
+
+        self.assertIs(
+            validate_client_handshake(
+                key[:-1], b"13", b"websocket", b"Upgrade"
+            ),
+            HandshakeError.INVALID_KEY,
+        )
+        self.assertIs(
+            validate_client_handshake(key, b"8", b"websocket", b"Upgrade"),
+            HandshakeError.UNSUPPORTED_VERSION,
+        )
+        self.assertIs(
+            validate_client_handshake(key, b"013", b"websocket", b"Upgrade"),
+            HandshakeError.INVALID_VERSION,
+        )
+        self.assertIs(
+            validate_client_handshake(key, b"13", b"h2c", b"Upgrade"),
+            HandshakeError.INVALID_UPGRADE,
+        )
+        self.assertIs(
+            validate_client_handshake(
+                key, b"13", b"websocket", b"keep-alive"
+            ),
+            HandshakeError.INVALID_CONNECTION,
+        )
+        self.assertIs(
+            validate_client_handshake(
+                key, b"13", b"websocket", b"Upgrade", b"chat; v=1"
+            ),
+            HandshakeError.INVALID_PROTOCOL,
+        )
+
+    def test_validate_client_handshakes(self) -> None:
+        self.assertEqual(
+            validate_client_handshakes([
+                (key, b"13", b"websocket", b"Upgrade"),
+                (key, b"12", b"websocket", b"Upgrade"),
+                (key, b"13", b"websocket", b"Upgrade", b"chat"),
+            ]),
+            [accept, HandshakeError.UNSUPPORTED_VERSION, accept],
+        )
+
+    def test_validate_server_handshake(self) -> None:
+        self.assertIsNone(
+            validate_server_handshake(key, accept, b"websocket", b"Upgrade")
+        )
+        self.assertIs(
+            validate_server_handshake(
+                key, accept[:-1] + b"A", b"websocket", b"Upgrade"
+            ),
+            HandshakeError.INVALID_ACCEPT,
+        )
+        self.assertIs(
+            validate_server_handshake(key, accept, b"websocket", b"close"),
+            HandshakeError.INVALID_CONNECTION,
+        )
@@ -1,3 +1,4 @@
+import itertools
 from unittest import TestCase
 
 from generic import MatchResult
@@ -7,6 +8,7 @@ from rfc6455.patterns import (
     Base64Data,
     Base64Padding,
     Base64ValueNonEmpty,
+    SecWebSocketAccept,
 )
 
 
@@ -78,7 +80,7 @@ class TestB64ValueNonEmpty(TestCase):
             b"ZWRuYW1vZGU6bm9jYXBlcyE="
         ))
         self.assertTrue(Base64ValueNonEmpty.match_full(
-            b"AQIDBAUGBwgJCgsMDQ4PEC=="
+            b"AQIDBAUGBwgJCgsMDQ4PEA=="
         ))
         self.assertTrue(Base64ValueNonEmpty.match_full(
             b"Um9iZXJ0IFJveWFscw=="
@@ -102,3 +104,40 @@ class TestB64ValueNonEmpty(TestCase):
         self.assertIsNotNone(match_result)
         assert isinstance(match_result, MatchResult)
         self.assertEqual(match_result.length, 24)
+
+    def test_match_full_agrees_with_match_start(self) -> None:
+        # match_full has its own implementation, check it against matching
+        # the quads one at a time for every short string over a small
+        # alphabet.
+        for length in range(9):
+            for chars in itertools.product(b"A/=!", repeat=length):
+                val = bytes(chars)
+                match_result = Base64ValueNonEmpty.match_start(val)
+                expected = (
+                    match_result is not None
+                ) and (
+                    match_result.length == len(val)
+                )
+                self.assertEqual(
+                    Base64ValueNonEmpty.match_full(val), expected, val
+                )
+                self.assertEqual(
+                    Base64ValueNonEmpty.decode_full(val) is not None,
+                    expected,
+                    val,
+                )
+
+    def test_decode_full(self) -> None:
+        self.assertEqual(
+            Base64ValueNonEmpty.decode_full(b"dGhlIHNhbXBsZSBub25jZQ=="),
+            b"the sample nonce",
+        )
+        self.assertEqual(Base64ValueNonEmpty.decode_full(b"QUI="), b"AB")
+        self.assertIsNone(Base64ValueNonEmpty.decode_full(b""))
+        self.assertIsNone(Base64ValueNonEmpty.decode_full(b"QUI"))
+        self.assertIsNone(Base64ValueNonEmpty.decode_full(b"QU=I"))
+        self.assertIsNone(Base64ValueNonEmpty.decode_full(b"QUI=\n"))
+        self.assertEqual(
+            SecWebSocketAccept.decode_full(b"s3pPLMBiTxaQ9kYGzzhZRbK+xOo="),
+            bytes.fromhex("b37a4f2cc0624f1690f64606cf385945b2bec4ea"),
+        )
@@ -0,0 +1,81 @@
+from unittest import TestCase
+
+from rfc6455.utf8 import Buffer, Utf8Validator
+
+
+def decode_error_offset(val: bytes) -> int | None:
+    try:
+        val.decode("utf-8")
+    except UnicodeDecodeError as error:
+        return error.start
+    return None
+
+
+samples = [
+    b"",
+    b"Hello",
+    "κόσμε".encode(),
+    "€ and 😀 and ߿￿\U0010ffff".encode(),
+    b"a\xc0\x80",  # Overlong NUL
+    b"ab\xe0\x80\xaf",  # Overlong /
+    b"abc\xf0\x80\x80\xaf",  # Overlong /
+    b"\xed\xa0\x80x",  # Surrogate
+    b"x\xed\xbf\xbf",  # Surrogate
+    b"\xf4\x90\x80\x80",  # Above U+10FFFF
+    b"\xf5\x80\x80\x80",
+    b"\xff",
+    b"\x80",
+    b"abc\xe2\x82",  # Truncated
+    b"\xf0\x9f\x98",  # Truncated
+    b"\xe2\x82A",
+    "😀".encode() + b"\xed\xa0",
+]
+
+
+class TestUtf8Validator(TestCase):
+    def test_whole(self) -> None:
+        for sample in samples:
+            with self.subTest(sample=sample):
+                validator = Utf8Validator()
+                valid = validator.feed(sample) and validator.finish()
+                self.assertEqual(
+                    validator.error_offset, decode_error_offset(sample)
+                )
+                self.assertEqual(valid, validator.error_offset is None)
+
+    def test_chunks(self) -> None:
+        for sample in samples:
+            expected = decode_error_offset(sample)
+            for first in range(len(sample) + 1):
+                for second in range(first, len(sample) + 1):
+                    with self.subTest(sample=sample, split=(first, second)):
+                        validator = Utf8Validator()
+                        chunks: list[Buffer] = [
+                            sample[:first],
+                            bytearray(sample[first:second]),
+                            memoryview(sample)[second:],
+                        ]
+                        for chunk in chunks:
+                            validator.feed(chunk)
+                        validator.finish()
+                        self.assertEqual(validator.error_offset, expected)
+
+    def test_fails_early(self) -> None:
+        validator = Utf8Validator()
+        self.assertTrue(validator.feed(b"abc"))
+        self.assertFalse(validator.feed(b"d\xed\xa0"))
+        self.assertEqual(validator.error_offset, 4)
+        self.assertFalse(validator.feed(b"more"))
+        self.assertFalse(validator.finish())
+
+        # A surrogate split between chunks is caught from its first two bytes
+        validator.reset()
+        self.assertTrue(validator.feed(b"x\xed"))
+        self.assertFalse(validator.feed(b"\xa0"))
+        self.assertEqual(validator.error_offset, 1)
+
+        validator.reset()
+        self.assertTrue(validator.feed(b"\xf0\x9f"))
+        self.assertTrue(validator.feed(b"\x98"))
+        self.assertFalse(validator.finish())
+        self.assertEqual(validator.error_offset, 0)
@@ -0,0 +1,123 @@
+from codecs import utf_8_decode
+
+
+Buffer = bytes | bytearray | memoryview
+
+# Enough continuation bytes to complete any partial sequence of at least two
+# bytes: only the second byte of a sequence has a range other than 80-BF.
+_continuation_padding = b"\x80\x80"
+
+
+def _partial_error(partial: bytes) -> int | None:
+    """
+    The offset of the invalid sequence in a partial sequence, if it can no
+    longer be completed (the decoder only checks some prefixes, such as those
+    of surrogates, once the whole sequence has arrived).
+    """
+    if len(partial) < 2:
+        # The decoder has already checked the lead byte
+        return None
+    try:
+        utf_8_decode(partial + _continuation_padding, "strict", True)
+    except UnicodeDecodeError as error:
+        if error.start < len(partial):
+            return error.start
+    return None
+
+
+class Utf8Validator:
+    """
+    Validates a text message received in chunks, such as the payloads of the
+    frames of a fragmented message, as section 8.1 of RFC 6455 requires,
+    without keeping the message.
+
+    Invalid UTF-8 (including overlong encodings, surrogates and code points
+    above U+10FFFF) is reported as soon as the chunk containing it is fed,
+    with error_offset giving the offset in the whole message of the start of
+    the invalid sequence.
+    """
+    __slots__ = ("error_offset", "_offset", "_partial")
+
+    def __init__(self) -> None:
+        self.error_offset: int | None = None
+        # Offset in the message of the start of the next chunk
+        self._offset = 0
+        # The start of a sequence which continues in the next chunk
+        self._partial = b""
+
+    def feed(self, chunk: Buffer) -> bool:
+        """
+        Validate the next chunk, returning False if the message is invalid.
+        """
+        if self.error_offset is not None:
+            return False
+        chunk_offset = self._offset
+        self._offset += len(chunk)
+
+        position = 0
+        partial = self._partial
+        if partial:
+            # Complete the sequence split between the chunks first
+            partial_length = len(partial)
+            head = partial + bytes(chunk[:4 - partial_length])
+            try:
+                __, consumed = utf_8_decode(head, "strict", False)
+            except UnicodeDecodeError as error:
+                self.error_offset = chunk_offset - partial_length + error.start
+                return False
+            if not consumed:
+                error_offset = _partial_error(head)
+                if error_offset is not None:
+                    self.error_offset = (
+                        chunk_offset - partial_length + error_offset
+                    )
+                    return False
+                self._partial = head
+                return True
+            self._partial = b""
+            position = consumed - partial_length
+
+        if position >= len(chunk):
+            return True
+        if isinstance(chunk, (bytes, bytearray)):
+            if not position and chunk.isascii():
+                return True
+            data: Buffer = memoryview(chunk)[position:] if position else chunk
+        else:
+            data = chunk[position:]
+
+        try:
+            __, consumed = utf_8_decode(data, "strict", False)
+        except UnicodeDecodeError as error:
+            self.error_offset = chunk_offset + position + error.start
+            return False
+        if consumed < len(data):
+            partial = bytes(data[consumed:])
+            error_offset = _partial_error(partial)
+            if error_offset is not None:
+                self.error_offset = (
+                    chunk_offset + position + consumed + error_offset
+                )
+                return False
+            self._partial = partial
+        return True
+
+    def finish(self) -> bool:
+        """
+        Whether the message fed so far is valid and complete, with no
+        sequence left unfinished.
+        """
+        if self.error_offset is not None:
+            return False
+        if self._partial:
+            self.error_offset = self._offset - len(self._partial)
+            return False
+        return True
+
+    def reset(self) -> None:
+        """
+        Start validating a new message
+        """
+        self.error_offset = None
+        self._offset = 0
+        self._partial = b""
@@ -0,0 +1,83 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from batch import validate_batch
+from benchmarks.corpora import CORPORA
+from registry import public_matchers
+from rfc3986.patterns import Host, URIReference
+
+
+values = [
+    b"http://example.com/a?b#c", b"a b", b"//[::1]:80", b"%zz", b"",
+    b"mailto:x@y", b"http://[::1", b"a:" + b"/a" * 100,
+] * 100
+
+
+class TestValidateBatch(TestCase):
+    def test_in_order(self) -> None:
+        expected = [URIReference.match_full(value) for value in values]
+        self.assertEqual(validate_batch(URIReference, values), expected)
+        self.assertEqual(
+            validate_batch(URIReference, values, workers=3, chunk_size=7),
+            expected,
+        )
+        # A single chunk is validated without threads
+        self.assertEqual(
+            validate_batch(URIReference, values[:5]), expected[:5]
+        )
+        self.assertEqual(validate_batch(URIReference, []), [])
+
+    def test_executor(self) -> None:
+        expected = [Host.match_full(value) for value in values]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for __ in range(2):
+                self.assertEqual(
+                    validate_batch(
+                        Host, values, executor=executor, chunk_size=16
+                    ),
+                    expected,
+                )
+
+    def test_chunk_size(self) -> None:
+        with self.assertRaises(ValueError):
+            validate_batch(Host, values, chunk_size=0)
+
+
+class TestThreadSafety(TestCase):
+    def test_concurrent_matching(self) -> None:
+        # Every matcher on every sample from several threads at once gives
+        # the same results and failures as matching in one thread
+        work = [
+            (matcher, sample)
+            for name, matcher in public_matchers().items()
+            for sample in [*CORPORA[name].valid, *CORPORA[name].near_miss]
+        ]
+        expected = [
+            (matcher.match_full(sample), repr(matcher.match_failure(sample)))
+            for matcher, sample in work
+        ]
+        thread_count = 8
+        results: list[list[tuple[bool, str]]] = [
+            [] for __ in range(thread_count)
+        ]
+        barrier = threading.Barrier(thread_count)
+
+        def run(thread_index: int) -> None:
+            barrier.wait()
+            for matcher, sample in work:
+                results[thread_index].append((
+                    matcher.match_full(sample),
+                    repr(matcher.match_failure(sample)),
+                ))
+
+        threads = [
+            threading.Thread(target=run, args=(thread_index,))
+            for thread_index in range(thread_count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for thread_results in results:
+            self.assertEqual(thread_results, expected)
@@ -0,0 +1,129 @@
+import threading
+from typing import Any
+from unittest import TestCase
+
+from budget import Budget, BudgetMetrics, MatchOutcome, match_within
+from generic import Input, Matcher, _budget_gate
+from peg.grammars import peg_matchers
+from rfc1034.patterns import Domain, SubDomain
+from rfc3986.patterns import Host, IPv6Address, RegName
+
+
+class TestMatchWithin(TestCase):
+    def test_outcomes(self) -> None:
+        cases: list[tuple[type[Matcher[Any]], Input, MatchOutcome]] = [
+            (IPv6Address, b"1:2:3:4:5:6:7:8", MatchOutcome.MATCH),
+            (IPv6Address, b"1:2:3:4:5:6:7", MatchOutcome.NO_MATCH),
+            (Host, "[::1]", MatchOutcome.MATCH),
+            (Domain, b"", MatchOutcome.MATCH),
+        ]
+        for matcher, val, outcome in cases:
+            with self.subTest(matcher=matcher, val=val):
+                budgeted_match = match_within(matcher, val, Budget())
+                self.assertIs(budgeted_match.outcome, outcome)
+                self.assertEqual(
+                    budgeted_match.outcome is MatchOutcome.MATCH,
+                    matcher.match_full(val),
+                )
+        self.assertEqual(_budget_gate.active, 0)
+
+    def test_max_steps(self) -> None:
+        matchers: list[type[Matcher[Any]]] = [
+            IPv6Address, RegName, peg_matchers()["rfc3986.IPv6Address"]
+        ]
+        for matcher in matchers:
+            val = b"1:2:3:4:5:6:7:8" if matcher is not RegName else (
+                b"a%20" * 16
+            )
+            with self.subTest(matcher=matcher):
+                steps = match_within(matcher, val, Budget()).steps
+                self.assertGreater(steps, 0)
+                # Exactly enough, then one short
+                self.assertEqual(
+                    match_within(matcher, val, Budget(max_steps=steps)),
+                    (MatchOutcome.MATCH, steps),
+                )
+                self.assertEqual(
+                    match_within(matcher, val, Budget(max_steps=steps - 1)),
+                    (MatchOutcome.BUDGET_EXCEEDED, steps - 1),
+                )
+
+    def test_fails_fast(self) -> None:
+        # Stops within the budget, however much work the input would take
+        budgeted_match = match_within(
+            SubDomain, b"a." * 50000, Budget(max_steps=100)
+        )
+        self.assertEqual(
+            budgeted_match, (MatchOutcome.BUDGET_EXCEEDED, 100)
+        )
+
+    def test_runs_take_a_step_per_byte(self) -> None:
+        matchers: list[type[Matcher[Any]]] = [
+            RegName, peg_matchers()["rfc3986.RegName"]
+        ]
+        for matcher in matchers:
+            with self.subTest(matcher=matcher):
+                steps = [
+                    match_within(matcher, b"a" * length, Budget()).steps
+                    for length in [1000, 2000]
+                ]
+                self.assertEqual(steps[1] - steps[0], 1000)
+                # A single long run is stopped by a small budget
+                self.assertEqual(
+                    match_within(
+                        matcher, b"a" * 50000, Budget(max_steps=100)
+                    ),
+                    (MatchOutcome.BUDGET_EXCEEDED, 100),
+                )
+
+    def test_max_bytes(self) -> None:
+        self.assertEqual(
+            match_within(Host, b"a" * 11, Budget(max_bytes=10)),
+            (MatchOutcome.BUDGET_EXCEEDED, 0),
+        )
+        self.assertIs(
+            match_within(Host, b"a" * 10, Budget(max_bytes=10)).outcome,
+            MatchOutcome.MATCH,
+        )
+
+    def test_metrics(self) -> None:
+        metrics = BudgetMetrics()
+        for val in [b"::1", b"::g", b"1:2:3:4:5:6:7:8"]:
+            match_within(
+                IPv6Address, val, Budget(max_steps=20), metrics=metrics
+            )
+        stats = metrics.stats["IPv6Address"]
+        self.assertEqual(
+            (stats.calls, stats.matches, stats.no_matches, stats.exceeded),
+            (3, 1, 1, 1),
+        )
+        self.assertEqual(stats.most_steps, 20)
+        self.assertEqual(stats.total_steps, 12 + 4 + 20)
+        self.assertEqual(metrics.as_json()["IPv6Address"]["exceeded"], 1)
+        self.assertIn("IPv6Address", metrics.format_report())
+
+    def test_other_threads_unbudgeted(self) -> None:
+        # A budget only applies to the thread whose match it is for
+        started = threading.Event()
+        finish = threading.Event()
+        results = []
+
+        def unbudgeted() -> None:
+            started.wait()
+            results.append(IPv6Address.match_full(b"1:2:3:4:5:6:7:8"))
+            finish.set()
+
+        thread = threading.Thread(target=unbudgeted)
+        thread.start()
+
+        class Waiting(IPv6Address):
+            @classmethod
+            def match_full(cls, val: Input) -> bool:
+                started.set()
+                finish.wait()
+                return super().match_full(b"1:2:3:4:5:6:7:8")
+
+        budgeted_match = match_within(Waiting, b"", Budget(max_steps=1))
+        thread.join()
+        self.assertEqual(results, [True])
+        self.assertIs(budgeted_match.outcome, MatchOutcome.BUDGET_EXCEEDED)
@@ -0,0 +1,162 @@
+from unittest import TestCase
+
+import instrumentation
+from capture import CaptureArena, capture, walk
+from generic import DefaultMatchAll, MatchResult
+from rfc1034.patterns import Label, SubDomain
+from rfc3986.patterns import (
+    H16,
+    LS32,
+    URI,
+    Authority,
+    DecOctet,
+    Host,
+    IPv4Address,
+    IPv6Address,
+)
+from rfc6455.patterns import Base64Data, Base64Padding, Base64ValueNonEmpty
+
+
+class TestCapture(TestCase):
+    def test_dec_octets(self) -> None:
+        tree = capture(IPv4Address, b"192.0.2.1", [DecOctet])
+        assert tree is not None
+        self.assertIs(tree.root.rule, IPv4Address)
+        self.assertEqual((tree.root.start, tree.root.end), (0, 9))
+        octets = tree.root.children
+        self.assertEqual(
+            [octet.text for octet in octets], [b"192", b"0", b"2", b"1"]
+        )
+        self.assertEqual([octet.start for octet in octets], [0, 4, 6, 8])
+        for octet in octets:
+            self.assertIs(octet.rule, DecOctet)
+            self.assertEqual(octet.children, [])
+            parent = octet.parent
+            assert parent is not None
+            self.assertEqual(parent.index, 0)
+
+    def test_lookahead(self) -> None:
+        # IPv6address matches some h16s again as part of an ls32
+        for val, h16s, dec_octets in [
+            (b"1:2:3:4:5:6:7:8", [b"%d" % i for i in range(1, 9)], []),
+            (b"1::2:3:4", [b"1", b"2", b"3", b"4"], []),
+            (b"::ffff:1.2.3.4", [b"ffff", b"1"], [b"1", b"2", b"3", b"4"]),
+        ]:
+            with self.subTest(val=val):
+                tree = capture(IPv6Address, val, [H16, LS32, DecOctet])
+                assert tree is not None
+                self.assertEqual(
+                    [node.text for node in tree.find_all(H16)], h16s
+                )
+                self.assertEqual(
+                    [node.text for node in tree.find_all(DecOctet)],
+                    dec_octets,
+                )
+
+    def test_labels(self) -> None:
+        tree = capture(SubDomain, b"www.ex-ample.com", [Label])
+        assert tree is not None
+        self.assertEqual(
+            [label.text for label in tree.find_all(Label)],
+            [b"www", b"ex-ample", b"com"],
+        )
+
+    def test_base64_quads(self) -> None:
+        tree = capture(
+            Base64ValueNonEmpty, b"QUJDREVGRw==", [Base64Data, Base64Padding]
+        )
+        assert tree is not None
+        self.assertEqual(
+            [(node.rule, node.text) for node in tree.root.children],
+            [
+                (Base64Data, b"QUJD"),
+                (Base64Data, b"REVG"),
+                (Base64Padding, b"Rw=="),
+            ],
+        )
+
+    def test_nested(self) -> None:
+        tree = capture(URI, b"http://user@[::1]:80/a", [Authority, Host, H16])
+        assert tree is not None
+        self.assertEqual(
+            [
+                (depth, node.rule, node.text)
+                for depth, node in walk(tree.root)
+                if node.rule is not H16
+            ],
+            [
+                (0, URI, b"http://user@[::1]:80/a"),
+                (1, Authority, b"user@[::1]:80"),
+                (2, Host, b"[::1]"),
+            ],
+        )
+        self.assertEqual([node.text for node in tree.find_all(H16)], [b"1"])
+
+    def test_no_match(self) -> None:
+        self.assertIsNone(capture(IPv4Address, b"1.2.3", [DecOctet]))
+        self.assertIsNone(capture(IPv4Address, b"1.2.3.4x", [DecOctet]))
+
+        tree = capture(IPv4Address, b"1.2.3.4x", [DecOctet], full=False)
+        assert tree is not None
+        self.assertEqual(tree.root.end, 7)
+
+        tree = capture(IPv4Address, b"ip=1.2.3.4", [DecOctet], start=3)
+        assert tree is not None
+        self.assertEqual(tree.root.children[0].start, 3)
+
+    def test_arena_reuse(self) -> None:
+        # Grows past its capacity, and can be used again
+        arena = CaptureArena(capacity=1)
+        for val in [b"1.2.3.4", b"10.20.30.40"]:
+            tree = capture(IPv4Address, val, [DecOctet], arena=arena)
+            assert tree is not None
+            self.assertEqual(len(tree), 5)
+            self.assertEqual(tree.root.children[3].text, val.split(b".")[3])
+
+    def test_patched_only_while_capturing(self) -> None:
+        original = DecOctet.__dict__["match_from"]
+        self.assertNotIn("match_from", vars(Base64Data))
+        capture(IPv4Address, b"1.2.3.4", [DecOctet, Base64Data])
+        self.assertIs(DecOctet.__dict__["match_from"], original)
+        # The wrapper of an inherited match_from is removed again
+        self.assertNotIn("match_from", vars(Base64Data))
+
+    def test_interleaved_with_instrumentation(self) -> None:
+        # Both wrap match_from, and either may stop while the other is
+        # still running
+        originals = {
+            cls: cls.__dict__["match_from"]
+            for cls in [IPv4Address, DecOctet]
+        }
+        recorders: list[instrumentation.Recorder] = []
+
+        class StopsInstrumenting(DefaultMatchAll):
+            @classmethod
+            def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+                instrumentation.stop(recorders.pop())
+                return IPv4Address.match_from(val, start)
+
+        class StartsInstrumenting(DefaultMatchAll):
+            @classmethod
+            def match_from(cls, val: bytes, start: int) -> MatchResult | None:
+                recorders.append(instrumentation.start())
+                return IPv4Address.match_from(val, start)
+
+        # Instrumenting stops during the capture
+        recorders.append(instrumentation.start())
+        tree = capture(StopsInstrumenting, b"192.0.2.1", [DecOctet])
+        assert tree is not None
+        self.assertEqual(len(tree.find_all(DecOctet)), 4)
+        for cls, original in originals.items():
+            self.assertIs(cls.__dict__["match_from"], original)
+
+        # Instrumenting starts during the capture, and outlasts it
+        tree = capture(StartsInstrumenting, b"192.0.2.1", [DecOctet])
+        assert tree is not None
+        self.assertEqual(len(tree.find_all(DecOctet)), 4)
+        recorder = recorders.pop()
+        IPv4Address.match_full(b"10.0.0.1")
+        instrumentation.stop(recorder)
+        self.assertEqual(recorder.totals()["DecOctet"].calls, 8)
+        for cls, original in originals.items():
+            self.assertIs(cls.__dict__["match_from"], original)
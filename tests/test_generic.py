@@ -1,6 +1,20 @@
 from unittest import TestCase
 
-from generic import case_insensitive_compare, literal_compare
+from generic import (
+    END_OF_INPUT,
+    LATIN_1_TEXT,
+    CharClass,
+    ConstantLength,
+    DefaultMatchAll,
+    Input,
+    Matcher,
+    MatchResult,
+    _failure_gate,
+    alternation,
+    case_insensitive_compare,
+    keyword_set,
+    literal_compare,
+)
 
 
 class TestLiteralChar(TestCase):
@@ -27,6 +41,13 @@ class TestLiteralChar(TestCase):
         self.assertTrue(abc_test.match_full(b"abc"))
         self.assertFalse(abc_test.match_full(b"def"))
 
+    def test_one_class_per_literal(self) -> None:
+        self.assertIs(literal_compare(b"+"), literal_compare(b"+"))
+        self.assertIsNot(literal_compare(b"a"), case_insensitive_compare(b"a"))
+        self.assertIs(
+            case_insensitive_compare(b"a"), case_insensitive_compare(b"a")
+        )
+
 
 class TestCaseInsensitiveCompare(TestCase):
     def test_case_insensitive(self) -> None:
@@ -62,3 +83,250 @@ class TestCaseInsensitiveCompare(TestCase):
                 self.assertTrue(colon_test.match_full(bytes([i])))
             else:
                 self.assertFalse(colon_test.match_full(bytes([i])))
+
+
+class TestMatchFailure(TestCase):
+    def test_match_failure(self) -> None:
+        abc_test = literal_compare(b"abc")
+        self.assertIsNone(abc_test.match_failure(b"abc"))
+
+        failure = abc_test.match_failure(b"abd")
+        assert failure is not None
+        self.assertEqual(failure.position, 0)
+        self.assertEqual(failure.expected, {abc_test.__qualname__})
+
+        failure = abc_test.match_failure(b"abcd")
+        assert failure is not None
+        self.assertEqual(failure.position, 3)
+        self.assertEqual(failure.expected, {END_OF_INPUT})
+
+    def test_failure_gate(self) -> None:
+        # Only open while match_failure runs, even if matching raises
+        active = []
+
+        class Raises(Matcher):
+            @classmethod
+            def match_start(cls, val: Input) -> MatchResult | None:
+                active.append(_failure_gate.active)
+                raise ValueError
+
+        self.assertEqual(_failure_gate.active, 0)
+        with self.assertRaises(ValueError):
+            Raises.match_failure(b"a")
+        self.assertEqual(active, [1])
+        self.assertEqual(_failure_gate.active, 0)
+
+
+class TestCharClass(TestCase):
+    def test_char_class(self) -> None:
+        class Brackets(CharClass):
+            chars = b"[]^-\\"
+
+        for char in b"[]^-\\":
+            self.assertTrue(Brackets.match_full(bytes([char])))
+        self.assertFalse(Brackets.match_full(b"a"))
+        self.assertFalse(Brackets.match_full(b"[]"))
+        self.assertFalse(Brackets.match_full(b""))
+        self.assertEqual(sum(Brackets.table), 5)
+
+        self.assertEqual(Brackets.run_end(b"a[^-]b", 1), 5)
+        self.assertEqual(Brackets.run_end(b"a[^-]b", 0), 0)
+        self.assertEqual(Brackets.run_end(b"a[^-]", 1), 5)
+        self.assertEqual(Brackets.run_end(b"a", 1), 1)
+
+
+class TestKeywordSet(TestCase):
+    def test_keyword_set(self) -> None:
+        methods = keyword_set([b"GET", b"HEAD", b"POST", b"PUT", b"PATCH"])
+        self.assertTrue(methods.match_full(b"GET"))
+        self.assertTrue(methods.match_full(b"get"))
+        self.assertTrue(methods.match_full(b"pAtCh"))
+        self.assertFalse(methods.match_full(b"PU"))
+        self.assertFalse(methods.match_full(b"PUTS"))
+        self.assertFalse(methods.match_full(b""))
+        self.assertFalse(methods.match_full(b"G\xc5T"))
+
+        match_result = methods.match_from(b" post /", 1)
+        assert match_result is not None
+        self.assertEqual((match_result.start, match_result.end), (1, 5))
+        self.assertEqual(match_result.keyword_index, 2)
+        self.assertEqual(match_result.keyword, b"POST")
+
+    def test_longest_match(self) -> None:
+        schemes = keyword_set([b"http", b"https", b"ws", b"wss"])
+        for val, keyword, length in [
+            (b"https://", b"https", 5),
+            (b"http://", b"http", 4),
+            (b"httpx", b"http", 4),
+            (b"WSS:", b"wss", 3),
+            (b"ws", b"ws", 2),
+        ]:
+            with self.subTest(val=val):
+                match_result = schemes.match_start(val)
+                assert match_result is not None
+                self.assertEqual(match_result.keyword, keyword)
+                self.assertEqual(match_result.length, length)
+        self.assertIsNone(schemes.match_start(b"htt"))
+
+        failure = schemes.match_failure(b"htt")
+        assert failure is not None
+        self.assertEqual(failure.position, 3)
+
+    def test_duplicates_and_non_letters(self) -> None:
+        keywords = keyword_set([b"a-1", b"A-1", b"[]"])
+        match_result = keywords.match_start(b"A-1")
+        assert match_result is not None
+        self.assertEqual(match_result.keyword_index, 0)
+        self.assertTrue(keywords.match_full(b"[]"))
+        self.assertFalse(keywords.match_full(b"{}"))
+
+    def test_keyword_set_non_ascii(self) -> None:
+        keywords = keyword_set([b"caf\xe9", b"na\xefve"])
+        self.assertEqual(keywords.__name__, "KeywordSet<caf\xe9|na\xefve>")
+        self.assertTrue(keywords.match_full(b"na\xefve"))
+
+
+class TestAlternation(TestCase):
+    def test_alternation(self) -> None:
+        dash = literal_compare(b"-")
+        word = keyword_set([b"ab", b"abc"])
+        either = alternation([dash, word])
+        self.assertTrue(either.match_full(b"-"))
+        self.assertTrue(either.match_full(b"abc"))
+        self.assertFalse(either.match_full(b"x"))
+        self.assertFalse(either.match_full(b"-ab"))
+
+        match_result = either.match_from(b"x-abc", 2)
+        assert match_result is not None
+        self.assertEqual((match_result.start, match_result.end), (2, 5))
+        self.assertEqual(match_result.branch, 1)
+        self.assertIs(either.alternative(match_result), word)
+
+        match_result = either.match_start(b"-")
+        assert match_result is not None
+        self.assertEqual(match_result.branch, 0)
+        self.assertIs(either.alternative(match_result), dash)
+
+    def test_ordered(self) -> None:
+        # The first alternative to match is taken, not the longest
+        short = literal_compare(b"a")
+        long = literal_compare(b"ab")
+        first = alternation([short, long])
+        match_result = first.match_start(b"ab")
+        assert match_result is not None
+        self.assertEqual((match_result.branch, match_result.length), (0, 1))
+        self.assertFalse(first.match_full(b"ab"))
+
+
+class TestMatchFrom(TestCase):
+    def test_shared_result_unchanged(self) -> None:
+        # match_from built on match_start leaves the result it was given as
+        # it was, in case it is shared
+        shared = MatchResult(start=0, length=1)
+
+        class Shared(Matcher):
+            @classmethod
+            def match_start(cls, val: Input) -> MatchResult | None:
+                return shared
+
+        match_result = Shared.match_from(b"xyz", 2)
+        assert match_result is not None
+        self.assertEqual((match_result.start, match_result.end), (2, 3))
+        self.assertEqual(shared.start, 0)
+
+
+class TestTextInput(TestCase):
+    def test_ascii(self) -> None:
+        abc_test = literal_compare(b"abc")
+        self.assertTrue(abc_test.match_full("abc"))
+        self.assertFalse(abc_test.match_full("abd"))
+        match_result = abc_test.match_start("abcd")
+        assert match_result is not None
+        self.assertEqual(match_result.end, 3)
+
+        methods = keyword_set([b"GET", b"POST"])
+        self.assertTrue(methods.match_full("post"))
+        self.assertIsNone(methods.match_failure("GET"))
+
+        class Digit(CharClass):
+            chars = b"0123456789"
+
+        self.assertTrue(Digit.match_full("7"))
+        self.assertFalse(Digit.match_full("x"))
+
+    def test_latin_1(self) -> None:
+        # Each character is the octet of its code point
+        class EAcute(CharClass):
+            chars = "é".encode("latin-1")
+
+        self.assertTrue(EAcute.match_full(b"\xe9"))
+        self.assertTrue(EAcute.match_full("é"))
+        match_result = EAcute.match_start("éa")
+        assert match_result is not None
+        self.assertEqual(match_result.end, 1)
+        self.assertEqual(EAcute.run_end("aééa", 1), 3)
+
+        cafe_test = literal_compare("café".encode("latin-1"))
+        self.assertTrue(cafe_test.match_full("café"))
+        self.assertFalse(cafe_test.match_full("cafe"))
+        self.assertIsNone(
+            case_insensitive_compare(b"ab").match_start("\xc1b")
+        )
+
+    def test_text_like_octets(self) -> None:
+        # Leaves compare characters directly, with the results of their
+        # octets
+        class Upper(CharClass):
+            chars = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ\xc0\xff"
+
+        leaves: list[type[ConstantLength]] = [
+            Upper, literal_compare(b"\xc0"), case_insensitive_compare(b"a"),
+        ]
+        for leaf in leaves:
+            for code in range(256):
+                with self.subTest(leaf=leaf, code=code):
+                    self.assertEqual(
+                        leaf.match_full(chr(code)),
+                        leaf.match_full(bytes([code])),
+                    )
+        val = bytes(range(256)) * 2
+        for start in range(0, 512, 7):
+            with self.subTest(start=start):
+                self.assertEqual(
+                    Upper.run_end(val.decode("latin-1"), start),
+                    Upper.run_end(val, start),
+                )
+
+    def test_past_latin_1(self) -> None:
+        # Rejected without being matched, even where the octets of some
+        # encoding of it would match
+        class Dash(CharClass):
+            chars = b"-\x13"
+
+        self.assertFalse(Dash.match_full("\u2013"))
+        self.assertIsNone(Dash.match_start("\u2013"))
+        self.assertEqual(Dash.run_end("--\u2013", 0), 2)
+        self.assertEqual(Dash.run_end("----", 1, 3), 3)
+
+        class Dashes(DefaultMatchAll):
+            @classmethod
+            def match_from(cls, val: Input, start: int) -> MatchResult:
+                end = Dash.run_end(val, start)
+                return MatchResult(start=start, length=end - start)
+
+        class TextDashes(Dashes):
+            # Matches the characters, rather than the input's octets
+            text_input = True
+
+        self.assertIsNone(Dashes.match_start("--\u2013"))
+        match_result = TextDashes.match_start("--\u2013")
+        assert match_result is not None
+        self.assertEqual(match_result.end, 2)
+        self.assertFalse(TextDashes.match_full("--\u2013"))
+
+        methods = keyword_set([b"GET"])
+        self.assertFalse(methods.match_full("GЕT"))
+        failure = methods.match_failure("GЕT")
+        assert failure is not None
+        self.assertEqual(failure.position, 1)
+        self.assertEqual(failure.expected, {LATIN_1_TEXT})
@@ -0,0 +1,237 @@
+import contextlib
+import errno
+import io
+import os
+import tempfile
+from typing import Any
+from unittest import TestCase
+from unittest.mock import patch
+
+from grep import Mode, ScanStats, find_all, main, read_lines, scan
+from rfc1034.patterns import Domain
+from rfc2616.patterns import Comment
+from rfc3986.patterns import Host, IPv4Address
+
+
+log = (
+    b"example.com\n"
+    b"not a host\r\n"
+    b"[::1]\n"
+    b"\n"
+    b"from 10.0.0.1 to 192.168.1.254, not 1.2.3\n"
+    b"bad%zz"
+)
+
+
+class TestReadLines(TestCase):
+    def test_blocks(self) -> None:
+        expected = [
+            b"example.com", b"not a host", b"[::1]", b"",
+            b"from 10.0.0.1 to 192.168.1.254, not 1.2.3", b"bad%zz",
+        ]
+        # Down to blocks smaller than a line, and splitting "\r\n"
+        for block_size in [1, 2, 3, 7, 12, 1 << 20]:
+            with self.subTest(block_size=block_size):
+                lines = [
+                    line
+                    for block_lines in read_lines(io.BytesIO(log), block_size)
+                    for line in block_lines
+                ]
+                self.assertEqual(lines, expected)
+        self.assertEqual(list(read_lines(io.BytesIO(b""))), [])
+        self.assertEqual(list(read_lines(io.BytesIO(b"a\n"))), [[b"a"]])
+
+
+class TestScan(TestCase):
+    def assert_scan(
+        self, mode: Mode, expected: bytes, *, block_size: int = 5
+    ) -> None:
+        for stats in [None, ScanStats()]:
+            with self.subTest(mode=mode, stats=stats):
+                output = io.BytesIO()
+                selected = scan(
+                    Host, io.BytesIO(log), output, mode,
+                    stats=stats, block_size=block_size,
+                )
+                self.assertEqual(output.getvalue(), expected)
+                self.assertEqual(selected, expected.count(b"\n"))
+
+    def test_valid(self) -> None:
+        # The empty line is a valid, empty, reg-name
+        self.assert_scan(Mode.VALID, b"example.com\n[::1]\n\n")
+
+    def test_invalid(self) -> None:
+        self.assert_scan(
+            Mode.INVALID,
+            b"not a host\n"
+            b"from 10.0.0.1 to 192.168.1.254, not 1.2.3\n"
+            b"bad%zz\n",
+        )
+
+    def test_extract(self) -> None:
+        output = io.BytesIO()
+        scan(IPv4Address, io.BytesIO(log), output, Mode.EXTRACT)
+        self.assertEqual(output.getvalue(), b"10.0.0.1\n192.168.1.254\n")
+
+    def test_stats(self) -> None:
+        stats = ScanStats()
+        scan(Host, io.BytesIO(log), io.BytesIO(), Mode.VALID, stats=stats)
+        self.assertEqual((stats.lines, stats.selected), (6, 3))
+        # Less the "\r", and counting a line ending for the last line
+        self.assertEqual(stats.bytes, len(log) - 1 + 1)
+        self.assertEqual(sum(stats.latency_histogram), 6)
+        self.assertLessEqual(
+            stats.latency_percentile(50), stats.latency_percentile(99)
+        )
+        self.assertLessEqual(stats.latency_percentile(99), stats.slowest_ns)
+        self.assertEqual(stats.as_json()["lines"], 6)
+        self.assertIn("lines/s", stats.format_summary())
+
+
+class TestFindAll(TestCase):
+    def test_find_all(self) -> None:
+        cases = [
+            (IPv4Address, b"1.2.3.4.5.6.7.8", [b"1.2.3.4", b"5.6.7.8"]),
+            (IPv4Address, b"", []),
+            (Domain, b"a.b, c-d", [b"a.b", b"c-d"]),
+        ]
+        for matcher, line, expected in cases:
+            with self.subTest(matcher=matcher, line=line):
+                self.assertEqual(
+                    [
+                        line[match_result.start:match_result.end]
+                        for match_result in find_all(matcher, line).matches
+                    ],
+                    expected,
+                )
+
+    def test_max_steps(self) -> None:
+        # Comment reads to the end of a run of "(" from each byte of it
+        extraction = find_all(Comment, b"(" * 2000, max_steps=10_000)
+        self.assertEqual(extraction, ([], False))
+        extraction = find_all(
+            IPv4Address, b"1.2.3.4 " + b"(" * 2000, max_steps=100
+        )
+        self.assertFalse(extraction.complete)
+        self.assertEqual(
+            [match_result.end for match_result in extraction.matches], [7]
+        )
+        self.assertTrue(
+            find_all(IPv4Address, b"1.2.3.4 5.6.7.8", max_steps=None).complete
+        )
+
+    def test_scan_max_steps(self) -> None:
+        stats = ScanStats()
+        output = io.BytesIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            scan(
+                Comment, io.BytesIO(b"(a)\n" + b"(" * 2000 + b"\n(b)"),
+                output, Mode.EXTRACT, stats=stats, max_steps=10_000,
+            )
+        self.assertEqual(output.getvalue(), b"(a)\n(b)\n")
+        self.assertEqual(stats.unfinished, 1)
+        self.assertIn("line 2: stopped extracting", stderr.getvalue())
+
+
+class TestMain(TestCase):
+    def run_main(
+        self, argv: list[str], stdin: bytes = b""
+    ) -> tuple[int, bytes, str]:
+        stdout = io.TextIOWrapper(io.BytesIO())
+        stderr = io.StringIO()
+        with (
+            patch("sys.stdin", io.TextIOWrapper(io.BytesIO(stdin))),
+            patch("sys.stdout", stdout),
+            contextlib.redirect_stderr(stderr),
+        ):
+            try:
+                exit_code = main(argv)
+            except SystemExit as exc:
+                exit_code = int(exc.code or 0)
+        return exit_code, stdout.buffer.getvalue(), stderr.getvalue()
+
+    def test_stdin(self) -> None:
+        self.assertEqual(
+            self.run_main(["rfc3986.IPv4Address", "-o"], log)[:2],
+            (0, b"10.0.0.1\n192.168.1.254\n"),
+        )
+        self.assertEqual(
+            self.run_main(["rfc3986.IPv4Address"], log)[:2], (1, b"")
+        )
+
+    def test_files(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "log")
+            with open(path, "wb") as log_file:
+                log_file.write(log)
+            exit_code, output, summary = self.run_main(
+                ["rfc3986.Host", "--invalid", "--stats", path, path]
+            )
+            self.assertEqual(exit_code, 0)
+            self.assertEqual(output.count(b"bad%zz\n"), 2)
+            self.assertIn("12 lines", summary)
+
+            # A file which can't be read is reported, and the rest scanned
+            missing = os.path.join(directory, "missing")
+            exit_code, output, error = self.run_main(
+                ["rfc3986.Host", "--invalid", path, missing, path]
+            )
+            self.assertEqual(exit_code, 2)
+            self.assertEqual(output.count(b"bad%zz\n"), 2)
+            self.assertIn("missing", error)
+
+    def run_with_streams(
+        self, argv: list[str], stdin: io.BytesIO, stdout: io.BytesIO
+    ) -> tuple[int, str]:
+        stderr = io.StringIO()
+        with (
+            patch("sys.stdin", io.TextIOWrapper(stdin)),
+            patch("sys.stdout", io.TextIOWrapper(stdout)),
+            contextlib.redirect_stderr(stderr),
+        ):
+            exit_code = main(argv)
+        return exit_code, stderr.getvalue()
+
+    def test_broken_pipe(self) -> None:
+        # As "| head": stop quietly, without reporting the input
+        class ClosedPipe(io.BytesIO):
+            def write(self, data: Any) -> int:
+                raise BrokenPipeError(errno.EPIPE, "Broken pipe")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "log")
+            with open(path, "wb") as log_file:
+                log_file.write(log)
+            exit_code, error = self.run_with_streams(
+                ["rfc3986.Host", path, path], io.BytesIO(), ClosedPipe()
+            )
+        self.assertEqual(exit_code, 141)
+        self.assertEqual(error, "")
+
+    def test_read_error(self) -> None:
+        class FailingRead(io.BytesIO):
+            def read(self, size: int | None = -1) -> bytes:
+                raise OSError(errno.EIO, "Input/output error")
+
+        output = io.BytesIO()
+        exit_code, error = self.run_with_streams(
+            ["rfc3986.Host"], FailingRead(), output
+        )
+        self.assertEqual(exit_code, 2)
+        self.assertEqual(error, "-: Input/output error\n")
+
+    def test_interrupted(self) -> None:
+        class Interrupted(io.BytesIO):
+            def read(self, size: int | None = -1) -> bytes:
+                raise KeyboardInterrupt
+
+        exit_code, __ = self.run_with_streams(
+            ["rfc3986.Host"], Interrupted(), io.BytesIO()
+        )
+        self.assertEqual(exit_code, 130)
+
+    def test_unknown_matcher(self) -> None:
+        exit_code, __, error = self.run_main(["rfc3986.Nope"])
+        self.assertEqual(exit_code, 2)
+        self.assertIn("Unknown matcher", error)
@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+import instrumentation
+from generic import DefaultMatchAll, Input, MatchResult
+from rfc3986.patterns import H16, Host, IPv6Address
+
+
+class TestInstrument(TestCase):
+    def test_call_tree(self) -> None:
+        with instrumentation.instrument() as recorder:
+            self.assertTrue(Host.match_full(b"[::1]"))
+
+        host_node = recorder.root.children["Host"]
+        self.assertEqual(host_node.stats.calls, 1)
+        self.assertEqual(host_node.stats.successes, 1)
+        self.assertEqual(host_node.stats.bytes_consumed, 5)
+
+        ip_literal_node = host_node.children["IPLiteral"]
+        ipv6_node = ip_literal_node.children["IPv6Address"]
+        self.assertEqual(ipv6_node.stats.successes, 1)
+        self.assertEqual(ipv6_node.stats.bytes_consumed, 3)
+        self.assertIn("H16", ipv6_node.children)
+        self.assertGreaterEqual(
+            host_node.stats.total_ns, ip_literal_node.stats.total_ns
+        )
+
+        report = recorder.format_report()
+        self.assertIn("Host", report)
+        self.assertIn("    IPv6Address", report)
+
+    def test_totals(self) -> None:
+        with instrumentation.instrument() as recorder:
+            self.assertTrue(IPv6Address.match_full(b"1:2:3:4:5:6:7:8"))
+            self.assertFalse(H16.match_full(b"12345"))
+
+        totals = recorder.totals()
+        self.assertEqual(totals["IPv6Address"].calls, 1)
+        self.assertGreater(totals["H16"].calls, 8)
+        self.assertGreater(totals["H16"].failures, 0)
+        self.assertGreater(totals["HexDig"].calls, totals["H16"].calls)
+
+    def test_uninstalled_when_inactive(self) -> None:
+        original = Host.__dict__["match_from"]
+        with instrumentation.instrument():
+            self.assertIsNot(Host.__dict__["match_from"], original)
+            with instrumentation.instrument():
+                pass
+            # Still active for the outer block
+            self.assertIsNot(Host.__dict__["match_from"], original)
+        self.assertIs(Host.__dict__["match_from"], original)
+
+    def test_new_matchers_instrumented(self) -> None:
+        with instrumentation.instrument() as recorder:
+            class Empty(DefaultMatchAll):
+                @classmethod
+                def match_start(cls, val: Input) -> MatchResult | None:
+                    return MatchResult(start=0, length=0)
+
+            self.assertTrue(Empty.match_full(b""))
+
+        empty_node = recorder.root.children[Empty.__qualname__]
+        self.assertEqual(empty_node.stats.calls, 1)
+        self.assertNotIn("match_full", vars(Empty))
+
+    def test_recursive_calls(self) -> None:
+        with instrumentation.instrument() as recorder:
+            class Nested(DefaultMatchAll):
+                # "(" [ nested ] ")", calling itself for the inner pair
+                @classmethod
+                def match_from(
+                    cls, val: Input, start: int
+                ) -> MatchResult | None:
+                    if val[start:start + 1] != b"(":
+                        return None
+                    inner = cls.match_from(val, start + 1)
+                    offset = inner.end if inner else start + 1
+                    if val[offset:offset + 1] != b")":
+                        return None
+                    return MatchResult(start=start, length=offset + 1 - start)
+
+            self.assertTrue(Nested.match_full(b"(())"))
+
+        node = recorder.root.children[Nested.__qualname__]
+        self.assertEqual(node.stats.calls, 1)
+        self.assertEqual(node.stats.bytes_consumed, 4)
+        node = node.children[Nested.__qualname__]
+        self.assertEqual((node.stats.calls, node.stats.bytes_consumed), (1, 2))
+        node = node.children[Nested.__qualname__]
+        self.assertEqual((node.stats.calls, node.stats.failures), (1, 1))
+        self.assertEqual(recorder.totals()[Nested.__qualname__].calls, 3)
+
+    def test_environment_variable(self) -> None:
+        completed = subprocess.run(
+            [
+                sys.executable, "-c",
+                "from rfc3986.patterns import Host;"
+                " Host.match_full(b'example.com')",
+            ],
+            env=dict(os.environ, ABNF_PATTERNS_INSTRUMENT="1"),
+            cwd=os.path.dirname(os.path.dirname(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertIn("RegName", completed.stderr)
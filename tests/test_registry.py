@@ -0,0 +1,22 @@
+from unittest import TestCase
+
+from registry import public_matchers, resolve_matcher
+from rfc2234.patterns import Alpha
+from rfc3986.patterns import Host
+
+
+class TestRegistry(TestCase):
+    def test_public_matchers(self) -> None:
+        matchers = public_matchers()
+        self.assertIs(matchers["rfc3986.Host"], Host)
+        self.assertIs(matchers["rfc2234.Alpha"], Alpha)
+        # Imported names are only listed where they are defined
+        self.assertNotIn("rfc1034.Letter", matchers)
+        self.assertNotIn("rfc3986.Alpha", matchers)
+        # Nested helper classes are not public matchers
+        self.assertNotIn("rfc2616.WhiteSpace", matchers)
+
+    def test_resolve_matcher(self) -> None:
+        self.assertIs(resolve_matcher("rfc3986.Host"), Host)
+        with self.assertRaises(ValueError):
+            resolve_matcher("rfc3986.NotARule")